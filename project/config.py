@@ -24,6 +24,10 @@ WEIGHT_INIT_RANGE = 1.0
 
 # --- Параметри початкової структури ---
 INITIAL_CONNECTIONS = 8 # Кількість випадкових початкових з'єднань
+# True - мережі прямого поширення без циклів; False - рекурентні мережі зі станом між кроками симуляції
+FEED_FORWARD = True
+# Компілювати мережі у шари матриць (numpy) замість поелементного циклу - швидше для великих мереж
+LAYERED_NETWORKS = False
 
 # --- Параметри кросоверу та відбору ---
 CROSSOVER_RATE = 0.75
@@ -41,10 +45,36 @@ MAZE_WIDTH = max(5, MAZE_WIDTH)
 MAZE_HEIGHT = max(5, MAZE_HEIGHT)
 MAZE_SEED = None
 MAX_STEPS_PER_EVALUATION = 400
+# Оцінювати всю популяцію в одному процесі покроково через NumPy замість пулу процесів
+BATCH_EVALUATION = False
+# Кількість геномів в одному завданні пулу процесів (None або 0 - автоматично за розміром популяції)
+EVAL_CHUNK_SIZE = None
+# Рівень логування пакета neat: "TRACE", "DEBUG", "INFO", "WARNING", "ERROR"
+LOG_LEVEL = "INFO"
+# Стиснення двійкових збережень (.neatb): "none", "gzip" або "zstd" (потрібен пакет zstandard)
+CHECKPOINT_COMPRESSION = "gzip"
+# Історія поколінь: скільки останніх поколінь тримати в пам'яті та у збереженнях (None - усі);
+# для всього запуску зберігаються лише підсумки (history_summary), повна історія - у журналі запуску
+STATS_HISTORY_WINDOW = 500
+# Каталог журналів запуску (JSON Lines, один рядок на покоління), напр. "run_logs"; None - без журналу
+RUN_LOG_DIR = None
+# Автоматичні контрольні точки під час пакетного запуску (пишуться у фоновому потоці)
+CHECKPOINT_DIR = None # Каталог, напр. "checkpoints"; None - вимкнено
+CHECKPOINT_EVERY_GENERATIONS = 25 # None - не за кількістю поколінь
+CHECKPOINT_EVERY_SECONDS = None # None - не за часом
+CHECKPOINT_KEEP_LAST = 3 # Скільки останніх контрольних точок зберігати
 
 # --- Параметри агента ---
 NUM_RANGEFINDERS = 4
 RANGEFINDER_MAX_DIST = 8.0
+# Алгоритм датчиків відстані: "march" - покроковий (крок 0.1, як у наявних запусках), "dda" - точний і швидший обхід клітинок
+# (змінює значення датчиків, а отже й фітнес, тому вмикається явно)
+RAY_CASTER = "march"
+# Передобчислена таблиця відстаней датчиків для кожного лабіринту (швидкий, але наближений пошук замість кидання променів)
+RAY_LOOKUP_TABLE = False
+RAY_TABLE_RESOLUTION = 4 # Вибірок на клітинку вздовж кожної осі
+RAY_TABLE_ANGLE_BINS = 64 # Кутів на повне коло
+RAY_TABLE_CACHE_DIR = "ray_tables" # Каталог дискового кешу таблиць (None - лише в пам'яті)
 NUM_RADAR_SLICES = 4
 AGENT_MAX_SPEED = 1
 
@@ -2,7 +2,11 @@
 
 import math
 import random
-from .maze import Maze, CELL_WALL, CELL_GOAL # Імпортуємо Maze для перевірки типу
+from .maze import Maze, CELL_WALL, CELL_GOAL, WALL_BITMAP_PADDING # Імпортуємо Maze для перевірки типу
+from .ray_table import get_ray_table
+
+# Доступні алгоритми кидання променів для датчиків відстані (config['RAY_CASTER'])
+RAY_CASTERS = ('march', 'dda')
 
 class Agent:
     """
@@ -32,6 +36,12 @@ class Agent:
         self.rangefinder_max_dist = config['RANGEFINDER_MAX_DIST']
         self.num_radar_slices = config['NUM_RADAR_SLICES']
         self.radar_slice_angle = 2 * math.pi / self.num_radar_slices
+        # 'march' - покрокова перевірка вздовж променя (старі запуски), 'dda' - точний обхід клітинок
+        self.ray_caster = config.get('RAY_CASTER', 'march')
+        if self.ray_caster not in RAY_CASTERS:
+            raise ValueError(f"Unknown RAY_CASTER '{self.ray_caster}'. Expected one of {RAY_CASTERS}.")
+        # Якщо увімкнено, відстані беруться з передобчисленої таблиці лабіринту (environment/ray_table.py)
+        self.ray_table_config = config if config.get('RAY_LOOKUP_TABLE', False) else None
 
         # Оновлення перевірки NUM_INPUTS (HeadX, HeadY, Vel = 3)
         expected_inputs = self.num_rangefinders + self.num_radar_slices + 3
@@ -63,6 +73,10 @@ class Agent:
 
         # Початкова точка променя - це поточна позиція агента
         start_x_ray, start_y_ray = self.x, self.y
+        # Бітова карта стін з рамкою: вихід за межі лабіринту теж дає стіну
+        walls = maze.wall_bitmap
+        stride = maze.wall_stride
+        pad = WALL_BITMAP_PADDING
         
         current_dist = 0.0
         # Кінцева точка променя, яку ми будемо оновлювати
@@ -73,18 +87,8 @@ class Agent:
             check_x = start_x_ray + cos_a * current_dist
             check_y = start_y_ray + sin_a * current_dist
             
-            map_r, map_c = int(check_y), int(check_x)
-
-            # Перевіряємо, чи точка перевірки все ще в межах лабіринту
-            if not maze._is_valid(map_r, map_c):
-                # Промінь вийшов за межі лабіринту. Зупиняємось на межі max_dist або на фактичній межі.
-                # Кінцева точка - це остання валідна точка перед виходом за межі max_dist.
-                ray_end_x = start_x_ray + cos_a * current_dist # Точка на промені
-                ray_end_y = start_y_ray + sin_a * current_dist
-                return start_x_ray, start_y_ray, ray_end_x, ray_end_y, current_dist
-
-            # Перевіряємо на зіткнення зі стіною
-            if maze.grid[map_r][map_c] == CELL_WALL:
+            # Перевіряємо на зіткнення зі стіною (або вихід за межі лабіринту)
+            if walls[(int(check_y) + pad) * stride + int(check_x) + pad]:
                 # Промінь вдарився в стіну.
                 ray_end_x = start_x_ray + cos_a * current_dist # Точка на промені
                 ray_end_y = start_y_ray + sin_a * current_dist
@@ -97,13 +101,80 @@ class Agent:
         ray_end_y = start_y_ray + sin_a * max_dist
         return start_x_ray, start_y_ray, ray_end_x, ray_end_y, max_dist
 
+    def _cast_ray_dda(self, maze: Maze, angle_offset: float, max_dist: float) -> tuple[float, float, float, float, float]:
+        """
+        Точний варіант _cast_ray: обхід клітинок сітки вздовж променя (DDA, Amanatides-Woo).
+        Кожна клітинка відвідується один раз, відстань - точна до межі першої стіни.
+        Повертає той самий кортеж (start_x, start_y, end_x, end_y, actual_dist).
+        """
+        ray_angle_global = self.angle + angle_offset
+        cos_a = math.cos(ray_angle_global)
+        sin_a = math.sin(ray_angle_global)
+        start_x_ray, start_y_ray = self.x, self.y
+        walls = maze.wall_bitmap
+        stride = maze.wall_stride
+        pad = WALL_BITMAP_PADDING
+
+        map_c, map_r = int(start_x_ray), int(start_y_ray)
+        # Відстань уздовж променя між сусідніми вертикальними / горизонтальними межами клітинок
+        delta_x = abs(1.0 / cos_a) if cos_a != 0.0 else math.inf
+        delta_y = abs(1.0 / sin_a) if sin_a != 0.0 else math.inf
+        if cos_a > 0.0:
+            step_c, side_x = 1, (map_c + 1 - start_x_ray) * delta_x
+        else:
+            step_c, side_x = -1, (start_x_ray - map_c) * delta_x if cos_a != 0.0 else math.inf
+        if sin_a > 0.0:
+            step_r, side_y = 1, (map_r + 1 - start_y_ray) * delta_y
+        else:
+            step_r, side_y = -1, (start_y_ray - map_r) * delta_y if sin_a != 0.0 else math.inf
+
+        dist = 0.0
+        hit = walls[(map_r + pad) * stride + map_c + pad]
+        while not hit:
+            # Переходимо через найближчу межу клітинки
+            if side_x < side_y:
+                dist = side_x
+                side_x += delta_x
+                map_c += step_c
+            else:
+                dist = side_y
+                side_y += delta_y
+                map_r += step_r
+            if dist >= max_dist:
+                dist = max_dist
+                break
+            hit = walls[(map_r + pad) * stride + map_c + pad]
+
+        ray_end_x = start_x_ray + cos_a * dist
+        ray_end_y = start_y_ray + sin_a * dist
+        return start_x_ray, start_y_ray, ray_end_x, ray_end_y, dist
+
+    def _ray_table_caster(self, maze: Maze):
+        """
+        Повертає функцію з інтерфейсом _cast_ray, що бере відстані з таблиці лабіринту.
+        Усі промені поточного кроку запитуються з таблиці одним викликом.
+        """
+        ray_table = get_ray_table(maze, self.ray_table_config)
+        distances = ray_table.query(self.x, self.y, [self.angle + offset for offset in self.rangefinder_angles_relative])
+        by_offset = dict(zip(self.rangefinder_angles_relative, distances.tolist()))
+
+        def cast_ray(maze: Maze, angle_offset: float, max_dist: float) -> tuple[float, float, float, float, float]:
+            dist = min(by_offset[angle_offset], max_dist)
+            ray_angle_global = self.angle + angle_offset
+            return (self.x, self.y, self.x + math.cos(ray_angle_global) * dist,
+                    self.y + math.sin(ray_angle_global) * dist, dist)
+        return cast_ray
+
     def get_sensor_readings(self, maze: Maze) -> list[float]:
         self.last_rangefinder_rays = [] # Очищаємо перед новим розрахунком
+        cast_ray = self._cast_ray_dda if self.ray_caster == 'dda' else self._cast_ray
+        if self.ray_table_config is not None:
+            cast_ray = self._ray_table_caster(maze)
 
         # 1. Датчики відстані (Rangefinders)
         for i, angle_offset in enumerate(self.rangefinder_angles_relative):
             # Тепер _cast_ray повертає 5 значень, і ми їх коректно розпаковуємо
-            start_x, start_y, end_x, end_y, actual_dist = self._cast_ray(maze, angle_offset, self.rangefinder_max_dist)
+            start_x, start_y, end_x, end_y, actual_dist = cast_ray(maze, angle_offset, self.rangefinder_max_dist)
             
             # Зберігаємо нормовану відстань для нейромережі
             self.rangefinder_readings[i] = actual_dist / self.rangefinder_max_dist
@@ -222,7 +293,8 @@ class Agent:
         target_r, target_c = int(new_y), int(new_x)
 
         self.collided = False # Скидаємо прапорець колізії
-        if not maze.is_walkable(target_r, target_c):
+        pad = WALL_BITMAP_PADDING
+        if maze.wall_bitmap[(target_r + pad) * maze.wall_stride + target_c + pad]:
             self.velocity = 0 # Зупинка при зіткненні
             self.collided = True
             # Не оновлюємо позицію
@@ -0,0 +1,85 @@
+# environment/batch_simulation.py
+
+import math
+import numpy as np
+
+from .maze import Maze
+from .sensors import SensorArray, math_cos, math_sin, math_hypot
+
+class BatchSimulation:
+    """
+    Покрокова (lockstep) симуляція N агентів в одному лабіринті.
+
+    Стан усіх агентів (позиції, кути, швидкості, показники сенсорів)
+    зберігається в масивах NumPy, а фізика та сенсори повторюють
+    логіку Agent.get_sensor_readings / Agent.update для кожного агента
+    з тим самим порядком операцій, тож траєкторії збігаються побітово.
+    """
+
+    def __init__(self, maze: Maze, config: dict, start_angles: np.ndarray):
+        """
+        Args:
+            maze (Maze): Лабіринт, спільний для всіх агентів.
+            config (dict): Словник з конфігурацією (з config.py).
+            start_angles (np.ndarray): Початкові кути агентів (визначають N).
+        """
+        self.maze = maze
+        self.num_agents = len(start_angles)
+        start_r, start_c = maze.start_pos
+        self.x = np.full(self.num_agents, float(start_c) + 0.5)
+        self.y = np.full(self.num_agents, float(start_r) + 0.5)
+        self.angle = np.asarray(start_angles, dtype=np.float64).copy()
+        self.velocity = np.zeros(self.num_agents)
+        self.max_speed = config.get('agent_max_speed', config.get('AGENT_MAX_SPEED', 0.5))
+
+        # Датчики відстані та радар для всіх агентів одночасно
+        self.sensors = SensorArray(maze, config)
+
+        self.steps_taken = np.zeros(self.num_agents, dtype=np.int64)
+        self.collided = np.zeros(self.num_agents, dtype=bool)
+        self.reached_goal = np.zeros(self.num_agents, dtype=bool)
+        self.min_dist_to_goal = np.full(self.num_agents, float('inf'))
+
+    def get_sensor_readings(self) -> np.ndarray:
+        """Повертає матрицю входів мережі форми (N, NUM_INPUTS)."""
+        velocity_reading = self.velocity / self.max_speed if self.max_speed != 0 else np.zeros(self.num_agents)
+        return self.sensors.readings(self.x, self.y, self.angle, velocity_reading)
+
+    def update(self, network_outputs: np.ndarray, active: np.ndarray, dt: float = 1.0):
+        """
+        Оновлює стан активних агентів на основі виходів мереж (N, 4).
+        Агенти поза маскою active не змінюються.
+        """
+        if network_outputs.shape[1] != 4:
+            network_outputs = np.full((self.num_agents, 4), 0.5) # Нейтральні значення, як в Agent.update
+        turn_left, turn_right, accel, brake = network_outputs.T
+
+        max_turn_rate = math.pi / 2 * dt
+        turn_request = (np.maximum(0.0, turn_right - 0.5) * 2 - np.maximum(0.0, turn_left - 0.5) * 2) * max_turn_rate
+        angle = np.where(active, np.mod(self.angle + turn_request, 2 * math.pi), self.angle)
+
+        accel_power = 0.2 * self.max_speed * dt
+        brake_power = 0.4 * self.max_speed * dt
+        friction = 0.05 * dt
+        velocity = self.velocity + np.maximum(0.0, accel - 0.5) * 2 * accel_power
+        velocity = velocity - np.maximum(0.0, brake - 0.5) * 2 * brake_power
+        velocity = np.clip(velocity * (1.0 - friction), 0.0, self.max_speed)
+
+        move_dist = velocity * dt
+        new_x = self.x + math_cos(angle) * move_dist
+        new_y = self.y + math_sin(angle) * move_dist
+        collided = self.sensors.is_wall(new_x, new_y)
+
+        self.angle = angle
+        self.velocity = np.where(active, np.where(collided, 0.0, velocity), self.velocity)
+        self.collided = np.where(active, collided, self.collided)
+        moved = active & ~collided
+        self.x = np.where(moved, new_x, self.x)
+        self.y = np.where(moved, new_y, self.y)
+
+        goal_pos = self.maze.goal_pos
+        if goal_pos:
+            dist = math_hypot(self.x - (goal_pos[1] + 0.5), self.y - (goal_pos[0] + 0.5))
+            self.min_dist_to_goal = np.where(active, np.minimum(self.min_dist_to_goal, dist), self.min_dist_to_goal)
+            at_goal = (self.y.astype(np.int64) == goal_pos[0]) & (self.x.astype(np.int64) == goal_pos[1])
+            self.reached_goal |= active & at_goal
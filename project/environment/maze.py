@@ -2,6 +2,8 @@
 
 import random
 import math
+from functools import lru_cache
+import numpy as np
 
 # Константи для типів клітинок (можна винести в окремий файл або config)
 CELL_PATH = 0
@@ -10,6 +12,12 @@ CELL_START = 2
 CELL_GOAL = 3
 # Можна додати CELL_OBSTACLE за потреби
 
+# Скільки різних лабіринтів тримати в кеші процесу (див. get_maze)
+MAZE_CACHE_SIZE = 8
+# Ширина рамки зі стін навколо лабіринту в wall_bitmap. Агент за крок зміщується
+# менш ніж на клітинку, тож однієї клітинки досить, щоб не перевіряти межі
+WALL_BITMAP_PADDING = 1
+
 class Maze:
     """Клас для генерації та представлення 2D лабіринту."""
 
@@ -32,6 +40,15 @@ class Maze:
         self.grid = [[CELL_WALL for _ in range(width)] for _ in range(height)] # Початково всі стіни
         self.start_pos = None # Зберігатиметься як (row, col)
         self.goal_pos = None  # Зберігатиметься як (row, col)
+        self.frozen = False
+        self._rng_state_after_generation = None
+        # Компактне представлення (будується в generate): cells - сітка row-major,
+        # wall_bitmap - 1 для стін з рамкою WALL_BITMAP_PADDING, рядки довжиною wall_stride
+        self.cells = b''
+        self.wall_bitmap = b''
+        self.wall_stride = 0
+        # Таблиці відстаней для датчиків (див. environment/ray_table.get_ray_table)
+        self.ray_tables = {}
         self.generate()
 
     def _is_valid(self, r: int, c: int) -> bool:
@@ -58,6 +75,8 @@ class Maze:
 
     def generate(self):
         """Генерує новий лабіринт за допомогою Recursive Backtracking."""
+        if self.frozen:
+            raise RuntimeError("Cannot regenerate a frozen (cached) maze.")
         # Встановлюємо сід, якщо він заданий
         if self.seed is not None:
             random.seed(self.seed)
@@ -93,6 +112,10 @@ class Maze:
         # Позначаємо типи клітинок
         self.grid[self.start_pos[0]][self.start_pos[1]] = CELL_START
         self.grid[self.goal_pos[0]][self.goal_pos[1]] = CELL_GOAL
+        self._build_compact_grid()
+        # Стан random після генерації: від нього залежать подальші випадкові
+        # величини (напр. початковий кут агента), тож кешований лабіринт може його відновити
+        self._rng_state_after_generation = random.getstate()
 
         # Варіант 2: Випадкові проходи (складніше, але краще для різноманіття)
         # paths = []
@@ -115,6 +138,48 @@ class Maze:
         #     self.grid[self.height - 2][self.width - 2] = CELL_GOAL
 
 
+    def _build_compact_grid(self):
+        """Будує незмінні байтові представлення сітки з self.grid."""
+        pad = WALL_BITMAP_PADDING
+        self.cells = bytes(cell for row in self.grid for cell in row)
+        self.wall_stride = self.width + 2 * pad
+        bitmap = bytearray(b'\x01' * (self.wall_stride * (self.height + 2 * pad)))
+        for r, row in enumerate(self.grid):
+            offset = (r + pad) * self.wall_stride + pad
+            bitmap[offset:offset + self.width] = bytes(cell == CELL_WALL for cell in row)
+        self.wall_bitmap = bytes(bitmap)
+
+    @property
+    def cells_array(self) -> np.ndarray:
+        """Сітка як read-only масив uint8 форми (height, width) без копіювання."""
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height, self.width)
+
+    @property
+    def wall_array(self) -> np.ndarray:
+        """wall_bitmap як read-only масив uint8 форми (height + 2*pad, width + 2*pad)."""
+        return np.frombuffer(self.wall_bitmap, dtype=np.uint8).reshape(-1, self.wall_stride)
+
+    def padded_walls(self, pad: int) -> np.ndarray:
+        """Булева маска стін з рамкою шириною pad (поза лабіринтом - стіна)."""
+        walls = self.wall_array.astype(bool)
+        if pad >= WALL_BITMAP_PADDING:
+            return np.pad(walls, pad - WALL_BITMAP_PADDING, constant_values=True)
+        cut = WALL_BITMAP_PADDING - pad
+        return walls[cut:walls.shape[0] - cut, cut:walls.shape[1] - cut]
+
+    def freeze(self):
+        """Робить сітку незмінною (кортежі), щоб лабіринт можна було безпечно перевикористовувати."""
+        self.grid = tuple(tuple(row) for row in self.grid)
+        self.frozen = True
+
+    def restore_rng_state(self):
+        """
+        Повертає глобальний random у стан одразу після генерації цього лабіринту -
+        так само, як якби лабіринт щойно створили заново з тим самим сідом.
+        """
+        if self._rng_state_after_generation is not None:
+            random.setstate(self._rng_state_after_generation)
+
     def is_walkable(self, r: int, c: int) -> bool:
         """Перевіряє, чи є клітинка прохідною (не стіна)."""
         if self._is_valid(r, c):
@@ -146,4 +211,24 @@ class Maze:
                     row_str += " G"
                 else:
                     row_str += " ?" # Невідомий тип
-            print(row_str)
\ No newline at end of file
+            print(row_str)
+
+
+@lru_cache(maxsize=MAZE_CACHE_SIZE)
+def _get_cached_maze(width: int, height: int, seed: int) -> Maze:
+    maze = Maze(width, height, seed)
+    maze.freeze()
+    return maze
+
+def get_maze(width: int, height: int, seed=None) -> Maze:
+    """
+    Повертає лабіринт із кешу процесу (LRU за (width, height, seed)).
+    Кешований лабіринт спільний для всіх викликів, тому він заморожений
+    і відновлює стан random, як після генерації. Без сіду лабіринт
+    щоразу новий і не кешується.
+    """
+    if seed is None:
+        return Maze(width, height, seed)
+    maze = _get_cached_maze(width, height, seed)
+    maze.restore_rng_state()
+    return maze
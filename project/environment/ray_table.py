@@ -0,0 +1,153 @@
+# environment/ray_table.py
+
+import math
+import os
+import numpy as np
+
+from neat.log import get_logger
+from .maze import Maze
+from .sensors import dda_distances
+
+logger = get_logger(__name__)
+
+# Змінюється при зміні формату таблиці, щоб старі файли кешу не підхоплювались
+RAY_TABLE_VERSION = 1
+
+class RayLookupTable:
+    """
+    Передобчислена таблиця відстаней до стін для статичного лабіринту.
+
+    Кожна клітинка поділена на resolution x resolution підклітинок; для центру
+    кожної підклітинки та кожного з angle_bins кутів зберігається точна (DDA)
+    відстань до першої стіни у float16. Запит - вибірка з таблиці з білінійною
+    інтерполяцією в межах клітинки агента та лінійною - між сусідніми кутами.
+    Похибка порівняно з точним кидком променя - порядку 1/resolution клітинки.
+    """
+
+    def __init__(self, table: np.ndarray, resolution: int, angle_bins: int, max_dist: float):
+        """
+        Args:
+            table (np.ndarray): Масив float16 форми (height * resolution, width * resolution, angle_bins).
+            resolution (int): Кількість вибірок на клітинку вздовж кожної осі.
+            angle_bins (int): Кількість кутів на повне коло.
+            max_dist (float): Максимальна довжина променя.
+        """
+        self.table = table
+        self.resolution = resolution
+        self.angle_bins = angle_bins
+        self.max_dist = max_dist
+        self.angle_step = 2 * math.pi / angle_bins
+
+    @classmethod
+    def build(cls, maze: Maze, resolution: int, angle_bins: int, max_dist: float) -> 'RayLookupTable':
+        """Будує таблицю кидками DDA з усіх точок вибірки прохідних клітинок."""
+        q = resolution
+        pad = int(math.ceil(max_dist)) + 1
+        walls = maze.padded_walls(pad)
+        table = np.zeros((maze.height * q, maze.width * q, angle_bins), dtype=np.float16)
+        angles = np.arange(angle_bins) * (2 * math.pi / angle_bins)
+        offsets = (np.arange(q) + 0.5) / q
+        for r in range(maze.height):
+            path_cells = [c for c in range(maze.width) if maze.is_walkable(r, c)]
+            if not path_cells:
+                continue
+            # Усі точки вибірки рядка клітинок x усі кути - один векторизований виклик
+            cols = np.array(path_cells)
+            xs = (cols[:, None, None] + offsets[None, None, :]).repeat(q, axis=1).reshape(-1)
+            ys = np.broadcast_to(r + offsets[None, :, None], (len(cols), q, q)).reshape(-1)
+            shape = (len(xs), angle_bins)
+            dist = dda_distances(walls, pad, np.broadcast_to(xs[:, None], shape),
+                                 np.broadcast_to(ys[:, None], shape),
+                                 np.broadcast_to(angles[None, :], shape), max_dist)
+            dist = dist.reshape(len(cols), q, q, angle_bins)
+            for i, c in enumerate(path_cells):
+                table[r * q:(r + 1) * q, c * q:(c + 1) * q] = dist[i]
+        return cls(table, resolution, angle_bins, max_dist)
+
+    @staticmethod
+    def cache_path(maze: Maze, cache_dir: str, resolution: int, angle_bins: int, max_dist: float) -> str:
+        """Шлях до файлу кешу: лабіринт однозначно визначається сідом та розмірами."""
+        filename = (f"rays_v{RAY_TABLE_VERSION}_{maze.width}x{maze.height}_seed{maze.seed}"
+                    f"_q{resolution}_a{angle_bins}_d{max_dist:g}.npy")
+        return os.path.join(cache_dir, filename)
+
+    @classmethod
+    def load_or_build(cls, maze: Maze, config: dict) -> 'RayLookupTable':
+        """
+        Завантажує таблицю з дискового кешу (memory-mapped, спільна для процесів)
+        або будує її та зберігає. Без RAY_TABLE_CACHE_DIR таблиця живе лише в пам'яті.
+        """
+        resolution = config.get('RAY_TABLE_RESOLUTION', 4)
+        angle_bins = config.get('RAY_TABLE_ANGLE_BINS', 64)
+        max_dist = config['RANGEFINDER_MAX_DIST']
+        cache_dir = config.get('RAY_TABLE_CACHE_DIR')
+        expected_shape = (maze.height * resolution, maze.width * resolution, angle_bins)
+
+        path = cls.cache_path(maze, cache_dir, resolution, angle_bins, max_dist) if cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                table = np.load(path, mmap_mode='r')
+                if table.shape == expected_shape and table.dtype == np.float16:
+                    return cls(table, resolution, angle_bins, max_dist)
+                logger.warning("Ray table %s has unexpected shape %s. Rebuilding.", path, table.shape)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not load ray table %s: %s. Rebuilding.", path, e)
+
+        logger.info("Building ray lookup table for maze %dx%d (seed %s)...", maze.width, maze.height, maze.seed)
+        ray_table = cls.build(maze, resolution, angle_bins, max_dist)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Запис у тимчасовий файл + атомарна заміна: паралельні воркери не побачать неповний файл
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, ray_table.table)
+            os.replace(tmp_path, path)
+            ray_table.table = np.load(path, mmap_mode='r')
+        return ray_table
+
+    def query(self, x, y, angles) -> np.ndarray:
+        """
+        Відстані до стін для променів з точок (x, y) під кутами angles (масиви, що транслюються).
+        Точки мають лежати в прохідних клітинках лабіринту.
+        """
+        q = self.resolution
+        x, y, angles = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                                           np.asarray(angles, dtype=np.float64))
+        # Координати в сітці вибірок, обмежені клітинкою агента (вибірки сусідніх клітинок можуть бути стінами)
+        gx, ix0, ix1 = self._cell_bounded_index(x, q)
+        gy, iy0, iy1 = self._cell_bounded_index(y, q)
+        tx = gx - ix0
+        ty = gy - iy0
+
+        a = np.mod(angles, 2 * math.pi) / self.angle_step
+        a_floor = np.floor(a)
+        ja0 = a_floor.astype(np.int64) % self.angle_bins
+        ja1 = (ja0 + 1) % self.angle_bins
+        ta = a - a_floor
+
+        table = self.table
+        def sample(iy, ix):
+            return table[iy, ix, ja0].astype(np.float64) * (1.0 - ta) + table[iy, ix, ja1].astype(np.float64) * ta
+
+        top = sample(iy0, ix0) * (1.0 - tx) + sample(iy0, ix1) * tx
+        bottom = sample(iy1, ix0) * (1.0 - tx) + sample(iy1, ix1) * tx
+        return np.minimum(top * (1.0 - ty) + bottom * ty, self.max_dist)
+
+    @staticmethod
+    def _cell_bounded_index(coord: np.ndarray, q: int):
+        """Позиція в сітці вибірок та два сусідні індекси вибірок в межах тієї ж клітинки."""
+        low = coord.astype(np.int64) * q
+        grid_pos = np.clip(coord * q - 0.5, low, low + q - 1)
+        i0 = np.floor(grid_pos).astype(np.int64)
+        i1 = np.minimum(i0 + 1, low + q - 1)
+        return grid_pos, i0, i1
+
+def get_ray_table(maze: Maze, config: dict) -> RayLookupTable:
+    """Таблиця променів лабіринту; зберігається в maze.ray_tables, щоб будувати/завантажувати один раз."""
+    key = (config.get('RAY_TABLE_RESOLUTION', 4), config.get('RAY_TABLE_ANGLE_BINS', 64),
+           config['RANGEFINDER_MAX_DIST'])
+    ray_table = maze.ray_tables.get(key)
+    if ray_table is None:
+        ray_table = RayLookupTable.load_or_build(maze, config)
+        maze.ray_tables[key] = ray_table
+    return ray_table
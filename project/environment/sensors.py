@@ -0,0 +1,169 @@
+# environment/sensors.py
+
+import math
+import numpy as np
+
+from .maze import Maze
+
+def _math_ufunc(func):
+    """
+    Застосовує скалярну функцію math поелементно до масивів. Векторні np.arctan2/np.hypot
+    (а на частині процесорів і np.cos/np.sin) можуть відрізнятися від math.* в останньому
+    біті; за кілька десятків кроків така різниця перемикає влучання променя в стіну,
+    тож пакетна симуляція рахує ті самі функції, що й Agent.
+    """
+    def apply(*arrays) -> np.ndarray:
+        arrays = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in arrays))
+        shape = arrays[0].shape
+        values = map(func, *(a.ravel().tolist() for a in arrays))
+        return np.fromiter(values, np.float64, count=arrays[0].size).reshape(shape)
+    return apply
+
+math_cos = _math_ufunc(math.cos)
+math_sin = _math_ufunc(math.sin)
+math_atan2 = _math_ufunc(math.atan2)
+math_hypot = _math_ufunc(math.hypot)
+
+def dda_distances(walls: np.ndarray, pad: int, x: np.ndarray, y: np.ndarray,
+                  ray_angles: np.ndarray, max_dist: float) -> np.ndarray:
+    """
+    Обхід клітинок (DDA) одночасно для масиву променів - векторизований Agent._cast_ray_dda.
+    Кожна ітерація переводить кожен ще активний промінь через одну межу клітинки.
+
+    Args:
+        walls (np.ndarray): Булева маска стін з рамкою pad (Maze.padded_walls).
+        pad (int): Ширина рамки; має бути більшою за max_dist.
+        x, y, ray_angles (np.ndarray): Початки та кути променів однакової форми.
+        max_dist (float): Максимальна довжина променя.
+    Returns:
+        np.ndarray: Відстані до першої стіни (або max_dist) тієї ж форми.
+    """
+    cos_a = math_cos(ray_angles)
+    sin_a = math_sin(ray_angles)
+    map_c = x.astype(np.int64)
+    map_r = y.astype(np.int64)
+    step_c = np.where(cos_a > 0.0, 1, -1)
+    step_r = np.where(sin_a > 0.0, 1, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta_x = np.abs(1.0 / cos_a)
+        delta_y = np.abs(1.0 / sin_a)
+        side_x = np.where(cos_a > 0.0, (map_c + 1 - x) * delta_x, (x - map_c) * delta_x)
+        side_y = np.where(sin_a > 0.0, (map_r + 1 - y) * delta_y, (y - map_r) * delta_y)
+    # Промінь, паралельний осі, ніколи не перетинає межі вздовж неї
+    side_x[cos_a == 0.0] = np.inf
+    side_y[sin_a == 0.0] = np.inf
+
+    dist = np.zeros(ray_angles.shape)
+    done = walls[map_r + pad, map_c + pad]
+    while not done.all():
+        active = ~done
+        use_x = active & (side_x < side_y)
+        use_y = active & ~(side_x < side_y)
+        dist = np.where(use_x, side_x, np.where(use_y, side_y, dist))
+        side_x = np.where(use_x, side_x + delta_x, side_x)
+        side_y = np.where(use_y, side_y + delta_y, side_y)
+        map_c = np.where(use_x, map_c + step_c, map_c)
+        map_r = np.where(use_y, map_r + step_r, map_r)
+        beyond = active & (dist >= max_dist)
+        dist = np.where(beyond, max_dist, dist)
+        done = done | beyond | (active & walls[map_r + pad, map_c + pad])
+    return dist
+
+
+class SensorArray:
+    """
+    Векторизовані сенсори агента (датчики відстані + радар до цілі)
+    для багатьох агентів одночасно.
+
+    Приймає масиви позицій та кутів агентів і за один виклик NumPy
+    кидає всі NUM_RANGEFINDERS променів кожного агента по бітовій карті стін.
+    Результати відповідають Agent._cast_ray / Agent._cast_ray_dda та радару
+    з Agent.get_sensor_readings.
+    """
+
+    def __init__(self, maze: Maze, config: dict):
+        """
+        Args:
+            maze (Maze): Лабіринт, в якому знаходяться агенти.
+            config (dict): Словник з конфігурацією (з config.py).
+        """
+        self.maze = maze
+        self.num_rangefinders = config['NUM_RANGEFINDERS']
+        self.max_dist = config['RANGEFINDER_MAX_DIST']
+        self.ray_caster = config.get('RAY_CASTER', 'march') # Та сама логіка вибору, що й в Agent
+        self.ray_offsets = np.array(
+            [i * (2 * math.pi / self.num_rangefinders) for i in range(self.num_rangefinders)])
+        self.num_radar_slices = config['NUM_RADAR_SLICES']
+        self.radar_slice_angle = 2 * math.pi / self.num_radar_slices
+
+        # Відстані вибірок уздовж променя - ті самі, що накопичує Agent._cast_ray
+        ray_samples = []
+        current_dist = 0.0
+        while current_dist < self.max_dist:
+            ray_samples.append(current_dist)
+            current_dist += 0.1
+        self._ray_samples = np.array(ray_samples)
+
+        # Рамка зі стін, ширша за довжину променя: вибірки 'march' не зупиняються на стіні
+        self.pad = int(math.ceil(self.max_dist)) + 1
+        self.walls = maze.padded_walls(self.pad)
+        # Опційна передобчислена таблиця відстаней замість кидання променів
+        self.ray_table = None
+        if config.get('RAY_LOOKUP_TABLE', False):
+            from .ray_table import get_ray_table
+            self.ray_table = get_ray_table(maze, config)
+
+    def is_wall(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Перевіряє, чи точки (x, y) лежать у стіні або за межами лабіринту."""
+        return self.walls[y.astype(np.int64) + self.pad, x.astype(np.int64) + self.pad]
+
+    def rangefinder_distances(self, x: np.ndarray, y: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """
+        Відстані до стін для всіх променів усіх агентів.
+        Повертає матрицю форми (agents, rays) у клітинках (не нормовану).
+        """
+        ray_angles = np.asarray(heading, dtype=np.float64)[:, None] + self.ray_offsets[None, :]
+        x = np.broadcast_to(np.asarray(x, dtype=np.float64)[:, None], ray_angles.shape)
+        y = np.broadcast_to(np.asarray(y, dtype=np.float64)[:, None], ray_angles.shape)
+        if self.ray_table is not None:
+            return self.ray_table.query(x, y, ray_angles)
+        if self.ray_caster == 'dda':
+            return self._dda_distances(x, y, ray_angles)
+        return self._march_distances(x, y, ray_angles)
+
+    def _march_distances(self, x: np.ndarray, y: np.ndarray, ray_angles: np.ndarray) -> np.ndarray:
+        """Відстані за Agent._cast_ray: всі вибірки всіх променів за один виклик."""
+        cos_a = math_cos(ray_angles)[:, :, None]
+        sin_a = math_sin(ray_angles)[:, :, None]
+        hits = self.is_wall(x[:, :, None] + cos_a * self._ray_samples, y[:, :, None] + sin_a * self._ray_samples)
+        first_hit = hits.argmax(axis=2)
+        return np.where(hits.any(axis=2), self._ray_samples[first_hit], self.max_dist)
+
+    def _dda_distances(self, x: np.ndarray, y: np.ndarray, ray_angles: np.ndarray) -> np.ndarray:
+        """Відстані за Agent._cast_ray_dda (див. dda_distances)."""
+        return dda_distances(self.walls, self.pad, x, y, ray_angles, self.max_dist)
+
+    def radar(self, x: np.ndarray, y: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """One-hot вектори секторів радара до цілі, форма (agents, NUM_RADAR_SLICES)."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        radar = np.zeros((len(x), self.num_radar_slices))
+        goal_pos = self.maze.goal_pos
+        if goal_pos:
+            dx_goal = (float(goal_pos[1]) + 0.5) - x
+            dy_goal = (float(goal_pos[0]) + 0.5) - y
+            relative_angle = np.mod(math_atan2(dy_goal, dx_goal) - heading + math.pi, 2 * math.pi) - math.pi
+            positive_relative_angle = np.mod(relative_angle + 2 * math.pi, 2 * math.pi)
+            sector = np.minimum((positive_relative_angle / self.radar_slice_angle).astype(np.int64),
+                                self.num_radar_slices - 1)
+            radar[np.arange(len(x)), sector] = 1.0
+        return radar
+
+    def readings(self, x: np.ndarray, y: np.ndarray, heading: np.ndarray, velocity_reading: np.ndarray) -> np.ndarray:
+        """
+        Повний вектор входів мережі для кожного агента, форма (agents, NUM_INPUTS):
+        [датчики відстані / max_dist, радар, cos(heading), sin(heading), швидкість].
+        """
+        rangefinders = self.rangefinder_distances(x, y, heading) / self.max_dist
+        return np.column_stack((rangefinders, self.radar(x, y, heading),
+                                math_cos(heading), math_sin(heading), velocity_reading))
@@ -9,9 +9,13 @@ import math
 import importlib
 from tkinter import filedialog,messagebox
 from tkinter import ttk
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
+
+import numpy as np
 
 from neat.json_serializer import NEATJSONSerializer
+from neat.binary_serializer import NEATBinarySerializer
+from neat.checkpoint import CheckpointWriter
 from neat.data_analyzer import NEATDataAnalyzer
 #import threading
 #from concurrent.futures import ProcessPoolExecutor, as_completed
@@ -23,12 +27,15 @@ except ImportError:
     print("ERROR: config.py not found. Make sure it's in the project root.")
     exit()
 
-from environment.maze import Maze
+from environment.maze import Maze, get_maze
 from environment.agent import Agent
+from environment.batch_simulation import BatchSimulation
+from environment.ray_table import get_ray_table
 from neat.species import Species # Потрібно для доступу до _species_counter
 from neat.neat_algorithm import NeatAlgorithm
 from neat.genome import Genome
-from neat.nn import activate_network
+from neat.nn import FeedForwardNetwork, create_network, create_network_batch
+from neat.log import configure_logging
 from visualization.gui import MazeGUI
 from visualization.network_visualizer import visualize_network
 
@@ -62,6 +69,53 @@ def calculate_fitness(agent: Agent, maze: Maze, max_steps: int) -> float:
 
     return max(0.001, fitness) # Фітнес трохи більший за 0, щоб уникнути ділення на 0 у NEAT
 
+def calculate_evaluation_fitness(reached_goal: bool, steps_taken: int, min_dist_to_goal: float,
+                                 collided: bool, maze: Maze, max_steps: int) -> float:
+    """
+    Розраховує фітнес за підсумками симуляції одного агента.
+    Спільна для evaluate_single_genome та evaluate_population_batch.
+    """
+    fitness = 0.0
+    MAX_FITNESS_TARGET = 2000.0 # Цільове максимальне значення фітнесу
+     # Компоненти винагороди
+    GOAL_REACHED_BASE_REWARD = MAX_FITNESS_TARGET * 0.50  # Наприклад, 1000
+    EFFICIENCY_COMPONENT_MAX = MAX_FITNESS_TARGET * 0.50 # Наприклад, 1000
+    # Максимальна винагорода за близькість, якщо ціль не досягнута
+    PROXIMITY_REWARD_MAX_NO_GOAL = GOAL_REACHED_BASE_REWARD * 0.95 # Наприклад, 950
+    if reached_goal:
+        fitness = GOAL_REACHED_BASE_REWARD
+        # Бонус за ефективність (менше кроків - краще)
+        if max_steps > 0:
+            # Нормалізований коефіцієнт ефективності: 1.0 (найкраще) -> 0.0 (найгірше)
+            efficiency_ratio = 1.0 - (float(steps_taken) / max_steps)
+            fitness += EFFICIENCY_COMPONENT_MAX * max(0.0, efficiency_ratio)
+    else:
+        # Розрахунок винагороди за близькість до цілі
+        # Використовуємо загальну діагональ лабіринту для нормалізації відстані,
+        # щоб винагорода була більш-менш порівнянна для лабіринтів різного розміру,
+        # але з однаковою максимальною винагородою за близькість.
+
+        max_dist_in_maze = math.hypot(maze.width, maze.height)
+
+        if min_dist_to_goal == float('inf') or max_dist_in_maze == 0:
+            # Агент не рухався або лабіринт нульового розміру (малоймовірно)
+            fitness = 0.0
+        else:
+            # Нормалізована близькість: 1.0 (дуже близько), 0.0 (дуже далеко)
+            # Використовуємо квадрат, щоб сильніше заохочувати значне наближення
+            proximity_score = 1.0 - (min_dist_to_goal / max_dist_in_maze)
+            proximity_score = max(0.0, min(1.0, proximity_score)) # Обмежуємо в [0, 1]
+
+            fitness = PROXIMITY_REWARD_MAX_NO_GOAL * (proximity_score ** 2)
+
+    # Штрафи (застосовуються після основного розрахунку фітнесу)
+
+    # Штраф за колізію (зменшує фітнес на відсоток)
+    if collided:
+        fitness *= 0.5  # Зменшуємо поточний фітнес на 50%
+
+    return fitness
+
 def evaluate_single_genome(genome_tuple: Tuple[int, Genome], config: dict) -> Tuple[int, float, bool]:
     """
     Оцінює ОДИН геном. Приймає кортеж (id, genome) та конфіг.
@@ -72,8 +126,29 @@ def evaluate_single_genome(genome_tuple: Tuple[int, Genome], config: dict) -> Tu
         return genome_id, 0.001, False # Мінімальний фітнес, ціль не досягнуто
 
     try:
-        # Створюємо *нову* копію лабіринту та агента для цього процесу
-        eval_maze = Maze(config['MAZE_WIDTH'], config['MAZE_HEIGHT'], config.get('MAZE_SEED'))
+        # Компілюємо фенотип один раз на всю оцінку геному
+        network = create_network(genome, config)
+    except Exception as e:
+        print(f"Error compiling network for genome {genome_id}: {e}")
+        return genome_id, 0.001, False
+    return evaluate_network(genome_id, network, config)
+
+def evaluate_genome_chunk(chunk: List[Tuple[int, FeedForwardNetwork]], config: dict) -> List[Tuple[int, float, bool]]:
+    """
+    Оцінює порцію вже скомпільованих мереж в одному процесі.
+    Приймає список (id, network) та конфіг (один на всю порцію).
+    Повертає список (id, fitness, reached_goal_flag) у тому ж порядку.
+    """
+    return [evaluate_network(genome_id, network, config) for genome_id, network in chunk]
+
+def evaluate_network(genome_id: int, network: FeedForwardNetwork, config: dict) -> Tuple[int, float, bool]:
+    """
+    Проганяє агента з даною мережею в лабіринті та рахує фітнес.
+    Повертає кортеж (id, fitness, reached_goal_flag).
+    """
+    try:
+        # Лабіринт береться з кешу процесу, агент - новий для кожного геному
+        eval_maze = get_maze(config['MAZE_WIDTH'], config['MAZE_HEIGHT'], config.get('MAZE_SEED'))
         if not eval_maze.start_pos:
              print(f"Error (process): Maze generation failed for genome {genome_id}")
              return genome_id, 0.001, False
@@ -88,10 +163,7 @@ def evaluate_single_genome(genome_tuple: Tuple[int, Genome], config: dict) -> Tu
                 genome_reached_goal_flag = True # Встановлюємо прапорець
                 break 
             sensor_readings = agent.get_sensor_readings(eval_maze)
-            network_outputs = activate_network(genome.copy(), sensor_readings)
-            if network_outputs is None: 
-                 print(f"Error (process): activate_network failed for genome {genome_id}")
-                 return genome_id, 0.001, False
+            network_outputs = network.activate(sensor_readings)
             agent.update(eval_maze, network_outputs, dt=1)
             agent.steps_taken = step + 1
         
@@ -119,44 +191,8 @@ def evaluate_single_genome(genome_tuple: Tuple[int, Genome], config: dict) -> Tu
         #         print("WATA SIGMA")
         # # fitness = 0.0
         #------------------------------
-        fitness = 0.0
-        MAX_FITNESS_TARGET = 2000.0 # Цільове максимальне значення фітнесу
-         # Компоненти винагороди
-        GOAL_REACHED_BASE_REWARD = MAX_FITNESS_TARGET * 0.50  # Наприклад, 1000
-        EFFICIENCY_COMPONENT_MAX = MAX_FITNESS_TARGET * 0.50 # Наприклад, 1000
-        # Максимальна винагорода за близькість, якщо ціль не досягнута
-        PROXIMITY_REWARD_MAX_NO_GOAL = GOAL_REACHED_BASE_REWARD * 0.95 # Наприклад, 950
-        if agent.reached_goal:
-            fitness = GOAL_REACHED_BASE_REWARD
-            # Бонус за ефективність (менше кроків - краще)
-            if max_steps > 0:
-                # Нормалізований коефіцієнт ефективності: 1.0 (найкраще) -> 0.0 (найгірше)
-                efficiency_ratio = 1.0 - (float(agent.steps_taken) / max_steps)
-                fitness += EFFICIENCY_COMPONENT_MAX * max(0.0, efficiency_ratio)
-        else:
-            # Розрахунок винагороди за близькість до цілі
-            # Використовуємо загальну діагональ лабіринту для нормалізації відстані,
-            # щоб винагорода була більш-менш порівнянна для лабіринтів різного розміру,
-            # але з однаковою максимальною винагородою за близькість.
-            
-            max_dist_in_maze = math.hypot(eval_maze.width, eval_maze.height)
-
-            if agent.min_dist_to_goal == float('inf') or max_dist_in_maze == 0:
-                # Агент не рухався або лабіринт нульового розміру (малоймовірно)
-                fitness = 0.0
-            else:
-                # Нормалізована близькість: 1.0 (дуже близько), 0.0 (дуже далеко)
-                # Використовуємо квадрат, щоб сильніше заохочувати значне наближення
-                proximity_score = 1.0 - (agent.min_dist_to_goal / max_dist_in_maze)
-                proximity_score = max(0.0, min(1.0, proximity_score)) # Обмежуємо в [0, 1]
-                
-                fitness = PROXIMITY_REWARD_MAX_NO_GOAL * (proximity_score ** 2)
-
-        # Штрафи (застосовуються після основного розрахунку фітнесу)
-        
-        # Штраф за колізію (зменшує фітнес на відсоток)
-        if agent.collided:
-            fitness *= 0.5  # Зменшуємо поточний фітнес на 50%
+        fitness = calculate_evaluation_fitness(agent.reached_goal, agent.steps_taken, agent.min_dist_to_goal,
+                                               agent.collided, eval_maze, max_steps)
 
         # base_reward = 1000.0
         # MAX_FITNESS = 2000.0
@@ -186,17 +222,64 @@ def evaluate_single_genome(genome_tuple: Tuple[int, Genome], config: dict) -> Tu
         traceback.print_exc()
         return genome_id, 0.001, False # Мінімальний фітнес, ціль не досягнуто
 
+def evaluate_population_batch(genome_tuples: List[Tuple[int, Genome]], config: dict) -> List[Tuple[int, float, bool]]:
+    """
+    Оцінює всю популяцію в одному процесі, просуваючи всіх агентів
+    покроково (lockstep) через масиви NumPy.
+    Повертає ті самі кортежі (id, fitness, reached_goal_flag), що й evaluate_single_genome:
+    пакетні мережі та фізика рахують у тому ж порядку і тими ж функціями math, що й
+    скалярний шлях, тож фітнес збігається побітово (див. testing/test_evaluation.py).
+    """
+    results: List[Tuple[int, float, bool]] = []
+    valid_tuples = []
+    for genome_id, genome in genome_tuples:
+        if genome:
+            valid_tuples.append((genome_id, genome))
+        else:
+            results.append((genome_id, 0.001, False))
+    if not valid_tuples:
+        return results
+
+    eval_maze = get_maze(config['MAZE_WIDTH'], config['MAZE_HEIGHT'], config.get('MAZE_SEED'))
+    if not eval_maze.start_pos:
+        print("Error (batch): Maze generation failed.")
+        return results + [(genome_id, 0.001, False) for genome_id, _ in valid_tuples]
+
+    # Maze перезасіває глобальний random, тож evaluate_single_genome дає кожному
+    # агенту один і той самий початковий кут. Відтворюємо це для всієї популяції.
+    start_angle = random.uniform(0, 2 * math.pi)
+    simulation = BatchSimulation(eval_maze, config, np.full(len(valid_tuples), start_angle))
+    networks = create_network_batch([genome for _, genome in valid_tuples], config)
+    max_steps = config.get('MAX_STEPS_PER_EVALUATION', 500)
+
+    for step in range(max_steps):
+        active = ~simulation.reached_goal
+        if not active.any():
+            break
+        sensor_readings = simulation.get_sensor_readings()
+        network_outputs = networks.activate(sensor_readings)
+        simulation.update(network_outputs, active, dt=1)
+        simulation.steps_taken[active] = step + 1
+
+    for i, (genome_id, _) in enumerate(valid_tuples):
+        fitness = calculate_evaluation_fitness(bool(simulation.reached_goal[i]), int(simulation.steps_taken[i]),
+                                               float(simulation.min_dist_to_goal[i]), bool(simulation.collided[i]),
+                                               eval_maze, max_steps)
+        results.append((genome_id, max(0.001, fitness), bool(simulation.reached_goal[i])))
+    return results
+
 def evaluation_function(genome: Genome, config: dict) -> float:
     """
     Функція, що оцінює пристосованість одного геному.
     """
-    eval_maze = Maze(config['MAZE_WIDTH'], config['MAZE_HEIGHT'], config.get('MAZE_SEED'))
+    eval_maze = get_maze(config['MAZE_WIDTH'], config['MAZE_HEIGHT'], config.get('MAZE_SEED'))
     if eval_maze.start_pos is None:
          print("Error: Maze generation failed, cannot evaluate.")
          return 0.0
 
     agent = Agent(agent_id=genome.id, start_pos=eval_maze.start_pos, config=config)
     max_steps = config.get('MAX_STEPS_PER_EVALUATION', 500)
+    network = create_network(genome, config)
 
     for step in range(max_steps):
         if agent.reached_goal:
@@ -204,7 +287,7 @@ def evaluation_function(genome: Genome, config: dict) -> float:
 
         sensor_readings = agent.get_sensor_readings(eval_maze)
         try:
-            network_outputs = activate_network(genome, sensor_readings)
+            network_outputs = network.activate(sensor_readings)
         except Exception as e:
             print(f"Error activating network for genome {genome.id}: {e}")
             return 0.0 # Низький фітнес при помилці
@@ -224,6 +307,7 @@ class SimulationController:
     def __init__(self, master: tk.Tk):
         self.master = master
         self.config = self._load_config()
+        configure_logging(self.config.get('LOG_LEVEL', 'INFO'))
         self.config['NUM_PROCESSES'] = os.cpu_count()
         print(f"Using {self.config['NUM_PROCESSES']} processes for evaluation.")
 
@@ -249,6 +333,7 @@ class SimulationController:
         self.config['MAZE_SEED'] = self.maze.seed # Зберігаємо фактичний сід (випадковий чи заданий) в конфіг
 
         self.agents = {} 
+        self.agent_networks = {} # agent_id -> скомпільована мережа (рекурентна зберігає стан між кроками)
 
         # Ініціалізація GUI - передаємо конфіг, що вже містить актуальний MAZE_SEED
         self.gui = MazeGUI(master, self.config, self)
@@ -260,6 +345,8 @@ class SimulationController:
         self.is_running = False
         self.current_simulation_step = 0
         self.max_steps_per_gen_vis = self.config.get('MAX_STEPS_PER_EVALUATION', 500)
+        # Закриття вікна має також зупинити пул процесів оцінки
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Ініціалізація відображення
         self._redraw_maze()
@@ -297,6 +384,7 @@ class SimulationController:
     def _reset_agents_for_visualization(self):
         """Скидає агентів для візуалізації на основі поточної популяції NEAT."""
         self.agents.clear()
+        self.agent_networks.clear()
         self.gui.clear_all_agents()
         # --- DEBUG ---
         pop_size = len(self.neat.population) if self.neat and self.neat.population else 0
@@ -464,26 +552,23 @@ class SimulationController:
             # --- Блок ДІАГНОСТИКИ ---
             network_outputs = None # Ініціалізуємо як None
             try:
-                # Викликаємо активацію
-                network_outputs = activate_network(genome, sensor_readings)
+                # Мережа компілюється один раз на агента; рекурентна зберігає стан між кроками
+                network = self.agent_networks.get(agent_id)
+                if network is None:
+                    network = create_network(genome, self.config)
+                    self.agent_networks[agent_id] = network
+                network_outputs = network.activate(sensor_readings)
 
                 # !!! Перевіряємо результат ПЕРЕД викликом update !!!
-                if network_outputs is None:
-                    print(f"FATAL ERROR: activate_network for genome {genome.id} returned None!")
-                    # Можна тут додати детальніший дебаг геному/входів, якщо потрібно
-                    # print(f"    Genome: {genome}")
-                    # print(f"    Inputs: {sensor_readings}")
-                    raise TypeError("activate_network returned None unexpectedly.") # Генеруємо помилку явно
-
                 if not isinstance(network_outputs, list):
-                     print(f"FATAL ERROR: activate_network for genome {genome.id} returned {type(network_outputs)}, expected list!")
-                     raise TypeError("activate_network did not return a list.")
+                     print(f"FATAL ERROR: network.activate for genome {genome.id} returned {type(network_outputs)}, expected list!")
+                     raise TypeError("network.activate did not return a list.")
 
                 # Якщо перевірки пройдені, викликаємо update
                 agent.update(self.maze, network_outputs, dt=1)
 
             except Exception as e:
-                # Ловимо помилку або з activate_network, або з agent.update
+                # Ловимо помилку або з network.activate, або з agent.update
                 print(f"Error updating agent {agent_id} with genome {genome.id}: {e}")
                 # Додатковий дебаг: що було в network_outputs під час помилки?
                 # print(f"    network_outputs was: {network_outputs} (type: {type(network_outputs)})")
@@ -516,6 +601,15 @@ class SimulationController:
         self.master.after(delay, self.simulation_step)
 
 
+    def _prepare_evaluation_resources(self):
+        """
+        Готує спільні для воркерів дані до оцінки: таблиця променів лабіринту
+        будується один раз тут і зберігається на диск, воркери лише відкривають її через mmap.
+        """
+        if self.config.get('RAY_LOOKUP_TABLE', False):
+            # self.maze має ті самі розміри та сід, що й лабіринт воркерів, тож і той самий файл кешу
+            get_ray_table(self.maze, self.config)
+
     def run_one_generation(self):
         """Запускає ОДИН повний цикл покоління NEAT з паралельною оцінкою."""
         if self._is_running_multiple: # Не запускаємо вручну, якщо йде batch run
@@ -525,9 +619,10 @@ class SimulationController:
         print(f"\n--- Running Generation {self.neat.generation + 1} ---")
         start_time = time.time()
 
+        self._prepare_evaluation_resources()
         # Викликаємо метод NEAT, передаючи ГЛОБАЛЬНУ функцію оцінки
         # Ця функція тепер буде використовувати ProcessPoolExecutor
-        stats = self.neat.run_generation(evaluate_single_genome)
+        stats = self.neat.run_generation(evaluate_single_genome, evaluate_population_batch, evaluate_genome_chunk)
 
         end_time = time.time()
         gen_num = stats.get('generation', '?')
@@ -536,7 +631,7 @@ class SimulationController:
         num_sp = stats.get('num_species', '?')
 
         print(f"Generation {gen_num} finished in {end_time - start_time:.2f} seconds.")
-        print(f"Stats: MaxFit={max_fit:.4f}, AvgFit={avg_fit:.4f}, Species={num_sp}")
+        print(f"Stats: MaxFit={max_fit:.4f}, AvgFit={avg_fit:.4f}, Species={num_sp}, Speciation={stats.get('speciation_time', 0.0):.3f}s")
 
         # Оновлюємо GUI зібраною статистикою
         gui_stats_payload = {
@@ -565,8 +660,12 @@ class SimulationController:
 
         start_gen = self.neat.generation + 1
         end_gen = start_gen + num_generations
+        checkpoint_writer = None
 
         try:
+            # Контрольні точки: знімок тут, запис на диск - у фоновому потоці
+            checkpoint_writer = CheckpointWriter.from_config(self.config)
+            self._prepare_evaluation_resources()
             for gen in range(start_gen, end_gen):
                  if self._stop_multiple_requested:
                      print("Batch run interrupted by user.")
@@ -576,7 +675,7 @@ class SimulationController:
                  start_time_gen = time.time()
 
                  # Викликаємо основний метод run_generation з NeatAlgorithm
-                 stats = self.neat.run_generation(evaluate_single_genome) # Використовуємо глобальну функцію
+                 stats = self.neat.run_generation(evaluate_single_genome, evaluate_population_batch, evaluate_genome_chunk) # Використовуємо глобальну функцію
 
                  end_time_gen = time.time()
                  max_fit = stats.get('max_fitness', float('nan'))
@@ -598,6 +697,9 @@ class SimulationController:
                 }
                  self.gui.update_gui_from_thread(gui_stats_payload) # Передаємо зібрану статистику
 
+                 if checkpoint_writer is not None:
+                     checkpoint_writer.maybe_checkpoint(self.neat, self.config)
+
                  # Невелике очікування, щоб GUI встиг оновитись (опціонально)
                  # time.sleep(0.01)
 
@@ -608,6 +710,8 @@ class SimulationController:
             messagebox.showerror("Batch Run Error", f"An error occurred:\n{e}")
         finally:
             print("Batch run finished.")
+            if checkpoint_writer is not None:
+                checkpoint_writer.close() # Дочікуємося запису останньої контрольної точки
             self._is_running_multiple = False
             self._stop_multiple_requested = False
             # Розблоковуємо кнопки керування через головний потік GUI
@@ -654,15 +758,20 @@ class SimulationController:
 
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Checkpoint", "*" + NEATBinarySerializer.EXTENSION), ("All Files", "*.*")],
             title="Save NEAT Simulation State"
         )
         if not filepath:
             return
 
         try:
-            # Використовуємо JSON серіалізатор
-            NEATJSONSerializer.save_neat_state(filepath, self.neat, self.config.copy())
+            if filepath.endswith(NEATBinarySerializer.EXTENSION):
+                # Компактний двійковий формат
+                NEATBinarySerializer.save_neat_state(filepath, self.neat, self.config.copy(),
+                                                     compression=self.config.get('CHECKPOINT_COMPRESSION', "gzip"))
+            else:
+                # Використовуємо JSON серіалізатор
+                NEATJSONSerializer.save_neat_state(filepath, self.neat, self.config.copy())
             messagebox.showinfo("Success", f"Simulation state saved to {os.path.basename(filepath)}")
             print(f"State saved successfully to {filepath}")
         except Exception as e:
@@ -674,22 +783,25 @@ class SimulationController:
     def load_simulation(self):
         filepath = filedialog.askopenfilename(
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("NEAT Save Files (Legacy)", "*.neat_save"), ("All Files", "*.*")],
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Checkpoint", "*" + NEATBinarySerializer.EXTENSION),
+                       ("NEAT Save Files (Legacy)", "*.neat_save"), ("All Files", "*.*")],
             title="Load NEAT Simulation State"
         )
         if not filepath:
             return
 
         try:
-            # Перевіряємо розширення файлу
-            if filepath.endswith('.json'):
-                # Завантажуємо з JSON
+            # Двійковий формат визначається за магічним числом, JSON - за розширенням
+            is_binary = NEATBinarySerializer.is_binary_checkpoint(filepath)
+            if is_binary or filepath.endswith('.json'):
                 from neat.genome import Genome, NodeGene, ConnectionGene
                 from neat.innovation import InnovationManager
                 from neat.species import Species
                 
-                # NEATJSONSerializer.load_neat_state оновить self.config
-                self.neat = NEATJSONSerializer.load_neat_state(
+                # load_neat_state оновить self.config
+                serializer = NEATBinarySerializer if is_binary else NEATJSONSerializer
+                self.neat.shutdown() # Пул старого алгоритму більше не потрібен
+                self.neat = serializer.load_neat_state(
                     filepath,
                     self.config,
                     NeatAlgorithm,
@@ -740,6 +852,7 @@ class SimulationController:
                 num_outputs = self.config['NUM_OUTPUTS']
 
                 if neat_state_data:
+                    self.neat.shutdown() # Пул старого алгоритму більше не потрібен
                     self.neat = NeatAlgorithm.load_from_state_data(neat_state_data, self.config, num_inputs, num_outputs)
                 else:
                     messagebox.showerror("Load Error", "NEAT algorithm data not found in save file.")
@@ -767,11 +880,13 @@ class SimulationController:
         print("Resetting NEAT simulation...")
         try:
             self.config = self._load_config() # Завантажуємо свіжий конфіг з файлу
+            configure_logging(self.config.get('LOG_LEVEL', 'INFO'))
             self.config['NUM_PROCESSES'] = os.cpu_count() 
             num_inputs = (self.config['NUM_RANGEFINDERS'] + self.config['NUM_RADAR_SLICES'] + 2 + 1)
             num_outputs = self.config['NUM_OUTPUTS']
             self.config['NUM_INPUTS'] = num_inputs
 
+            self.neat.shutdown() # Зупиняємо пул процесів попереднього запуску
             self.neat = NeatAlgorithm(self.config, num_inputs, num_outputs) 
             
             # generate_new_maze використає self.config.get('MAZE_SEED') з щойно завантаженого конфігу
@@ -786,6 +901,19 @@ class SimulationController:
             print(f"FATAL ERROR during reset: {e}")
             messagebox.showerror("Reset Error", f"Could not reset simulation: {e}")
 
+    def shutdown(self):
+        """Зупиняє фонові покоління та пул процесів оцінки."""
+        self._stop_multiple_requested = True
+        self.is_running = False
+        if hasattr(self, 'neat'):
+            self.neat.shutdown()
+
+    def on_close(self):
+        """Обробник закриття головного вікна."""
+        print("Shutting down...")
+        self.shutdown()
+        self.master.destroy()
+
 
 # --- Точка входу ---
 if __name__ == "__main__":
@@ -797,6 +925,7 @@ if __name__ == "__main__":
     try:
         controller = SimulationController(root)
         root.mainloop()
+        controller.shutdown() # Вихід через меню (master.quit) теж звільняє воркери
     except Exception as e:
         # ... (обробка помилок як раніше) ...
         print(f"\n--- Unhandled Exception ---")
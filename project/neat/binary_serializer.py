@@ -0,0 +1,352 @@
+# neat/binary_serializer.py
+
+import gzip
+import io
+import json
+import struct
+import zipfile
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from neat.genome import NODE_TYPES, hash_structure
+from neat.json_serializer import NEATJSONEncoder, NEATJSONSerializer
+from neat.log import get_logger
+
+try:
+    import zstandard # Необов'язкова залежність для стиснення zstd
+except ImportError:
+    zstandard = None
+
+logger = get_logger(__name__)
+
+# Масиви генів, що пакуються Genome.to_arrays() (вузли та з'єднання окремо)
+NODE_ARRAYS = ('node_ids', 'node_types', 'node_biases', 'node_activations')
+CONNECTION_ARRAYS = ('conn_innovations', 'conn_in', 'conn_out', 'conn_weights', 'conn_enabled')
+# Поля Genome.summary(), що зберігаються колонками summary_<поле> (species_id - окрема колонка)
+SUMMARY_FIELDS = ('num_nodes', 'num_hidden', 'num_connections', 'num_enabled', 'depth', 'structural_hash')
+
+class NEATBinarySerializer:
+    """
+    Компактний двійковий формат збереження стану NEAT (альтернатива JSON з відступами).
+
+    Файл: заголовок (магічне число, версія формату, код стиснення) і вміст .npz,
+    за потреби стиснутий gzip або zstd. Усе, крім генів, зберігається тим самим
+    JSON-документом, що й у NEATJSONSerializer (масив "state"), тож завантаження
+    відтворює той самий стан, що й з JSON. Гени всіх геномів - суцільні колонкові
+    масиви Genome.to_arrays() зі зміщеннями node_offsets/conn_offsets на кожен геном.
+    """
+
+    MAGIC = b"NEATBIN\x00"
+    FORMAT_VERSION = 1
+    EXTENSION = ".neatb"
+    # Магічне число, версія формату, код стиснення, резерв
+    HEADER = struct.Struct("<8sHB5x")
+    COMPRESSION_CODES = {"none": 0, "gzip": 1, "zstd": 2}
+    NO_SPECIES = -1 # species_id = None у колонці genome_species_ids
+
+    @staticmethod
+    def is_binary_checkpoint(filepath: str) -> bool:
+        """Визначає формат файлу за магічним числом (а не за розширенням)."""
+        with open(filepath, 'rb') as f:
+            return f.read(len(NEATBinarySerializer.MAGIC)) == NEATBinarySerializer.MAGIC
+
+    @staticmethod
+    def _compress(payload: bytes, compression: str) -> Tuple[bytes, int]:
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to gzip compression.")
+            compression = "gzip"
+        if compression not in NEATBinarySerializer.COMPRESSION_CODES:
+            raise ValueError(f"Unknown checkpoint compression: {compression}")
+        if compression == "gzip":
+            payload = gzip.compress(payload, compresslevel=6)
+        elif compression == "zstd":
+            payload = zstandard.ZstdCompressor().compress(payload)
+        return payload, NEATBinarySerializer.COMPRESSION_CODES[compression]
+
+    @staticmethod
+    def _decompress(payload: bytes, code: int) -> bytes:
+        if code == NEATBinarySerializer.COMPRESSION_CODES["gzip"]:
+            return gzip.decompress(payload)
+        if code == NEATBinarySerializer.COMPRESSION_CODES["zstd"]:
+            if zstandard is None:
+                raise ImportError("Checkpoint is zstd-compressed, install the 'zstandard' package to load it.")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        if code != NEATBinarySerializer.COMPRESSION_CODES["none"]:
+            raise ValueError(f"Unknown checkpoint compression code: {code}")
+        return payload
+
+    @staticmethod
+    def pack_genomes(all_genomes: Dict[int, Any]) -> Tuple[Dict[str, np.ndarray], list]:
+        """
+        Пакує геноми в колонкові масиви.
+
+        Returns:
+            Tuple: (масиви, layouts) - layouts містить унікальні набори
+                   [input_node_ids, output_node_ids, bias_node_id], на які
+                   посилається колонка genome_layouts.
+        """
+        genomes = list(all_genomes.values())
+        layouts, layout_index, genome_layouts = [], {}, []
+        per_genome = []
+        for genome in genomes:
+            layout = (tuple(genome._input_node_ids), tuple(genome._output_node_ids), genome._bias_node_id)
+            if layout not in layout_index:
+                layout_index[layout] = len(layouts)
+                layouts.append([list(layout[0]), list(layout[1]), layout[2]])
+            genome_layouts.append(layout_index[layout])
+            per_genome.append(genome.to_arrays())
+
+        node_counts = [len(arrays['node_ids']) for arrays in per_genome]
+        conn_counts = [len(arrays['conn_innovations']) for arrays in per_genome]
+        arrays = {
+            'genome_ids': np.array(list(all_genomes.keys()), dtype=np.int64),
+            'genome_fitness': np.array([g.fitness for g in genomes], dtype=np.float64),
+            'genome_adjusted_fitness': np.array([g.adjusted_fitness for g in genomes], dtype=np.float64),
+            'genome_species_ids': np.array([NEATBinarySerializer.NO_SPECIES if g.species_id is None else g.species_id
+                                            for g in genomes], dtype=np.int64),
+            'genome_layouts': np.array(genome_layouts, dtype=np.int32),
+            'node_offsets': np.concatenate(([0], np.cumsum(node_counts, dtype=np.int64))),
+            'conn_offsets': np.concatenate(([0], np.cumsum(conn_counts, dtype=np.int64))),
+        }
+        for name in NODE_ARRAYS + CONNECTION_ARRAYS:
+            dtype = per_genome[0][name].dtype if per_genome else np.float64
+            arrays[name] = np.concatenate([a[name] for a in per_genome]) if per_genome else np.zeros(0, dtype=dtype)
+        return arrays, layouts
+
+    @staticmethod
+    def unpack_genomes(arrays, layouts: list, config: dict, Genome, innovation_manager) -> Dict[int, Any]:
+        """Відновлює словник {id: Genome} з масивів pack_genomes."""
+        node_offsets = arrays['node_offsets'].tolist()
+        conn_offsets = arrays['conn_offsets'].tolist()
+        node_columns = {name: arrays[name] for name in NODE_ARRAYS}
+        conn_columns = {name: arrays[name] for name in CONNECTION_ARRAYS}
+        all_genomes = {}
+        for i, (gid, fitness, adjusted, species_id, layout) in enumerate(zip(
+                arrays['genome_ids'].tolist(), arrays['genome_fitness'].tolist(),
+                arrays['genome_adjusted_fitness'].tolist(), arrays['genome_species_ids'].tolist(),
+                arrays['genome_layouts'].tolist())):
+            genome = Genome(gid, 0, 0, config, innovation_manager)
+            genome.fitness = fitness
+            genome.adjusted_fitness = adjusted
+            genome.species_id = None if species_id == NEATBinarySerializer.NO_SPECIES else species_id
+            input_ids, output_ids, bias_id = layouts[layout]
+            genome._input_node_ids = list(input_ids)
+            genome._output_node_ids = list(output_ids)
+            genome._bias_node_id = bias_id
+            genome_arrays = {name: column[node_offsets[i]:node_offsets[i + 1]] for name, column in node_columns.items()}
+            genome_arrays.update({name: column[conn_offsets[i]:conn_offsets[i + 1]] for name, column in conn_columns.items()})
+            genome.set_genes_from_arrays(genome_arrays)
+            all_genomes[gid] = genome
+        return all_genomes
+
+    @staticmethod
+    def summary_columns(arrays, layouts: list) -> Dict[str, np.ndarray]:
+        """
+        Колонки summary_<поле> (як Genome.summary()) прямо з масивів pack_genomes, без
+        відновлення геномів: лічильники - зі зміщень, глибина - з увімкнених ребер усіх
+        геномів разом, хеш - hash_structure над зрізами колонок.
+        """
+        node_counts = np.diff(np.asarray(arrays['node_offsets']))
+        conn_counts = np.diff(np.asarray(arrays['conn_offsets']))
+        num_genomes = len(node_counts)
+        node_rows = np.repeat(np.arange(num_genomes), node_counts)
+        conn_rows = np.repeat(np.arange(num_genomes), conn_counts)
+        hidden = np.asarray(arrays['node_types']) == NODE_TYPES.index("HIDDEN")
+        enabled = np.asarray(arrays['conn_enabled'], dtype=bool)
+        columns = {
+            'num_nodes': node_counts,
+            'num_hidden': np.bincount(node_rows, weights=hidden, minlength=num_genomes),
+            'num_connections': conn_counts,
+            'num_enabled': np.bincount(conn_rows, weights=enabled, minlength=num_genomes),
+            'depth': NEATBinarySerializer._depth_column(arrays, layouts, node_rows, conn_rows, enabled),
+            'structural_hash': NEATBinarySerializer._structural_hash_column(arrays, layouts, conn_rows, enabled),
+        }
+        return {'summary_' + field: np.asarray(columns[field], dtype=np.int64) for field in SUMMARY_FIELDS}
+
+    @staticmethod
+    def _depth_column(arrays, layouts: list, node_rows: np.ndarray, conn_rows: np.ndarray,
+                      enabled: np.ndarray) -> np.ndarray:
+        """
+        Genome.depth для всіх геномів: алгоритм Кана, де кожен раунд обробляє весь
+        поточний фронт (вузли з нульовим вхідним степенем) усіх геномів разом.
+        """
+        num_genomes = len(arrays['genome_ids'])
+        node_ids = np.asarray(arrays['node_ids'], dtype=np.int64)
+        conn_in = np.asarray(arrays['conn_in'], dtype=np.int64)
+        conn_out = np.asarray(arrays['conn_out'], dtype=np.int64)
+        # Вузол - пара (рядок геному, id); ключ row * stride + id, індекс вузла - позиція в node_ids
+        stride = int(max(node_ids.max(initial=0), conn_in.max(initial=0), conn_out.max(initial=0))) + 1
+        node_keys = node_rows * stride + node_ids
+        order = np.argsort(node_keys)
+        sorted_keys = node_keys[order]
+
+        def locate(rows: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            """Індекси вузлів (rows, ids) та маска тих, що є в геномі."""
+            if len(sorted_keys) == 0:
+                return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+            keys = rows * stride + ids
+            positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            return order[positions], sorted_keys[positions] == keys
+
+        # Як у Genome.depth: лише увімкнені з'єднання між наявними вузлами
+        src, src_found = locate(conn_rows, conn_in)
+        dst, dst_found = locate(conn_rows, conn_out)
+        valid = enabled & src_found & dst_found
+        src, dst = src[valid], dst[valid]
+
+        in_degree = np.bincount(dst, minlength=len(node_ids))
+        level = np.zeros(len(node_ids), dtype=np.int64)
+        frontier = in_degree == 0
+        while True:
+            active = frontier[src]
+            if not active.any():
+                break
+            front_src, front_dst = src[active], dst[active]
+            np.maximum.at(level, front_dst, level[front_src] + 1)
+            in_degree -= np.bincount(front_dst, minlength=len(node_ids))
+            frontier = np.zeros(len(node_ids), dtype=bool)
+            frontier[front_dst] = in_degree[front_dst] == 0
+
+        output_rows, output_ids = [], []
+        for row, layout in enumerate(np.asarray(arrays['genome_layouts']).tolist()):
+            ids = layouts[layout][1]
+            output_rows.extend([row] * len(ids))
+            output_ids.extend(ids)
+        output_rows = np.array(output_rows, dtype=np.int64)
+        outputs, found = locate(output_rows, np.array(output_ids, dtype=np.int64))
+        depth = np.zeros(num_genomes, dtype=np.int64)
+        np.maximum.at(depth, output_rows[found], level[outputs[found]])
+        return depth
+
+    @staticmethod
+    def _structural_hash_column(arrays, layouts: list, conn_rows: np.ndarray, enabled: np.ndarray) -> np.ndarray:
+        """Genome.structural_hash для всіх геномів: hash_structure над зрізами колонок."""
+        node_offsets = np.asarray(arrays['node_offsets']).tolist()
+        node_ids = np.asarray(arrays['node_ids'], dtype=np.int64)
+        node_types = np.asarray(arrays['node_types'], dtype=np.int64)
+        node_activations = np.asarray(arrays['node_activations'], dtype=np.int64)
+        # Лише увімкнені з'єднання, зі своїми зміщеннями на геном
+        enabled_in = np.asarray(arrays['conn_in'], dtype=np.int64)[enabled]
+        enabled_out = np.asarray(arrays['conn_out'], dtype=np.int64)[enabled]
+        num_genomes = len(node_offsets) - 1
+        enabled_offsets = np.concatenate(([0], np.cumsum(np.bincount(conn_rows[enabled], minlength=num_genomes)))).tolist()
+
+        hashes = []
+        for row, layout in enumerate(np.asarray(arrays['genome_layouts']).tolist()):
+            node_start, node_end = node_offsets[row], node_offsets[row + 1]
+            conn_start, conn_end = enabled_offsets[row], enabled_offsets[row + 1]
+            hashes.append(hash_structure(layouts[layout], node_ids[node_start:node_end], node_types[node_start:node_end],
+                                         node_activations[node_start:node_end], enabled_in[conn_start:conn_end],
+                                         enabled_out[conn_start:conn_end]))
+        return np.array(hashes, dtype=np.int64)
+
+    @staticmethod
+    def snapshot(neat_algorithm, config: dict) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """
+        Знімок стану NEAT, не пов'язаний з живими об'єктами (JSON-документ без генів
+        і колонкові масиви генів). Дешевий: зведення геномів, кодування та запис
+        (encode_snapshot) можна виконувати в іншому потоці, поки еволюція триває.
+        """
+        all_genomes = NEATJSONSerializer.collect_genomes(neat_algorithm)
+        arrays, layouts = NEATBinarySerializer.pack_genomes(all_genomes)
+        data = NEATJSONSerializer.build_state_data(neat_algorithm, dict(config), all_genomes, None)
+        data["genome_layouts"] = layouts
+        return data, arrays
+
+    @staticmethod
+    def encode_snapshot(snapshot: Tuple[dict, Dict[str, np.ndarray]], compression: str = "gzip") -> bytes:
+        """Байти файлу збереження (заголовок + стиснутий вміст .npz) для знімка."""
+        data, arrays = snapshot
+        state = json.dumps(data, ensure_ascii=False, cls=NEATJSONEncoder).encode('utf-8')
+        arrays = dict(arrays, state=np.frombuffer(state, dtype=np.uint8))
+        arrays.update(NEATBinarySerializer.summary_columns(arrays, data["genome_layouts"]))
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        payload, code = NEATBinarySerializer._compress(buffer.getvalue(), compression)
+        return NEATBinarySerializer.HEADER.pack(NEATBinarySerializer.MAGIC, NEATBinarySerializer.FORMAT_VERSION, code) + payload
+
+    @staticmethod
+    def save_neat_state(filepath: str, neat_algorithm, config: dict, compression: str = "gzip"):
+        """
+        Зберігає повний стан NEAT алгоритму у двійковий файл.
+
+        Args:
+            compression (str): "none", "gzip" або "zstd" (потрібен пакет zstandard,
+                               інакше - gzip з попередженням).
+        """
+        content = NEATBinarySerializer.encode_snapshot(NEATBinarySerializer.snapshot(neat_algorithm, config), compression)
+        with open(filepath, 'wb') as f:
+            f.write(content)
+
+    @staticmethod
+    def _memory_map_arrays(f) -> Dict[str, np.ndarray]:
+        """
+        Відображає масиви нестиснутого вмісту .npz у пам'ять (np.memmap) без копіювання.
+        np.savez зберігає члени архіву без стиснення, тож дані кожного масиву - суцільний
+        діапазон файлу, і ОС читає з диска лише сторінки, до яких реально звертаються.
+        """
+        arrays = {}
+        with zipfile.ZipFile(f) as archive: # zipfile враховує заголовок перед архівом
+            for info in archive.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"Array {info.filename} is compressed and cannot be memory-mapped")
+                # Локальний заголовок ZIP: 30 байт + ім'я + додаткове поле
+                f.seek(info.header_offset + 26)
+                name_length, extra_length = struct.unpack("<HH", f.read(4))
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                name = info.filename[:-len(".npy")]
+                if int(np.prod(shape)) == 0:
+                    arrays[name] = np.zeros(shape, dtype=dtype) # Порожній діапазон не відображається
+                else:
+                    arrays[name] = np.memmap(f.name, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                             order='F' if fortran_order else 'C')
+        return arrays
+
+    @staticmethod
+    def read_checkpoint(filepath: str, memory_map: bool = False):
+        """
+        Читає двійковий файл збереження.
+
+        Args:
+            memory_map (bool): Для нестиснутих файлів - відобразити масиви в пам'ять
+                               замість читання всього файлу (для аналізу великих архівів).
+
+        Returns:
+            Tuple: (data, arrays) - JSON-документ стану (без генів) та масиви генів.
+        """
+        with open(filepath, 'rb') as f:
+            header = f.read(NEATBinarySerializer.HEADER.size)
+            if len(header) < NEATBinarySerializer.HEADER.size:
+                raise ValueError(f"File is too short to be a NEAT binary checkpoint: {filepath}")
+            magic, version, code = NEATBinarySerializer.HEADER.unpack(header)
+            if magic != NEATBinarySerializer.MAGIC:
+                raise ValueError(f"Not a NEAT binary checkpoint: {filepath}")
+            if version > NEATBinarySerializer.FORMAT_VERSION:
+                raise ValueError(f"Unsupported binary checkpoint version {version} (max {NEATBinarySerializer.FORMAT_VERSION})")
+
+            if memory_map and code == NEATBinarySerializer.COMPRESSION_CODES["none"]:
+                arrays = NEATBinarySerializer._memory_map_arrays(f)
+            else:
+                if memory_map:
+                    logger.warning("%s is compressed and cannot be memory-mapped; loading it fully into memory. "
+                                   "Save with compression \"none\" for lazy analysis.", filepath)
+                arrays = np.load(io.BytesIO(NEATBinarySerializer._decompress(f.read(), code)), allow_pickle=False)
+        data = json.loads(arrays['state'].tobytes().decode('utf-8'))
+        return data, arrays
+
+    @staticmethod
+    def load_neat_state(filepath: str, config: dict, NeatAlgorithm, Genome, NodeGene, ConnectionGene, Species, InnovationManager):
+        """Завантажує стан NEAT алгоритму з двійкового файлу (сигнатура як у NEATJSONSerializer)."""
+        data, arrays = NEATBinarySerializer.read_checkpoint(filepath)
+
+        def build_genomes(innovation_manager) -> Dict[int, Any]:
+            return NEATBinarySerializer.unpack_genomes(arrays, data["genome_layouts"], config, Genome, innovation_manager)
+
+        return NEATJSONSerializer.restore_neat_state(data, config, NeatAlgorithm, Species, build_genomes)
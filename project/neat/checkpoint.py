@@ -0,0 +1,142 @@
+# neat/checkpoint.py
+
+import glob
+import os
+import threading
+import time
+from typing import Optional
+
+from neat.binary_serializer import NEATBinarySerializer
+from neat.log import get_logger
+
+logger = get_logger(__name__)
+
+class CheckpointWriter:
+    """
+    Автоматичні контрольні точки під час довгих запусків.
+
+    Потік еволюції лише знімає стан (NEATBinarySerializer.snapshot), а кодування,
+    запис, fsync та атомарне перейменування виконує фоновий потік. Очікує не більше
+    одного знімка: якщо запис попереднього ще триває, старіший неписаний знімок
+    замінюється новішим, тож цикл еволюції ніколи не чекає на диск.
+    Зберігаються лише keep_last останніх файлів.
+    """
+
+    FILENAME_PREFIX = "checkpoint_gen"
+
+    def __init__(self, directory: str, every_generations: Optional[int] = None, every_seconds: Optional[float] = None,
+                 keep_last: int = 3, compression: str = "gzip"):
+        self.directory = directory
+        self.every_generations = every_generations
+        self.every_seconds = every_seconds
+        self.keep_last = max(1, int(keep_last))
+        self.compression = compression
+        self.last_checkpoint_path: Optional[str] = None
+
+        self._last_generation: Optional[int] = None
+        self._last_time = time.monotonic()
+        self._condition = threading.Condition()
+        self._pending = None # (filepath, snapshot), що чекає на запис
+        self._busy = False
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="CheckpointWriter", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional['CheckpointWriter']:
+        """Записувач за параметрами CHECKPOINT_* (None, якщо автоматичні контрольні точки вимкнено)."""
+        directory = config.get('CHECKPOINT_DIR')
+        every_generations = config.get('CHECKPOINT_EVERY_GENERATIONS')
+        every_seconds = config.get('CHECKPOINT_EVERY_SECONDS')
+        if not directory or not (every_generations or every_seconds):
+            return None
+        return cls(directory, every_generations, every_seconds, config.get('CHECKPOINT_KEEP_LAST', 3),
+                   config.get('CHECKPOINT_COMPRESSION', "gzip"))
+
+    def is_due(self, generation: int) -> bool:
+        """Чи настав час контрольної точки (за кількістю поколінь або часом від попередньої)."""
+        if self._last_generation is None:
+            self._last_generation = generation - 1 # Відлік - від першого покоління запуску
+        if self.every_generations and generation - self._last_generation >= self.every_generations:
+            return True
+        return bool(self.every_seconds) and time.monotonic() - self._last_time >= self.every_seconds
+
+    def maybe_checkpoint(self, neat_algorithm, config: dict) -> bool:
+        """Викликається після кожного покоління; знімає стан і ставить його в чергу, якщо настав час."""
+        if not self.is_due(neat_algorithm.generation):
+            return False
+        self.checkpoint(neat_algorithm, config)
+        return True
+
+    def checkpoint(self, neat_algorithm, config: dict):
+        """Знімає стан у поточному потоці та передає його фоновому записувачу."""
+        snapshot = NEATBinarySerializer.snapshot(neat_algorithm, config)
+        filename = f"{self.FILENAME_PREFIX}{neat_algorithm.generation:06d}{NEATBinarySerializer.EXTENSION}"
+        with self._condition:
+            if self._pending is not None:
+                logger.warning("Checkpoint writer is behind, skipping checkpoint for generation %s.",
+                               self._pending[1][0]["current_state"]["generation"])
+            self._pending = (os.path.join(self.directory, filename), snapshot)
+            self._condition.notify_all()
+        self._last_generation = neat_algorithm.generation
+        self._last_time = time.monotonic()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Чекає, доки всі поставлені знімки буде записано. Повертає False при тайм-ауті."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def close(self):
+        """Дописує останній знімок і зупиняє фоновий потік."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closing)
+                if self._pending is None:
+                    return # Закриття без неписаних знімків
+                filepath, snapshot = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                self._write(filepath, snapshot)
+            except Exception as e:
+                logger.error("Failed to write checkpoint %s: %s", filepath, e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, filepath: str, snapshot):
+        """Запис у тимчасовий файл, fsync, атомарне перейменування, ротація старих файлів."""
+        content = NEATBinarySerializer.encode_snapshot(snapshot, self.compression)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = filepath + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath) # Читач бачить або старий, або повний новий файл
+        if hasattr(os, 'O_DIRECTORY'):
+            # fsync каталогу фіксує саме перейменування (POSIX)
+            dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self.last_checkpoint_path = filepath
+        logger.info("Checkpoint saved to %s", filepath)
+        self._rotate()
+
+    def _rotate(self):
+        pattern = os.path.join(self.directory, f"{self.FILENAME_PREFIX}*{NEATBinarySerializer.EXTENSION}")
+        # Номер покоління доповнено нулями, тож сортування за іменем - хронологічне
+        for old_path in sorted(glob.glob(pattern))[:-self.keep_last]:
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                logger.warning("Could not remove old checkpoint %s: %s", old_path, e)
@@ -0,0 +1,142 @@
+# neat/compatibility.py
+
+from typing import List, Sequence
+import numpy as np
+
+from .genome import Genome
+
+class PopulationEncoding:
+    """
+    Компактне представлення набору геномів для векторизованого розрахунку відстаней.
+
+    З'єднання всіх геномів зберігаються одним суцільним масивом інноваційних
+    номерів (відсортованих у межах кожного геному) та масивом ваг; offsets[i]
+    вказує початок геному i. Так відстань від одного геному до всіх інших
+    рахується кількома викликами NumPy замість циклу Python по генах.
+    """
+
+    def __init__(self, genomes: Sequence[Genome]):
+        self.genomes = list(genomes)
+        lengths = []
+        innovations = []
+        weights = []
+        for genome in self.genomes:
+            conns = genome.get_sorted_connections()
+            lengths.append(len(conns))
+            innovations.extend(c.innovation for c in conns)
+            weights.extend(c.weight for c in conns)
+        self.lengths = np.array(lengths, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)))
+        self.innovations = np.array(innovations, dtype=np.int64)
+        self.weights = np.array(weights, dtype=np.float64)
+        # Номер геному для кожного гена (для bincount)
+        self.owner = np.repeat(np.arange(len(self.genomes)), self.lengths)
+        # Максимальна інновація кожного геному (0 для порожнього - як у Genome.distance)
+        self.max_innovations = np.zeros(len(self.genomes), dtype=np.int64)
+        non_empty = self.lengths > 0
+        self.max_innovations[non_empty] = self.innovations[self.offsets[1:][non_empty] - 1]
+
+    def __len__(self) -> int:
+        return len(self.genomes)
+
+    def genome_arrays(self, index: int):
+        """Відсортовані інновації та ваги геному з індексом index."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.innovations[start:end], self.weights[start:end]
+
+def encode_genome(genome: Genome):
+    """Відсортовані за інновацією масиви (innovations, weights) з'єднань геному."""
+    conns = genome.get_sorted_connections()
+    return (np.array([c.innovation for c in conns], dtype=np.int64),
+            np.array([c.weight for c in conns], dtype=np.float64))
+
+def distances_to_population(innovations: np.ndarray, weights: np.ndarray, encoding: PopulationEncoding,
+                            c1: float, c2: float, c3: float) -> np.ndarray:
+    """
+    Відстань NEAT від одного геному (відсортовані innovations/weights) до кожного геному encoding.
+    Повторює Genome.distance: excess - гени за межею максимальної інновації іншого геному,
+    disjoint - решта незбіжних, N - кількість генів більшого геному (мінімум 1).
+    """
+    num_genomes = len(encoding)
+    own_count = len(innovations)
+    own_max = innovations[-1] if own_count else 0
+
+    # Збіги: шукаємо кожен ген популяції серед генів цього геному
+    positions = np.searchsorted(innovations, encoding.innovations)
+    positions_clipped = np.minimum(positions, max(own_count - 1, 0))
+    if own_count:
+        matched = (positions < own_count) & (innovations[positions_clipped] == encoding.innovations)
+    else:
+        matched = np.zeros(len(encoding.innovations), dtype=bool)
+    matching_count = np.bincount(encoding.owner, weights=matched, minlength=num_genomes)
+    weight_diff = np.abs(weights[positions_clipped] - encoding.weights) if own_count else np.zeros(len(matched))
+    weight_diff_sum = np.bincount(encoding.owner, weights=np.where(matched, weight_diff, 0.0), minlength=num_genomes)
+
+    # Незбіжні гени популяції: excess, якщо за межею максимальної інновації цього геному
+    unmatched_other = encoding.lengths - matching_count
+    excess_other = np.bincount(encoding.owner, weights=~matched & (encoding.innovations > own_max),
+                               minlength=num_genomes)
+    # Незбіжні гени цього геному: excess, якщо більші за максимальну інновацію іншого геному
+    excess_own = own_count - np.searchsorted(innovations, encoding.max_innovations, side='right')
+    unmatched_own = own_count - matching_count
+
+    excess_count = excess_other + excess_own
+    disjoint_count = (unmatched_other - excess_other) + (unmatched_own - excess_own)
+    n = np.maximum(1.0, np.maximum(encoding.lengths, own_count).astype(np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_weight_diff = np.where(matching_count > 0, weight_diff_sum / matching_count, 0.0)
+    return (c1 * excess_count / n) + (c2 * disjoint_count / n) + (c3 * avg_weight_diff)
+
+def genome_to_population_distances(genome: Genome, encoding: PopulationEncoding,
+                                   c1: float, c2: float, c3: float) -> np.ndarray:
+    """Відстані від genome до кожного геному encoding (масив довжини len(encoding))."""
+    innovations, weights = encode_genome(genome)
+    return distances_to_population(innovations, weights, encoding, c1, c2, c3)
+
+def representative_distances(representatives: Sequence[Genome], encoding: PopulationEncoding,
+                             c1: float, c2: float, c3: float) -> np.ndarray:
+    """Матриця відстаней (len(representatives), len(encoding)) від представників видів до популяції."""
+    if not representatives:
+        return np.zeros((0, len(encoding)))
+    return np.vstack([genome_to_population_distances(rep, encoding, c1, c2, c3) for rep in representatives])
+
+def pairwise_distances(genomes: Sequence[Genome], c1: float, c2: float, c3: float) -> np.ndarray:
+    """Симетрична матриця попарних відстаней (P, P) для аналізу різноманітності популяції."""
+    encoding = PopulationEncoding(genomes)
+    matrix = np.zeros((len(encoding), len(encoding)))
+    for i in range(len(encoding)):
+        innovations, weights = encoding.genome_arrays(i)
+        matrix[i] = distances_to_population(innovations, weights, encoding, c1, c2, c3)
+    return matrix
+
+def assign_species(encoding: PopulationEncoding, representatives: Sequence[Genome],
+                   threshold: float, c1: float, c2: float, c3: float) -> List[int]:
+    """
+    Розподіл геномів по видах з тією ж семантикою "перший збіг", що й у послідовному скануванні:
+    спершу - перший існуючий представник з відстанню < threshold; решта геномів по порядку
+    утворює нові види, і кожен наступний геном приєднується до найранішого нового виду, що підходить.
+
+    Returns:
+        List[int]: Для кожного геному - індекс виду: 0..R-1 для існуючих представників,
+                   R, R+1, ... для нових видів (у порядку створення).
+    """
+    num_existing = len(representatives)
+    assignment = np.full(len(encoding), -1, dtype=np.int64)
+    if num_existing:
+        matches = representative_distances(representatives, encoding, c1, c2, c3) < threshold
+        has_match = matches.any(axis=0)
+        assignment[has_match] = matches.argmax(axis=0)[has_match]
+
+    # Нові види: представник - перший ще не розподілений геном
+    next_species = num_existing
+    remaining = np.flatnonzero(assignment < 0)
+    while len(remaining):
+        founder = remaining[0]
+        innovations, weights = encoding.genome_arrays(founder)
+        distances = distances_to_population(innovations, weights, encoding, c1, c2, c3)[remaining]
+        joins = distances < threshold
+        joins[0] = True # Засновник завжди належить своєму виду
+        assignment[remaining[joins]] = next_species
+        remaining = remaining[~joins]
+        next_species += 1
+    return assignment.tolist()
@@ -1,26 +1,161 @@
 # neat/data_analyzer.py
 
 import json
+import os
+from collections.abc import Mapping
 import numpy as np
 import matplotlib.pyplot as plt
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import pandas as pd
 
+from neat.binary_serializer import SUMMARY_FIELDS, NEATBinarySerializer
+from neat.genome import ACTIVATION_NAMES, NODE_TYPES, ConnectionGene, Genome, NodeGene
+from neat.innovation import InnovationManager
+from neat.json_serializer import NEATJSONSerializer
+from neat.run_log import RunLog
+
+
+class GenomeTable(Mapping):
+    """
+    Ліниве відображення {str(genome_id): словник геному} поверх колонкових масивів
+    двійкового збереження. Геном перетворюється на словник (як у serialize_genome)
+    лише при зверненні, а колонки складності рахуються векторно зі зміщень.
+    """
+
+    def __init__(self, arrays, layouts: list):
+        self.arrays = arrays
+        self.layouts = layouts
+        self.genome_ids = arrays['genome_ids']
+        self._rows = {str(gid): row for row, gid in enumerate(self.genome_ids.tolist())}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self._rows
+
+    def __getitem__(self, key) -> Dict:
+        row = self._rows[str(key)]
+        arrays = self.arrays
+        node_start, node_end = arrays['node_offsets'][row:row + 2].tolist()
+        conn_start, conn_end = arrays['conn_offsets'][row:row + 2].tolist()
+        species_id = int(arrays['genome_species_ids'][row])
+        input_ids, output_ids, bias_id = self.layouts[int(arrays['genome_layouts'][row])]
+        nodes = {}
+        for node_id, type_code, bias, act_code in zip(arrays['node_ids'][node_start:node_end].tolist(),
+                                                      arrays['node_types'][node_start:node_end].tolist(),
+                                                      arrays['node_biases'][node_start:node_end].tolist(),
+                                                      arrays['node_activations'][node_start:node_end].tolist()):
+            nodes[str(node_id)] = {"id": node_id, "type": NODE_TYPES[type_code], "bias": bias,
+                                   "activation_function": ACTIVATION_NAMES[act_code]}
+        connections = {}
+        for innov, in_id, out_id, weight, enabled in zip(arrays['conn_innovations'][conn_start:conn_end].tolist(),
+                                                         arrays['conn_in'][conn_start:conn_end].tolist(),
+                                                         arrays['conn_out'][conn_start:conn_end].tolist(),
+                                                         arrays['conn_weights'][conn_start:conn_end].tolist(),
+                                                         arrays['conn_enabled'][conn_start:conn_end].tolist()):
+            connections[str(innov)] = {"in_node_id": in_id, "out_node_id": out_id, "weight": weight,
+                                       "enabled": enabled, "innovation": innov}
+        return {
+            "id": int(self.genome_ids[row]),
+            "fitness": float(arrays['genome_fitness'][row]),
+            "adjusted_fitness": float(arrays['genome_adjusted_fitness'][row]),
+            "species_id": None if species_id == NEATBinarySerializer.NO_SPECIES else species_id,
+            "nodes": nodes,
+            "connections": connections,
+            "input_node_ids": list(input_ids),
+            "output_node_ids": list(output_ids),
+            "bias_node_id": bias_id
+        }
+
+    def summary_frame(self) -> pd.DataFrame:
+        """Зведення всіх геномів лише з колонок summary_* (гени не перетворюються на словники)."""
+        columns = self.arrays
+        if not all('summary_' + field in columns for field in SUMMARY_FIELDS):
+            # Архів без колонок зведення - рахуємо їх з колонок генів
+            columns = NEATBinarySerializer.summary_columns(self.arrays, self.layouts)
+        species_ids = np.asarray(self.arrays['genome_species_ids'])
+        frame = pd.DataFrame({"genome_id": self.genome_ids.astype(np.int64),
+                              "fitness": np.asarray(self.arrays['genome_fitness'])})
+        for field in SUMMARY_FIELDS:
+            frame[field] = np.asarray(columns['summary_' + field])
+        frame["species_id"] = np.where(species_ids == NEATBinarySerializer.NO_SPECIES, None, species_ids)
+        return frame
+
+
+def summarize_genome_data(genome_data: Dict) -> Dict:
+    """Рядок зведення для словника геному JSON (блок "summary" був у частині старих збережень)."""
+    summary = genome_data.get("summary")
+    if summary is None:
+        genome = NEATJSONSerializer.deserialize_genome(genome_data, {}, Genome, NodeGene, ConnectionGene, InnovationManager())
+        summary = genome.summary()
+    return {"genome_id": int(genome_data["id"]), "fitness": genome_data.get("fitness", 0), **summary}
+
 
 class NEATDataAnalyzer:
-    """Клас для аналізу та візуалізації даних NEAT з JSON файлів."""
+    """Клас для аналізу та візуалізації даних NEAT з JSON файлів та двійкових збережень (.neatb)."""
     
-    def __init__(self, json_filepath: str):
-        """Завантажує дані з JSON файлу."""
-        with open(json_filepath, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+    def __init__(self, filepath: str):
+        """
+        Завантажує дані з JSON файлу або двійкового збереження.
+        Двійкове збереження без стиснення відображається в пам'ять: у пам'ять
+        завантажується лише документ стану, геноми - за запитом (див. GenomeTable).
+        """
+        self.genome_table: Optional[GenomeTable] = None
+        self._genome_summaries: Optional[pd.DataFrame] = None
+        if NEATBinarySerializer.is_binary_checkpoint(filepath):
+            self.data, arrays = NEATBinarySerializer.read_checkpoint(filepath, memory_map=True)
+            self.genome_table = GenomeTable(arrays, self.data.get("genome_layouts", []))
+            self.all_genomes = self.genome_table
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+            self.all_genomes = self.data.get("all_genomes", {})
         
         self.metadata = self.data.get("metadata", {})
-        self.generation_history = self.data.get("generation_history", [])
-        self.all_genomes = self.data.get("all_genomes", {})
+        self.generation_history = self._load_generation_history()
         self.config = self.data.get("config", {})
     
+    def _load_generation_history(self) -> List[Dict]:
+        """
+        Історія поколінь. Збереження містить лише вікно останніх поколінь; якщо поруч
+        є журнал запуску з повною історією - вона читається з нього.
+        """
+        history = self.data.get("generation_history", [])
+        run_log_path = self.metadata.get("run_log")
+        total_generations = self.metadata.get("total_generations") or 0
+        if run_log_path and total_generations > len(history) and os.path.exists(run_log_path):
+            generation_saved = self.metadata.get("generation_saved")
+            logged = [record for record in RunLog.read_records(run_log_path)
+                      if generation_saved is None or record.get("generation", 0) <= generation_saved]
+            if len(logged) > len(history):
+                return logged
+        return history
+    
+    def get_genome_summaries(self) -> pd.DataFrame:
+        """
+        Зведення геномів (genome_id, fitness, num_nodes, num_hidden, num_connections,
+        num_enabled, depth, structural_hash, species_id). Для двійкових збережень - з колонок
+        summary_*, що записуються при збереженні, без обходу вузлів і з'єднань.
+        """
+        if self._genome_summaries is None:
+            if self.genome_table is not None:
+                self._genome_summaries = self.genome_table.summary_frame()
+            else:
+                self._genome_summaries = pd.DataFrame(
+                    [summarize_genome_data(genome_data) for genome_data in self.all_genomes.values()],
+                    columns=["genome_id", "fitness", *SUMMARY_FIELDS, "species_id"])
+            self._genome_summaries["species_id"] = self._genome_summaries["species_id"].astype("Int64")
+        return self._genome_summaries
+    
+    def get_genome(self, genome_id: int) -> Optional[Dict]:
+        """Словник одного геному (для двійкових збережень - матеріалізується лише він)."""
+        return self.all_genomes.get(str(genome_id))
+    
     def get_basic_info(self) -> Dict:
         """Повертає базову інформацію про збережені дані."""
         return {
@@ -91,23 +226,14 @@ class NEATDataAnalyzer:
     
     def get_genome_complexity_evolution(self) -> pd.DataFrame:
         """Аналізує еволюцію складності геномів."""
-        complexity_data = []
-        
-        for genome_id, genome_data in self.all_genomes.items():
-            num_nodes = len(genome_data.get("nodes", {}))
-            num_connections = len(genome_data.get("connections", {}))
-            enabled_connections = sum(1 for conn in genome_data.get("connections", {}).values() 
-                                    if conn.get("enabled", False))
-            
-            complexity_data.append({
-                "genome_id": int(genome_id),
-                "num_nodes": num_nodes,
-                "num_connections": num_connections,
-                "enabled_connections": enabled_connections,
-                "fitness": genome_data.get("fitness", 0)
-            })
-        
-        return pd.DataFrame(complexity_data)
+        summaries = self.get_genome_summaries()
+        return pd.DataFrame({
+            "genome_id": summaries["genome_id"],
+            "num_nodes": summaries["num_nodes"],
+            "num_connections": summaries["num_connections"],
+            "enabled_connections": summaries["num_enabled"],
+            "fitness": summaries["fitness"]
+        })
     
     def plot_complexity_vs_fitness(self, save_path: Optional[str] = None):
         """Малює залежність між складністю мережі та фітнесом."""
@@ -137,20 +263,21 @@ class NEATDataAnalyzer:
     def get_best_genomes_per_generation(self) -> List[Dict]:
         """Повертає найкращі геноми для кожного покоління."""
         best_genomes = []
+        summaries = self.get_genome_summaries().set_index("genome_id")
         
         for gen_data in self.generation_history:
             gen_num = gen_data.get("generation", 0)
             max_fitness = gen_data.get("max_fitness")
             best_genome_id = gen_data.get("best_genome_current_gen_id")
             
-            if best_genome_id and str(best_genome_id) in self.all_genomes:
-                genome_data = self.all_genomes[str(best_genome_id)]
+            if best_genome_id and best_genome_id in summaries.index:
+                summary = summaries.loc[best_genome_id]
                 best_genomes.append({
                     "generation": gen_num,
                     "genome_id": best_genome_id,
                     "fitness": max_fitness,
-                    "num_nodes": len(genome_data.get("nodes", {})),
-                    "num_connections": len(genome_data.get("connections", {}))
+                    "num_nodes": int(summary["num_nodes"]),
+                    "num_connections": int(summary["num_connections"])
                 })
         
         return best_genomes
@@ -198,6 +325,9 @@ class NEATDataAnalyzer:
         complexity_df = self.get_genome_complexity_evolution()
         complexity_df.to_csv(os.path.join(output_dir, "genome_complexity.csv"), index=False)
         
+        # Експортуємо зведення геномів
+        self.get_genome_summaries().to_csv(os.path.join(output_dir, "genome_summaries.csv"), index=False)
+        
         # Експортуємо найкращі геноми
         best_genomes_df = pd.DataFrame(self.get_best_genomes_per_generation())
         best_genomes_df.to_csv(os.path.join(output_dir, "best_genomes.csv"), index=False)
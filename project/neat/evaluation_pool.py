@@ -0,0 +1,55 @@
+# neat/evaluation_pool.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from .log import get_logger, configure_logging, get_log_level
+
+logger = get_logger(__name__)
+
+class EvaluationPool:
+    """
+    Довгоживучий пул процесів для оцінки геномів.
+
+    Створюється один раз і використовується між поколіннями, тож запуск
+    процесів та імпорт модулів у воркерах відбуваються лише при start()
+    (або після resize()), а не на кожному run_generation.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> ProcessPoolExecutor:
+        """Запускає пул (якщо ще не запущений) і повертає executor."""
+        if self._executor is None:
+            logger.info("Starting evaluation pool with %s worker processes...", self.num_workers)
+            # Воркери отримують той самий рівень логування, що й головний процес (важливо для spawn)
+            self._executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=configure_logging,
+                                                 initargs=(get_log_level(),))
+        return self._executor
+
+    def resize(self, num_workers: int):
+        """Змінює кількість воркерів. Працюючий пул перезапускається з новим розміром."""
+        num_workers = num_workers or os.cpu_count() or 1
+        if num_workers == self.num_workers:
+            return
+        was_running = self.is_running
+        self.shutdown()
+        self.num_workers = num_workers
+        if was_running:
+            self.start()
+
+    def shutdown(self, wait: bool = True):
+        """Зупиняє воркери. Наступний start() створить новий пул."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def __repr__(self) -> str:
+        return f"EvaluationPool(workers={self.num_workers}, running={self.is_running})"
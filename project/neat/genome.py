@@ -1,13 +1,17 @@
 # neat/genome.py
 
+import logging
 import random
 import math
 import copy # Імпортуємо модуль copy для глибокого копіювання
+import hashlib
 from typing import Optional, Dict, List, Tuple # Додаємо типізацію
+import numpy as np
 
 # Імпортуємо InnovationManager (переконайтесь, що він доступний)
 try:
     from .innovation import InnovationManager
+    from .topology import TopologicalOrder
 except ImportError:
     # Якщо запускаємо файл окремо, може виникнути помилка імпорту
     print("Warning: Could not import InnovationManager. Assuming it's defined elsewhere for standalone run.")
@@ -15,6 +19,9 @@ except ImportError:
         def get_connection_innovation(self, *args): return 0
         def register_node_addition(self, *args): return (0, 0, 0)
 
+# Логер пакета neat (див. neat/log.py); напряму через logging, щоб працював і автономний запуск
+logger = logging.getLogger(__name__)
+
 # --- Константи та Допоміжні Функції ---
 
 NODE_TYPES = ["INPUT", "OUTPUT", "HIDDEN", "BIAS"]
@@ -43,11 +50,31 @@ ACTIVATION_FUNCTIONS = {
 }
 # Функція активації за замовчуванням для нових вузлів
 DEFAULT_ACTIVATION = "sigmoid"
+# Числові коди функцій активації для колонкового представлення (див. Genome.to_arrays)
+ACTIVATION_NAMES = list(ACTIVATION_FUNCTIONS)
+
+def hash_structure(layout: tuple, node_ids, node_types, node_activations, enabled_in, enabled_out) -> int:
+    """
+    Хеш структури геному, стабільний між процесами. Хешуються ті самі дані, що й у
+    Genome.structural_key, як масиви int64: розкладка (входи, виходи, біас), вузли (id, код
+    типу, код активації) та кінці увімкнених з'єднань у порядку генів. Масиви можна
+    передавати зрізами колонок to_arrays (див. NEATBinarySerializer.summary_columns).
+    """
+    input_ids, output_ids, bias_id = layout
+    header = np.array([len(input_ids), len(output_ids), -1 if bias_id is None else bias_id,
+                       len(node_ids), len(enabled_in), *input_ids, *output_ids], dtype=np.int64)
+    digest = hashlib.blake2b(header.tobytes(), digest_size=8)
+    for column in (node_ids, node_types, node_activations, enabled_in, enabled_out):
+        digest.update(np.ascontiguousarray(column, dtype=np.int64))
+    return int.from_bytes(digest.digest(), 'little') >> 1 # 63 біти - вміщується в int64
 
 # --- Класи Генів ---
 
 class NodeGene:
     """Представляє ген вузла (нейрона) в геномі."""
+    # Без __dict__: популяція містить сотні тисяч генів
+    __slots__ = ('id', 'type', 'bias', 'activation_function_name', 'activation_function')
+
     def __init__(self, node_id: int, node_type: str, bias: Optional[float] = None, activation_func: str = DEFAULT_ACTIVATION):
         self.id = int(node_id)
         node_type_upper = node_type.upper()
@@ -65,25 +92,48 @@ class NodeGene:
         else:
             func_name = activation_func if activation_func in ACTIVATION_FUNCTIONS else DEFAULT_ACTIVATION
             if activation_func not in ACTIVATION_FUNCTIONS:
-                 print(f"Warning: Unsupported activation '{activation_func}'. Using default '{DEFAULT_ACTIVATION}'.")
+                 logger.warning("Unsupported activation '%s'. Using default '%s'.", activation_func, DEFAULT_ACTIVATION)
             self.activation_function_name = func_name
             self.activation_function = ACTIVATION_FUNCTIONS[func_name]
 
-        # Тимчасові сховища для активації мережі (для nn.py)
-        self.output_value: float = 0.0
-        self._input_sum: float = 0.0
-
     def __repr__(self) -> str:
         """Рядкове представлення гена вузла."""
         return (f"NodeGene(id={self.id}, type={self.type}, "
                 f"bias={self.bias:.3f}, act='{self.activation_function_name}')")
 
     def copy(self) -> 'NodeGene':
-        """Створює копію гена вузла."""
-        return NodeGene(self.id, self.type, self.bias, self.activation_function_name)
+        """Створює копію гена вузла (без повторної перевірки типу та пошуку функції активації)."""
+        new_node = NodeGene.__new__(NodeGene)
+        new_node.id = self.id
+        new_node.type = self.type
+        new_node.bias = self.bias
+        new_node.activation_function_name = self.activation_function_name
+        new_node.activation_function = self.activation_function
+        return new_node
+
+    def to_dict(self) -> dict:
+        """Словник полів гена (без об'єкта функції активації)."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "bias": self.bias,
+            "activation_function_name": self.activation_function_name,
+        }
+
+    def __getstate__(self):
+        # Функцію активації не пікуємо - вона відновлюється за назвою
+        return (self.id, self.type, self.bias, self.activation_function_name)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict): # Старі збереження (до __slots__)
+            state = (state['id'], state['type'], state['bias'], state['activation_function_name'])
+        self.id, self.type, self.bias, self.activation_function_name = state
+        self.activation_function = ACTIVATION_FUNCTIONS.get(self.activation_function_name, linear)
 
 class ConnectionGene:
     """Представляє ген з'єднання (вагу) в геномі."""
+    __slots__ = ('in_node_id', 'out_node_id', 'weight', 'enabled', 'innovation')
+
     def __init__(self, in_node_id: int, out_node_id: int, weight: float, enabled: bool, innovation_num: int):
         self.in_node_id = int(in_node_id)
         self.out_node_id = int(out_node_id)
@@ -99,7 +149,31 @@ class ConnectionGene:
 
     def copy(self) -> 'ConnectionGene':
         """Створює копію гена з'єднання."""
-        return ConnectionGene(self.in_node_id, self.out_node_id, self.weight, self.enabled, self.innovation)
+        new_conn = ConnectionGene.__new__(ConnectionGene)
+        new_conn.in_node_id = self.in_node_id
+        new_conn.out_node_id = self.out_node_id
+        new_conn.weight = self.weight
+        new_conn.enabled = self.enabled
+        new_conn.innovation = self.innovation
+        return new_conn
+
+    def to_dict(self) -> dict:
+        """Словник полів гена."""
+        return {
+            "in_node_id": self.in_node_id,
+            "out_node_id": self.out_node_id,
+            "weight": self.weight,
+            "enabled": self.enabled,
+            "innovation": self.innovation,
+        }
+
+    def __getstate__(self):
+        return (self.in_node_id, self.out_node_id, self.weight, self.enabled, self.innovation)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict): # Старі збереження (до __slots__)
+            state = (state['in_node_id'], state['out_node_id'], state['weight'], state['enabled'], state['innovation'])
+        self.in_node_id, self.out_node_id, self.weight, self.enabled, self.innovation = state
 
 # --- Клас Геному ---
 
@@ -107,6 +181,11 @@ class Genome:
     """
     Представляє повний геном (нейронну мережу).
     Містить вузли та з'єднання, а також методи для мутації та кросоверу.
+
+    Робоче представлення - словники генів (nodes, connections): на них працюють
+    мутації, кросовер, distance та copy, а також індекс пар, топологічний порядок
+    і структурний ключ. Колонкові масиви (to_arrays) - лише формат передачі
+    та зберігання (пікування, двійкові збереження, векторизовані споживачі).
     """
     def __init__(self, genome_id: int, num_inputs: int, num_outputs: int, config: dict, innovation_manager: InnovationManager): # Додано innovation_manager
         """
@@ -122,6 +201,17 @@ class Genome:
         self.fitness: float = 0.0       # Нескоригована пристосованість
         self.adjusted_fitness: float = 0.0 # Пристосованість після fitness sharing
         self.species_id: Optional[int] = None   # ID виду
+        # Кеш з'єднань, відсортованих за інновацією (див. get_sorted_connections)
+        self._sorted_connections: Optional[List[ConnectionGene]] = None
+        # Індекс пар (in_node_id, out_node_id) усіх з'єднань (див. get_edge_index)
+        self._edge_index: Optional[set] = None
+        self._edge_index_size = 0
+        # Інкрементальний топологічний порядок усіх генів з'єднань (див. get_topology)
+        self._topology: Optional[TopologicalOrder] = None
+        # Кеш порядку обчислення вузлів (к-сть з'єднань, порядок) - заповнює nn.determine_evaluation_order
+        self._evaluation_order: Optional[Tuple[int, List[int]]] = None
+        # Кеш структурного ключа ((к-сть з'єднань, к-сть вузлів), ключ) - див. structural_key
+        self._structural_key: Optional[tuple] = None
 
         node_counter = 0 # Лічильник для початкових ID
 
@@ -136,7 +226,6 @@ class Genome:
         # Створюємо біас-вузол
         self._bias_node_id = node_counter
         self.nodes[self._bias_node_id] = NodeGene(self._bias_node_id, "BIAS", bias=0.0, activation_func='linear')
-        self.nodes[self._bias_node_id].output_value = 1.0 # Вихід біасу завжди 1.0
         node_counter += 1
 
         # Створюємо вихідні вузли
@@ -170,14 +259,14 @@ class Genome:
     def copy(self) -> 'Genome':
         """Створює глибоку копію цього геному."""
         # !!! ВАЖЛИВО: При копіюванні innovation_manager НЕ копіюється, використовується той самий конфіг !!!
-        # Створюємо новий екземпляр, використовуючи ID та конфіг оригіналу
-        # num_inputs/outputs тут не важливі, бо ми перезапишемо списки ID
-        new_genome = Genome(self.id, 0, 0, self.config, InnovationManager())
-        new_genome.id = self.id # Відновлюємо ID (або генеруємо новий в neat_algorithm)
-        # Копіюємо основні атрибути
-        new_genome.fitness = self.fitness
-        new_genome.adjusted_fitness = self.adjusted_fitness
-        new_genome.species_id = self.species_id
+        # Оминаємо __init__ (він будує початкову структуру, яку все одно довелося б викинути):
+        # скалярні атрибути (id, config, fitness, species_id, ...) переносяться напряму
+        new_genome = Genome.__new__(Genome)
+        new_genome.__dict__.update(self.__dict__)
+        new_genome._sorted_connections = None # Кеш посилається на гени оригіналу
+        new_genome._edge_index = None
+        new_genome._topology = None
+        # _evaluation_order та _structural_key спільні: структура копії та оригіналу однакова, а вони не змінюються
         # Копіюємо списки ID (вони містять лише числа)
         new_genome._input_node_ids = list(self._input_node_ids)
         new_genome._output_node_ids = list(self._output_node_ids)
@@ -196,13 +285,151 @@ class Genome:
             # print(f"Warning: Node {node_gene.id} already exists in genome {self.id}. Overwriting.")
             pass
         self.nodes[node_gene.id] = node_gene
+        topology = getattr(self, '_topology', None)
+        if topology is not None:
+            topology.add_node(node_gene.id)
 
     def add_connection(self, conn_gene: ConnectionGene):
         """Додає ConnectionGene до геному (з можливою заміною)."""
-        if conn_gene.innovation in self.connections:
-            # print(f"Warning: Connection {conn_gene.innovation} already exists in genome {self.id}. Overwriting.")
-            pass
+        replaced = self.connections.get(conn_gene.innovation)
         self.connections[conn_gene.innovation] = conn_gene
+        self._sorted_connections = None # Структура змінилась
+        self._evaluation_order = None
+        self._structural_key = None
+        pair = (conn_gene.in_node_id, conn_gene.out_node_id)
+        if replaced is not None:
+            if (replaced.in_node_id, replaced.out_node_id) != pair: # Заміна гена могла прибрати пару з індексів
+                self._edge_index = None
+                self._topology = None
+            return
+        edge_index = getattr(self, '_edge_index', None)
+        if edge_index is not None:
+            edge_index.add(pair)
+            self._edge_index_size += 1
+        topology = getattr(self, '_topology', None)
+        if topology is not None:
+            topology.add_edge(*pair)
+
+    def invalidate_caches(self):
+        """Скидає кешовані похідні структури після прямої зміни self.connections."""
+        self._sorted_connections = None
+        self._edge_index = None
+        self._topology = None
+        self._evaluation_order = None
+        self._structural_key = None
+
+    def get_topology(self) -> TopologicalOrder:
+        """
+        Топологічний порядок графа всіх генів з'єднань. Підтримується add_node/add_connection;
+        перебудовується, якщо словник з'єднань змінили напряму (інша кількість з'єднань).
+        """
+        topology = getattr(self, '_topology', None)
+        if topology is None or topology.num_edges != len(self.connections):
+            topology = TopologicalOrder(self.nodes, ((c.in_node_id, c.out_node_id) for c in self.connections.values()))
+            self._topology = topology
+        return topology
+
+    def creates_cycle(self, in_node_id: int, out_node_id: int) -> bool:
+        """Чи утворить нове з'єднання in_node_id -> out_node_id цикл у графі генів."""
+        if in_node_id == out_node_id:
+            return True
+        # Входи/біас не мають вхідних з'єднань, а виходи - вихідних: такі ребра цикл не замкнуть,
+        # і порядок навіть не потрібно будувати
+        in_node = self.nodes.get(in_node_id)
+        out_node = self.nodes.get(out_node_id)
+        if (in_node is not None and in_node.type in ("INPUT", "BIAS")) or (out_node is not None and out_node.type == "OUTPUT"):
+            return False
+        return self.get_topology().creates_cycle(in_node_id, out_node_id)
+
+    def get_edge_index(self) -> set:
+        """
+        Множина пар (in_node_id, out_node_id) всіх з'єднань (увімкнених і вимкнених).
+        Оновлюється в add_connection; як і get_sorted_connections, перебудовується,
+        якщо словник з'єднань змінили напряму (інша кількість з'єднань).
+        """
+        edge_index = getattr(self, '_edge_index', None)
+        if edge_index is None or self._edge_index_size != len(self.connections):
+            edge_index = {(c.in_node_id, c.out_node_id) for c in self.connections.values()}
+            self._edge_index = edge_index
+            self._edge_index_size = len(self.connections)
+        return edge_index
+
+    def get_sorted_connections(self) -> List[ConnectionGene]:
+        """
+        Повертає з'єднання, відсортовані за інноваційним номером.
+        Список кешується і перебудовується лише після структурної зміни
+        (add_connection або зміна кількості з'єднань при прямій роботі зі словником).
+        Ваги читаються з тих самих об'єктів генів, тож мутація ваг кеш не інвалідує.
+        """
+        cached = getattr(self, '_sorted_connections', None)
+        if cached is None or len(cached) != len(self.connections):
+            cached = sorted(self.connections.values(), key=lambda c: c.innovation)
+            self._sorted_connections = cached
+        return cached
+
+    def structural_key(self) -> tuple:
+        """
+        Ключ структури фенотипу: вузли (id, тип, активація), входи/виходи/біас та увімкнені
+        з'єднання (in, out) - у порядку генів геному, бо від нього залежить порядок сумування
+        в скомпільованій мережі. Геноми з однаковим ключем відрізняються лише вагами та біасами.
+        """
+        sizes = (len(self.connections), len(self.nodes))
+        cached = getattr(self, '_structural_key', None)
+        if cached is not None and cached[0] == sizes:
+            return cached[1]
+        key = (
+            tuple(self._input_node_ids), tuple(self._output_node_ids), self._bias_node_id,
+            tuple((n.id, n.type, n.activation_function_name) for n in self.nodes.values()),
+            tuple((c.in_node_id, c.out_node_id) for c in self.connections.values() if c.enabled),
+        )
+        self._structural_key = (sizes, key)
+        return key
+
+    def structural_hash(self) -> int:
+        """
+        Хеш структури (однаковий для геномів з однаковим structural_key) - див. hash_structure.
+        Не залежить від процесу (на відміну від hash() рядків), тож його можна зберігати у файлах.
+        """
+        nodes = self.nodes.values()
+        enabled = [c for c in self.connections.values() if c.enabled]
+        return hash_structure((self._input_node_ids, self._output_node_ids, self._bias_node_id),
+                              [n.id for n in nodes], [NODE_TYPES.index(n.type) for n in nodes],
+                              [ACTIVATION_NAMES.index(n.activation_function_name) for n in nodes],
+                              [c.in_node_id for c in enabled], [c.out_node_id for c in enabled])
+
+    def depth(self) -> int:
+        """
+        Глибина мережі: найбільша кількість увімкнених з'єднань на шляху від входу до виходу.
+        Шляхи через цикли (рекурентний режим) не враховуються.
+        """
+        successors: Dict[int, List[int]] = {node_id: [] for node_id in self.nodes}
+        in_degree = {node_id: 0 for node_id in self.nodes}
+        for conn in self.connections.values():
+            if conn.enabled and conn.in_node_id in successors and conn.out_node_id in in_degree:
+                successors[conn.in_node_id].append(conn.out_node_id)
+                in_degree[conn.out_node_id] += 1
+        level = {node_id: 0 for node_id in self.nodes}
+        queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        while queue:
+            node_id = queue.pop()
+            for succ in successors[node_id]:
+                level[succ] = max(level[succ], level[node_id] + 1)
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+        return max((level[node_id] for node_id in self._output_node_ids if node_id in level), default=0)
+
+    def summary(self) -> Dict:
+        """Зведені характеристики геному для аналізу без читання генів (зберігаються разом з геномом)."""
+        return {
+            "num_nodes": len(self.nodes),
+            "num_hidden": sum(1 for n in self.nodes.values() if n.type == "HIDDEN"),
+            "num_connections": len(self.connections),
+            "num_enabled": sum(1 for c in self.connections.values() if c.enabled),
+            "depth": self.depth(),
+            "structural_hash": self.structural_hash(),
+            "species_id": self.species_id
+        }
 
     # --- Методи доступу ---
     def get_node_ids(self) -> List[int]:
@@ -255,38 +482,41 @@ class Genome:
         if not possible_starts or not possible_ends:
             return False # Немає можливих кінців/початків
 
+        edge_index = self.get_edge_index()
+        # FEED_FORWARD = False дозволяє рекурентні з'єднання (цикли та петлі) - див. nn.RecurrentNetwork
+        feed_forward = self.config.get('FEED_FORWARD', True)
         for _ in range(max_attempts):
             start_node_id = random.choice(possible_starts)
             end_node_id = random.choice(possible_ends)
-
-            # Перевірка на недопустимі з'єднання
-            if start_node_id == end_node_id: continue # Петля на себе
-            # TODO: Додати перевірку на цикли, якщо мережа має бути строго FF
-
-            connection_exists = False
-            reverse_connection_exists = False # Для FF
-            for conn in self.connections.values():
-                if conn.in_node_id == start_node_id and conn.out_node_id == end_node_id:
-                    connection_exists = True
-                    break
-                # Для строго FF, забороняємо і зворотне з'єднання
-                if conn.in_node_id == end_node_id and conn.out_node_id == start_node_id:
-                    reverse_connection_exists = True
-                    # break # Можна зупинитись, якщо знайдено зворотне
-
-            # Не додаємо, якщо пряме існує, або якщо зворотне існує (для FF)
-            if connection_exists or reverse_connection_exists:
-                 continue
-
-            # Додаємо нове з'єднання
-            weight_init_range = self.config.get('WEIGHT_INIT_RANGE', 1.0)
-            weight = random.uniform(-weight_init_range, weight_init_range)
-            innov = innovation_manager.get_connection_innovation(start_node_id, end_node_id)
-            new_conn = ConnectionGene(start_node_id, end_node_id, weight, True, innov)
-            self.add_connection(new_conn)
-            return True # Успішно додали
-
-        return False # Не вдалося знайти місце для нового з'єднання
+            if self._is_allowed_new_connection(start_node_id, end_node_id, edge_index, feed_forward):
+                self._add_new_connection(start_node_id, end_node_id, innovation_manager)
+                return True # Успішно додали
+
+        # Випадкові спроби не вдалися (щільний геном): вибираємо серед усіх ще вільних пар
+        free_pairs = [(start_node_id, end_node_id) for start_node_id in possible_starts for end_node_id in possible_ends
+                      if self._is_allowed_new_connection(start_node_id, end_node_id, edge_index, feed_forward)]
+        if not free_pairs:
+            return False # Не залишилось місця для нового з'єднання
+        self._add_new_connection(*random.choice(free_pairs), innovation_manager)
+        return True
+
+    def _is_allowed_new_connection(self, start_node_id: int, end_node_id: int, edge_index: set, feed_forward: bool) -> bool:
+        """Чи можна додати з'єднання start -> end: без дублікатів, а для мереж прямого поширення - без циклів."""
+        if (start_node_id, end_node_id) in edge_index:
+            return False
+        if not feed_forward:
+            return True
+        # Петля на себе, зворотне з'єднання або шлях назад замкнуть цикл (мережа строго FF)
+        if start_node_id == end_node_id or (end_node_id, start_node_id) in edge_index:
+            return False
+        return not self.creates_cycle(start_node_id, end_node_id)
+
+    def _add_new_connection(self, start_node_id: int, end_node_id: int, innovation_manager: InnovationManager):
+        """Створює нове увімкнене з'єднання з випадковою вагою та додає його до геному."""
+        weight_init_range = self.config.get('WEIGHT_INIT_RANGE', 1.0)
+        weight = random.uniform(-weight_init_range, weight_init_range)
+        innov = innovation_manager.get_connection_innovation(start_node_id, end_node_id)
+        self.add_connection(ConnectionGene(start_node_id, end_node_id, weight, True, innov))
 
     def mutate_add_node(self, innovation_manager: InnovationManager) -> bool:
         """Намагається додати новий вузол, розділивши існуюче увімкнене з'єднання."""
@@ -307,6 +537,16 @@ class Genome:
         )
         new_node_id, innov1, innov2 = innovation_data
 
+        # Вузол цього розділення вже є в геномі (успадкований без частини своїх з'єднань):
+        # його повторне використання не повинно замкнути цикл
+        if new_node_id in self.nodes and self.config.get('FEED_FORWARD', True):
+            in_id, out_id = conn_to_split.in_node_id, conn_to_split.out_node_id
+            edge_index = self.get_edge_index()
+            if ((in_id, new_node_id) not in edge_index and self.creates_cycle(in_id, new_node_id)) or \
+               ((new_node_id, out_id) not in edge_index and self.creates_cycle(new_node_id, out_id)):
+                conn_to_split.enabled = True
+                return False
+
         # Створюємо новий прихований вузол (якщо ще не існує)
         if new_node_id not in self.nodes:
              # Новий біас може бути 0 або успадкований/випадковий
@@ -416,14 +656,16 @@ class Genome:
             child.add_connection(chosen_conn)
         
         # 4.2: Disjoint та Excess гени - від більш пристосованого батька
+        # Matching гени є в обох (ациклічних) батьків, а гени іншого батька можуть замкнути цикл -
+        # такі гени нащадок не успадковує
         if g1_is_fitter:
             # Якщо перший батько кращий, беремо його disjoint та excess гени
             for innov in disjoint1.union(excess1):
-                child.add_connection(genome1.connections[innov].copy())
+                child._add_inherited_connection(genome1.connections[innov])
         else:
             # Якщо другий батько кращий, беремо його disjoint та excess гени
             for innov in disjoint2.union(excess2):
-                child.add_connection(genome2.connections[innov].copy())
+                child._add_inherited_connection(genome2.connections[innov])
         
         # 4.3: Особливий випадок - однаковий фітнес
         # Згідно з NEAT paper, при однаковому фітнесі disjoint/excess 
@@ -436,9 +678,9 @@ class Genome:
             for innov in all_disjoint_excess:
                 if random.random() < 0.5:  # 50% шанс включення
                     if innov in genome1.connections:
-                        child.add_connection(genome1.connections[innov].copy())
+                        child._add_inherited_connection(genome1.connections[innov])
                     elif innov in genome2.connections:
-                        child.add_connection(genome2.connections[innov].copy())
+                        child._add_inherited_connection(genome2.connections[innov])
         
         # КРОК 5: Додаємо приховані вузли, які використовуються в успадкованих з'єднаннях
         required_nodes = set()
@@ -473,6 +715,16 @@ class Genome:
         
         return child
 
+    def _add_inherited_connection(self, conn_gene: ConnectionGene):
+        """
+        Додає копію гена батька. У мережах прямого поширення ген, що замикає цикл, пропускається
+        (повторне додавання того ж гена дозволене).
+        """
+        if conn_gene.innovation not in self.connections and self.config.get('FEED_FORWARD', True) \
+                and self.creates_cycle(conn_gene.in_node_id, conn_gene.out_node_id):
+            return
+        self.add_connection(conn_gene.copy())
+
     # --- Метод розрахунку відстані ---
     def distance(self, other_genome: 'Genome', c1: float, c2: float, c3: float) -> float:
         """Обчислює генетичну відстань між цим геномом та іншим."""
@@ -494,26 +746,24 @@ class Genome:
                     weight_diff_sum += abs(conn1.weight - conn2.weight)
                     matching_count += 1
                 else: # Цього не повинно статися, якщо innovs1 == innovs2
-                    print(f"Warning: Inconsistency in matching genes despite equal innovation sets (innov={innov})")
+                    logger.warning("Inconsistency in matching genes despite equal innovation sets (innov=%s)", innov)
 
             avg_weight_diff = (weight_diff_sum / matching_count) if matching_count > 0 else 0.0
             # Відстань = тільки компонент ваги
-            distance = c3 * avg_weight_diff
-            print(f"DEBUG (Identical Structure): dist = {c3} * {avg_weight_diff:.4f} = {distance:.4f}") # Debug
-            return distance
+            return c3 * avg_weight_diff
         # --- КІНЕЦЬ СПРОЩЕННЯ ---
 
         # --- Стандартний розрахунок для різних структур ---
-        max_innov1 = max(innovs1) if innovs1 else 0
-        max_innov2 = max(innovs2) if innovs2 else 0
+        conns1_sorted = self.get_sorted_connections()
+        conns2_sorted = other_genome.get_sorted_connections()
+        max_innov1 = conns1_sorted[-1].innovation if conns1_sorted else 0
+        max_innov2 = conns2_sorted[-1].innovation if conns2_sorted else 0
 
         matching_count = 0
         weight_diff_sum = 0.0
         disjoint_count = 0
         excess_count = 0
 
-        conns1_sorted = sorted(self.connections.values(), key=lambda c: c.innovation)
-        conns2_sorted = sorted(other_genome.connections.values(), key=lambda c: c.innovation)
         idx1, idx2 = 0, 0
 
         while idx1 < len(conns1_sorted) or idx2 < len(conns2_sorted):
@@ -543,6 +793,65 @@ class Genome:
         distance = (c1 * excess_count / N) + (c2 * disjoint_count / N) + (c3 * avg_weight_diff)
         return distance
 
+    # --- Колонкове представлення ---
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Пакує гени в паралельні масиви NumPy (структура масивів) для передачі та зберігання.
+        Вузли - в порядку словника nodes, з'єднання - в порядку словника connections,
+        тож set_genes_from_arrays відтворює геном разом з порядком ітерації.
+        """
+        nodes = self.nodes.values()
+        conns = self.connections.values()
+        return {
+            'node_ids': np.fromiter((n.id for n in nodes), dtype=np.int64, count=len(self.nodes)),
+            'node_types': np.fromiter((NODE_TYPES.index(n.type) for n in nodes), dtype=np.int8, count=len(self.nodes)),
+            'node_biases': np.fromiter((n.bias for n in nodes), dtype=np.float64, count=len(self.nodes)),
+            'node_activations': np.fromiter((ACTIVATION_NAMES.index(n.activation_function_name) for n in nodes),
+                                            dtype=np.int8, count=len(self.nodes)),
+            'conn_innovations': np.fromiter((c.innovation for c in conns), dtype=np.int64, count=len(self.connections)),
+            'conn_in': np.fromiter((c.in_node_id for c in conns), dtype=np.int64, count=len(self.connections)),
+            'conn_out': np.fromiter((c.out_node_id for c in conns), dtype=np.int64, count=len(self.connections)),
+            'conn_weights': np.fromiter((c.weight for c in conns), dtype=np.float64, count=len(self.connections)),
+            'conn_enabled': np.fromiter((c.enabled for c in conns), dtype=np.bool_, count=len(self.connections)),
+        }
+
+    def set_genes_from_arrays(self, arrays: Dict[str, np.ndarray]):
+        """Замінює вузли та з'єднання геному генами з масивів to_arrays()."""
+        self.nodes = {}
+        for node_id, type_code, bias, act_code in zip(arrays['node_ids'].tolist(), arrays['node_types'].tolist(),
+                                                      arrays['node_biases'].tolist(), arrays['node_activations'].tolist()):
+            node = NodeGene.__new__(NodeGene)
+            node.__setstate__((node_id, NODE_TYPES[type_code], bias, ACTIVATION_NAMES[act_code]))
+            self.nodes[node_id] = node
+        self.connections = {}
+        for innov, in_id, out_id, weight, enabled in zip(arrays['conn_innovations'].tolist(), arrays['conn_in'].tolist(),
+                                                         arrays['conn_out'].tolist(), arrays['conn_weights'].tolist(),
+                                                         arrays['conn_enabled'].tolist()):
+            conn = ConnectionGene.__new__(ConnectionGene)
+            conn.__setstate__((in_id, out_id, weight, enabled, innov))
+            self.connections[innov] = conn
+        self.invalidate_caches()
+
+    def __getstate__(self):
+        # Гени пікуються масивами замість тисяч окремих об'єктів (швидше і компактніше для воркерів/збережень)
+        state = self.__dict__.copy()
+        state['_gene_arrays'] = self.to_arrays()
+        del state['nodes']
+        del state['connections']
+        state['_sorted_connections'] = None
+        state['_edge_index'] = None
+        state['_topology'] = None
+        return state
+
+    def __setstate__(self, state):
+        arrays = state.pop('_gene_arrays', None)
+        self.__dict__.update(state)
+        if arrays is not None:
+            self.set_genes_from_arrays(arrays)
+        # Порядок обчислення переживає пікування (set_genes_from_arrays скидає кеші); старі збереження його не мають
+        self._evaluation_order = state.get('_evaluation_order')
+        self._structural_key = state.get('_structural_key')
+
     # --- Магічні методи ---
     def __lt__(self, other: 'Genome') -> bool:
         """Дозволяє сортувати геноми за фітнесом (менше = гірше)."""
@@ -6,6 +6,9 @@ from typing import Dict, List, Any, Optional, Union
 import os
 
 from neat.genome import ConnectionGene, Genome, NodeGene
+from neat.log import get_logger
+
+logger = get_logger(__name__)
 
 class NEATJSONEncoder(json.JSONEncoder):
     """Спеціальний JSON encoder для NEAT об'єктів."""
@@ -110,6 +113,7 @@ class NEATJSONSerializer:
         for innov_str, conn_data in data["connections"].items():
             conn = NEATJSONSerializer.deserialize_connection_gene(conn_data, ConnectionGene)
             genome.connections[int(innov_str)] = conn
+        genome.invalidate_caches() # Словник з'єднань замінено напряму
         
         return genome
     
@@ -135,6 +139,7 @@ class NEATJSONSerializer:
             "average_fitness": stats.get("average_fitness"),
             "num_species": stats.get("num_species", len(species)), # Використовуємо дані з stats, якщо є
             "num_species_after_speciation": stats.get("num_species_after_speciation"),
+            "speciation_time": stats.get("speciation_time"),
             "best_genome_current_gen_id": None, # Буде заповнено нижче
             "best_genome_overall_id": None,     # Буде заповнено нижче
             "first_goal_achieved_generation": stats.get("first_goal_achieved_generation") # <--- ДОДАНО
@@ -159,9 +164,8 @@ class NEATJSONSerializer:
         return serialized_stats
     
     @staticmethod
-    def save_neat_state(filepath: str, neat_algorithm, config: dict):
-        """Зберігає повний стан NEAT алгоритму в JSON файл."""
-        # Збираємо всі унікальні геноми
+    def collect_genomes(neat_algorithm) -> Dict[int, Any]:
+        """Збирає всі унікальні геноми стану NEAT (популяція, види, найкращий, попередні представники)."""
         all_genomes = {}
         
         # Додаємо геноми з поточної популяції
@@ -185,8 +189,14 @@ class NEATJSONSerializer:
         for rep in neat_algorithm.species_representatives_prev_gen.values():
             if rep:
                 all_genomes[rep.id] = rep
-        
-        # Створюємо структуру даних
+        return all_genomes
+    
+    @staticmethod
+    def build_state_data(neat_algorithm, config: dict, all_genomes: Dict[int, Any], genomes_data) -> dict:
+        """
+        Створює структуру даних збереження. genomes_data - вміст розділу "all_genomes"
+        (словник серіалізованих геномів для JSON або None, якщо геноми зберігаються окремо).
+        """
         data = {
             "version": NEATJSONSerializer.VERSION,
             "metadata": {
@@ -194,17 +204,17 @@ class NEATJSONSerializer:
                 "generation_saved": neat_algorithm.generation,
                 "maze_seed": config.get("MAZE_SEED"),
                 "total_genomes": len(all_genomes),
-                "total_generations": len(neat_algorithm.generation_statistics)
+                "total_generations": neat_algorithm.generation_statistics.total_generations,
+                # Історія нижче - лише вікно останніх поколінь; підсумки - за весь запуск
+                "history_summary": neat_algorithm.generation_statistics.summary(),
+                "run_log": neat_algorithm.generation_statistics.run_log.filepath if neat_algorithm.generation_statistics.run_log else None
             },
             "config": config,
             "innovation_manager": {
                 "next_node_id": neat_algorithm.innovation_manager._next_node_id,
                 "next_innovation_num": neat_algorithm.innovation_manager._next_innovation_num
             },
-            "all_genomes": {
-                str(gid): NEATJSONSerializer.serialize_genome(genome)
-                for gid, genome in all_genomes.items()
-            },
+            "all_genomes": genomes_data,
             "generation_history": [
                 NEATJSONSerializer.serialize_generation_data(
                     stat_entry.get("generation", 0),
@@ -226,6 +236,18 @@ class NEATJSONSerializer:
                 "first_goal_achieved_generation": neat_algorithm.first_goal_achieved_generation # <--- ДОДАНО ДО ПОТОЧНОГО СТАНУ
             }
         }
+        if genomes_data is None:
+            del data["all_genomes"]
+        return data
+    
+    @staticmethod
+    def save_neat_state(filepath: str, neat_algorithm, config: dict):
+        """Зберігає повний стан NEAT алгоритму в JSON файл."""
+        all_genomes = NEATJSONSerializer.collect_genomes(neat_algorithm)
+        data = NEATJSONSerializer.build_state_data(neat_algorithm, config, all_genomes, {
+            str(gid): NEATJSONSerializer.serialize_genome(genome)
+            for gid, genome in all_genomes.items()
+        })
         
         # Зберігаємо у файл
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -237,9 +259,26 @@ class NEATJSONSerializer:
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
+        def build_genomes(innovation_manager) -> Dict[int, Any]:
+            all_genomes = {}
+            for gid_str, genome_data in data["all_genomes"].items():
+                genome = NEATJSONSerializer.deserialize_genome(
+                    genome_data, config, Genome, NodeGene, ConnectionGene, innovation_manager
+                )
+                all_genomes[int(gid_str)] = genome
+            return all_genomes
+        
+        return NEATJSONSerializer.restore_neat_state(data, config, NeatAlgorithm, Species, build_genomes)
+    
+    @staticmethod
+    def restore_neat_state(data: dict, config: dict, NeatAlgorithm, Species, build_genomes):
+        """
+        Відновлює NEAT алгоритм зі структури даних збереження.
+        build_genomes(innovation_manager) повертає словник {id: Genome} усіх збережених геномів.
+        """
         # Перевіряємо версію
         if data.get("version") != NEATJSONSerializer.VERSION:
-            print(f"Warning: JSON version mismatch. File: {data.get('version')}, Expected: {NEATJSONSerializer.VERSION}")
+            logger.warning("JSON version mismatch. File: %s, Expected: %s", data.get('version'), NEATJSONSerializer.VERSION)
         
         # Оновлюємо конфіг
         saved_config = data.get("config", {})
@@ -258,12 +297,7 @@ class NEATJSONSerializer:
         neat.innovation_manager._next_innovation_num = im_data["next_innovation_num"]
         
         # Відновлюємо всі геноми
-        all_genomes = {}
-        for gid_str, genome_data in data["all_genomes"].items():
-            genome = NEATJSONSerializer.deserialize_genome(
-                genome_data, config, Genome, NodeGene, ConnectionGene, neat.innovation_manager
-            )
-            all_genomes[int(gid_str)] = genome
+        all_genomes = build_genomes(neat.innovation_manager)
         
         # Відновлюємо поточний стан
         current_state = data["current_state"]
@@ -318,6 +352,7 @@ class NEATJSONSerializer:
                 "average_fitness": hist_entry_data.get("average_fitness"),
                 "num_species": hist_entry_data.get("num_species", 0),
                 "num_species_after_speciation": hist_entry_data.get("num_species_after_speciation"),
+                "speciation_time": hist_entry_data.get("speciation_time"),
                 "best_genome_current_gen": None,
                 "best_genome_overall": None,
                 "first_goal_achieved_generation": hist_entry_data.get("first_goal_achieved_generation") # <--- ЗАВАНТАЖУЄМО ДЛЯ ІСТОРІЇ
@@ -333,7 +368,10 @@ class NEATJSONSerializer:
             
             generation_history.append(stat_entry)
         
-        neat.generation_statistics = generation_history
+        neat.generation_statistics.extend(generation_history)
+        history_summary = data.get("metadata", {}).get("history_summary")
+        if history_summary:
+            neat.generation_statistics.restore_summary(history_summary)
         
         return neat
 
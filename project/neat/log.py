@@ -0,0 +1,54 @@
+# neat/log.py
+
+import logging
+import sys
+
+# Рівень нижче DEBUG для дуже частих подій (напр. кожен розрахунок відстані)
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+ROOT_LOGGER_NAME = "neat"
+# Кореневі логери пакетів застосунку, що налаштовує configure_logging
+APP_LOGGER_NAMES = (ROOT_LOGGER_NAME, "environment")
+
+class _ConsoleFormatter(logging.Formatter):
+    """INFO виводиться як звичайне повідомлення, решта рівнів - з префіксом рівня та модуля."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if record.levelno == logging.INFO:
+            return message
+        return f"{record.levelname} ({record.name}): {message}"
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Повертає логер модуля пакета neat або environment (використання: logger = get_logger(__name__)).
+
+    Повідомлення форматуються ліниво (logger.info("... %s", value)), тож вимкнений
+    рівень коштує лише перевірку рівня. Для гарячих шляхів з дорогими аргументами
+    використовуйте охорону: if logger.isEnabledFor(TRACE): logger.log(TRACE, ...).
+    """
+    return logging.getLogger(name)
+
+def configure_logging(level="INFO"):
+    """
+    Налаштовує вивід логерів neat.* та environment.* у stdout (як раніше робили print).
+    Викликається застосунком; повторний виклик лише змінює рівень.
+
+    Args:
+        level (str | int): Рівень логування ("TRACE", "DEBUG", "INFO", "WARNING", ...).
+    """
+    if isinstance(level, str):
+        level = TRACE if level.upper() == "TRACE" else logging.getLevelName(level.upper())
+    for name in APP_LOGGER_NAMES:
+        logger = logging.getLogger(name)
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(_ConsoleFormatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(level)
+
+def get_log_level() -> int:
+    """Поточний рівень логера neat (для передачі у процеси-воркери)."""
+    return logging.getLogger(ROOT_LOGGER_NAME).getEffectiveLevel()
@@ -5,13 +5,23 @@ import random
 import math
 import copy
 import itertools
-from concurrent.futures import ProcessPoolExecutor, as_completed # Додаємо імпорт
+import logging
+import time
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
 import os
 from typing import Optional # Для os.cpu_count
 
 from .genome import Genome
 from .innovation import InnovationManager
 from .species import Species
+from .evaluation_pool import EvaluationPool
+from .nn import create_network
+from .compatibility import PopulationEncoding, assign_species, pairwise_distances
+from .run_log import GenerationHistory, RunLog
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 class NeatAlgorithm:
     """
@@ -27,7 +37,8 @@ class NeatAlgorithm:
         self.num_inputs = num_inputs
         self.num_outputs = num_outputs
         self.species_representatives_prev_gen: dict[int, Genome] = {} # {species_id: representative_genome}
-        self.generation_statistics: list[dict] = [] # Для збереження історії
+        # Історія поколінь: обмежене вікно в пам'яті + журнал запуску на диску
+        self.generation_statistics = GenerationHistory(config.get('STATS_HISTORY_WINDOW'), RunLog.for_config(config))
         required_keys = [
             'POPULATION_SIZE', 'COMPATIBILITY_THRESHOLD', 'C1_EXCESS',
             'C2_DISJOINT', 'C3_WEIGHT', 'WEIGHT_MUTATE_RATE',
@@ -56,6 +67,8 @@ class NeatAlgorithm:
         self.generation = 0
         self.best_genome_overall = None
         self.first_goal_achieved_generation: Optional[int] = None # <--- НОВИЙ АТРИБУТ
+        # Пул процесів для оцінки, що живе між поколіннями (запускається при першій оцінці)
+        self.evaluation_pool = EvaluationPool(config.get('NUM_PROCESSES'))
 
         self._speciate_population()
         if not _is_loading:
@@ -87,7 +100,7 @@ class NeatAlgorithm:
             genome = Genome(genome_id, self.num_inputs, self.num_outputs, self.config, innovation_manager)
             population.append(genome)
         # Після створення всієї популяції, лічильник інновацій в менеджері буде актуальним
-        print(f"Initial population created. Next innovation number: {innovation_manager.innovation_counter}")
+        logger.info("Initial population created. Next innovation number: %s", innovation_manager.innovation_counter)
         return population
 
     def _get_next_genome_id(self) -> int: # Переконайтесь, що цей метод є
@@ -96,7 +109,7 @@ class NeatAlgorithm:
     
     def get_state_data(self) -> dict:
         """Збирає дані для збереження стану NEAT, забезпечуючи консистентність."""
-        print("DEBUG SAVE: Entered get_state_data.")
+        logger.debug("Save: Entered get_state_data.")
         
         # Збираємо всі унікальні геноми, на які є посилання
         relevant_genomes_map = {} # Використовуємо словник для унікальності за ID
@@ -128,7 +141,7 @@ class NeatAlgorithm:
         # Зберігаємо копії всіх цих релевантних геномів
         # Це гарантує, що всі ID, на які посилатимуться species_data та prev_gen_reps, будуть доступні при завантаженні
         all_referenced_genomes_copies = [g.copy() for g in relevant_genomes_map.values() if g]
-        print(f"DEBUG SAVE: Total unique relevant genomes to save in 'population_genomes': {len(all_referenced_genomes_copies)}")
+        logger.debug("Save: Total unique relevant genomes to save in 'population_genomes': %d", len(all_referenced_genomes_copies))
 
         # Дані про види (species_state_data) беруться з поточного self.species (S_N)
         species_state_data_to_save = [spec.get_state_data() for spec in self.species if spec]
@@ -159,11 +172,12 @@ class NeatAlgorithm:
             '_max_used_species_id': max((s.id for s in self.species if s), default=0),
             'species_representatives_prev_gen_ids': prev_gen_reps_data_ids,
             'first_goal_achieved_generation': self.first_goal_achieved_generation, # <--- ЗБЕРІГАЄМО
-            'generation_statistics': self.generation_statistics 
+            'generation_statistics': list(self.generation_statistics)
         }
-        print(f"DEBUG SAVE: Max species ID being saved: {state['_max_used_species_id']}")
-        print(f"DEBUG SAVE: Genome counter value being saved: {state['_genome_id_counter_val']}")
-        print(f"DEBUG SAVE: Saving {len(state['population_genomes'])} total genomes, {len(state['current_active_population_ids'])} active population genomes.")
+        logger.debug("Save: Max species ID being saved: %s", state['_max_used_species_id'])
+        logger.debug("Save: Genome counter value being saved: %s", state['_genome_id_counter_val'])
+        logger.debug("Save: Saving %d total genomes, %d active population genomes.",
+                     len(state['population_genomes']), len(state['current_active_population_ids']))
         return state
 
     
@@ -188,21 +202,22 @@ class NeatAlgorithm:
         # Завантажуємо ВСІ збережені геноми в загальну карту
         all_loaded_genomes_list = state_data.get('population_genomes', [])
         genomes_by_id = {genome.id: genome for genome in all_loaded_genomes_list if genome}
-        print(f"Info (Load): Loaded {len(all_loaded_genomes_list)} total genomes into master list. Genomes by ID map created with {len(genomes_by_id)} entries.")
+        logger.info("Load: Loaded %d total genomes into master list. Genomes by ID map created with %d entries.",
+                    len(all_loaded_genomes_list), len(genomes_by_id))
 
         # Відновлюємо АКТИВНУ популяцію (P_N+1)
         current_active_population_ids = state_data.get('current_active_population_ids', [])
         neat.population = [genomes_by_id[gid] for gid in current_active_population_ids if gid in genomes_by_id]
-        print(f"Info (Load): Reconstructed active population with {len(neat.population)} genomes.")
+        logger.info("Load: Reconstructed active population with %d genomes.", len(neat.population))
 
 
         max_loaded_species_id = state_data.get('_max_used_species_id', 0)
         Species._species_counter = itertools.count(max_loaded_species_id + 1)
-        print(f"Info (Load): Species ID counter reset to start from {max_loaded_species_id + 1}.")
+        logger.info("Load: Species ID counter reset to start from %d.", max_loaded_species_id + 1)
         
         neat.species = []
         loaded_species_data = state_data.get('species_state_data', [])
-        print(f"Info (Load): Attempting to load {len(loaded_species_data)} species records.")
+        logger.info("Load: Attempting to load %d species records.", len(loaded_species_data))
 
         for s_data in loaded_species_data:
             species_id_from_data = s_data.get('id', 'Unknown_ID')
@@ -215,7 +230,7 @@ class NeatAlgorithm:
             if rep_id is not None:
                 representative_genome_obj = genomes_by_id.get(rep_id)
                 if not representative_genome_obj:
-                    print(f"Warning (Load): Representative genome with ID '{rep_id}' for species '{species_id_from_data}' not found in loaded master genomes list.")
+                    logger.warning("Load: Representative genome with ID '%s' for species '%s' not found in loaded master genomes list.", rep_id, species_id_from_data)
 
             if not representative_genome_obj and member_ids_from_data:
                 # print(f"Info (Load): Rep ID '{rep_id}' for species '{species_id_from_data}' not found or was None. Attempting to find representative from its members.")
@@ -223,11 +238,11 @@ class NeatAlgorithm:
                     fallback_rep_obj = genomes_by_id.get(m_id_fallback)
                     if fallback_rep_obj:
                         representative_genome_obj = fallback_rep_obj
-                        print(f"Info (Load): Using member ID '{m_id_fallback}' as representative for species '{species_id_from_data}'.")
+                        logger.info("Load: Using member ID '%s' as representative for species '%s'.", m_id_fallback, species_id_from_data)
                         break 
             
             if not representative_genome_obj:
-                 print(f"Error (Load): Could not assign a representative for species ID '{species_id_from_data}'. Skipping this species.")
+                 logger.error("Load: Could not assign a representative for species ID '%s'. Skipping this species.", species_id_from_data)
                  continue
 
             species_obj = Species(representative_genome_obj) 
@@ -262,9 +277,9 @@ class NeatAlgorithm:
                 neat.species.append(species_obj)
                 # print(f"Info (Load): Successfully loaded species ID '{species_obj.id}' with {actually_added_members_count} members. Representative ID: {species_obj.representative.id if species_obj.representative else 'None'}.")
             else:
-                print(f"Warning (Load): Species ID '{species_id_from_data}' was skipped because no valid members could be loaded from member_ids: {member_ids_from_data}.")
+                logger.warning("Load: Species ID '%s' was skipped because no valid members could be loaded from member_ids: %s.", species_id_from_data, member_ids_from_data)
         
-        print(f"Info (Load): Finished loading species. Total species loaded: {len(neat.species)}.")
+        logger.info("Load: Finished loading species. Total species loaded: %d.", len(neat.species))
 
         neat.species_representatives_prev_gen = {}
         prev_gen_reps_ids_data = state_data.get('species_representatives_prev_gen_ids', {})
@@ -278,19 +293,22 @@ class NeatAlgorithm:
         # print(f"Info (Load): Loaded {len(neat.species_representatives_prev_gen)} previous generation representatives.")
         
         neat.first_goal_achieved_generation = state_data.get('first_goal_achieved_generation') # <--- ЗАВАНТАЖУЄМО
-        neat.generation_statistics = state_data.get('generation_statistics', [])
-        print(f"NEAT state loaded. Gen: {neat.generation}, Pop: {len(neat.population)}, Species: {len(neat.species)}, PrevReps: {len(neat.species_representatives_prev_gen)}")
+        neat.generation_statistics.extend(state_data.get('generation_statistics', []))
+        logger.info("NEAT state loaded. Gen: %s, Pop: %d, Species: %d, PrevReps: %d", neat.generation, len(neat.population),
+                    len(neat.species), len(neat.species_representatives_prev_gen))
         return neat
     
+    def population_distance_matrix(self):
+        """Матриця попарних генетичних відстаней поточної популяції (для аналізу різноманітності)."""
+        return pairwise_distances([genome for genome in self.population if genome],
+                                  self.config['C1_EXCESS'], self.config['C2_DISJOINT'], self.config['C3_WEIGHT'])
+
     def _speciate_population(self):
         """
         Розподіляє геноми по видах на основі генетичної відстані,
         використовуючи представників з ПОПЕРЕДНЬОГО покоління (якщо доступні).
         """
         threshold = self.config['COMPATIBILITY_THRESHOLD']
-        c1 = self.config['C1_EXCESS']
-        c2 = self.config['C2_DISJOINT']
-        c3 = self.config['C3_WEIGHT']
 
         # Зберігаємо карту старих видів за ID для доступу до їх історії
         old_species_map = {s.id: s for s in self.species}
@@ -316,12 +334,12 @@ class NeatAlgorithm:
                 existing_species_for_repopulation.append(current_gen_species_instance)
             
             species_to_compare_against = existing_species_for_repopulation
-            print(f"Speciation: Using {len(species_to_compare_against)} representatives from previous generation.")
+            logger.debug("Speciation: Using %d representatives from previous generation.", len(species_to_compare_against))
         else:
             # Для першого покоління або якщо немає збережених представників
             species_to_compare_against = []
             if not self.species and self.population:
-                 print("Speciation: Initial speciation, no previous representatives.")
+                 logger.debug("Speciation: Initial speciation, no previous representatives.")
             elif self.species: # Після завантаження, наприклад
                  for spec in self.species: # self.species тут - це завантажені види
                      if spec.representative:
@@ -330,40 +348,30 @@ class NeatAlgorithm:
                          spec.clear_members() # Очищаємо для нового наповнення
                          species_to_compare_against.append(spec)
                      else:
-                         print(f"Warning: Species {spec.id} has no representative during speciation, will likely be removed.")
-                 print(f"Speciation: Using {len(species_to_compare_against)} current representatives (e.g., after load).")
+                         logger.warning("Species %s has no representative during speciation, will likely be removed.", spec.id)
+                 logger.debug("Speciation: Using %d current representatives (e.g., after load).", len(species_to_compare_against))
 
 
         newly_created_species_this_gen = []
         # Починаємо з видів, що мають представників і потенційно історію
         final_species_list = list(species_to_compare_against) 
 
-        for genome in self.population:
-            if not genome: continue
-
-            assigned_to_existing_or_repopulating = False
-            # Спочатку порівнюємо з видами, які продовжують існувати (з existing_species_for_repopulation)
-            # або з тими, що були завантажені (з species_to_compare_against на старті)
-            for spec_to_check in species_to_compare_against: # Це вже "нові" екземпляри з потенційно перенесеною історією
-                if not spec_to_check.representative: continue
-                distance = genome.distance(spec_to_check.representative, c1, c2, c3)
-                if distance < threshold:
-                    spec_to_check.add_member(genome)
-                    assigned_to_existing_or_repopulating = True
-                    break
-            
-            if not assigned_to_existing_or_repopulating:
-                assigned_to_newly_created = False
-                for new_spec in newly_created_species_this_gen:
-                    distance = genome.distance(new_spec.representative, c1, c2, c3)
-                    if distance < threshold:
-                        new_spec.add_member(genome)
-                        assigned_to_newly_created = True
-                        break
-                if not assigned_to_newly_created:
-                    brand_new_species = Species(genome) # genome стає представником, історія починається з 0 - ЦЕ КОРЕКТНО
-                    newly_created_species_this_gen.append(brand_new_species)
-                    final_species_list.append(brand_new_species) # Додаємо до загального списку
+        # Відстані рахуються векторизовано (neat/compatibility.py) з тією ж семантикою "перший збіг":
+        # спершу види з представниками, потім нові види в порядку появи геномів
+        genomes_to_assign = [genome for genome in self.population if genome]
+        representatives_species = [spec for spec in species_to_compare_against if spec.representative]
+        assignment = assign_species(PopulationEncoding(genomes_to_assign),
+                                    [spec.representative for spec in representatives_species],
+                                    threshold, self.config['C1_EXCESS'], self.config['C2_DISJOINT'], self.config['C3_WEIGHT'])
+        for genome, species_index in zip(genomes_to_assign, assignment):
+            if species_index < len(representatives_species):
+                representatives_species[species_index].add_member(genome)
+            elif species_index - len(representatives_species) < len(newly_created_species_this_gen):
+                newly_created_species_this_gen[species_index - len(representatives_species)].add_member(genome)
+            else:
+                brand_new_species = Species(genome) # genome стає представником, історія починається з 0 - ЦЕ КОРЕКТНО
+                newly_created_species_this_gen.append(brand_new_species)
+                final_species_list.append(brand_new_species) # Додаємо до загального списку
 
         # Оновлюємо self.species: видаляємо види, які не отримали членів,
         # та додаємо новостворені (вони завжди матимуть хоча б одного члена).
@@ -455,7 +463,7 @@ class NeatAlgorithm:
                   species_to_keep.append(spec)
                   kept_species_ids.add(spec.id)
              else:
-                  print(f"Species {spec.id} removed due to stagnation ({spec.generations_since_improvement} gens).")
+                  logger.info("Species %s removed due to stagnation (%d gens).", spec.id, spec.generations_since_improvement)
 
          # Якщо після видалення залишився лише один вид (який міг бути стагнуючим, але був найкращим),
          # а інші стагнуючі були видалені, можемо спробувати додати назад один стагнуючий,
@@ -463,7 +471,8 @@ class NeatAlgorithm:
          # ... (можна додати цю логіку, якщо потрібно)
 
          self.species = species_to_keep
-         print(f"Species after stagnation handling: {[s.id for s in self.species]}")
+         if logger.isEnabledFor(logging.DEBUG):
+              logger.debug("Species after stagnation handling: %s", [s.id for s in self.species])
 
 
 
@@ -477,7 +486,7 @@ class NeatAlgorithm:
         num_offspring_map = self._determine_num_offspring() 
 
         if not self.species:
-             print("Error: No species left to reproduce. Resetting population.")
+             logger.error("No species left to reproduce. Resetting population.")
              # Передаємо менеджер інновацій при перестворенні
              return self._create_initial_population(self.innovation_manager)
         
@@ -575,8 +584,25 @@ class NeatAlgorithm:
             delattr(parent2, '_innovation_manager')
         
         return child
-    def run_generation(self, evaluation_function): # evaluation_function тепер глобальна
-        """Запускає один цикл покоління з паралельною оцінкою."""
+    def _evaluation_chunk_size(self, num_genomes: int, num_processes: int) -> int:
+        """
+        Розмір порції геномів для одного завдання пулу.
+        EVAL_CHUNK_SIZE з конфігу, або (якщо None/0) ~4 порції на кожен процес,
+        щоб зберегти балансування навантаження між воркерами.
+        """
+        chunk_size = self.config.get('EVAL_CHUNK_SIZE')
+        if not chunk_size:
+            chunk_size = math.ceil(num_genomes / (max(1, num_processes) * 4))
+        return max(1, int(chunk_size))
+
+    def run_generation(self, evaluation_function, batch_evaluation_function=None, chunk_evaluation_function=None): # evaluation_function тепер глобальна
+        """
+        Запускає один цикл покоління з паралельною оцінкою.
+        Якщо передано batch_evaluation_function і в конфігу BATCH_EVALUATION = True,
+        вся популяція оцінюється одним викликом у поточному процесі.
+        Якщо передано chunk_evaluation_function, воркерам надсилаються порції
+        скомпільованих мереж [(id, network), ...] (див. nn.create_network) замість окремих геномів.
+        """
         self.generation += 1
         self.innovation_manager.reset_generation_history()
 
@@ -589,39 +615,62 @@ class NeatAlgorithm:
         population_to_evaluate = [(g.id, g) for g in self.population if g] # Список кортежів (id, genome)
         num_processes = self.config.get('NUM_PROCESSES', os.cpu_count()) # Кількість процесів
 
-        print(f"Starting parallel evaluation for {len(population_to_evaluate)} genomes using {num_processes} processes...")
-        futures = {}
-        # Використовуємо ProcessPoolExecutor
         # Важливо: передаємо КОПІЮ self.config, щоб уникнути проблем із спільним доступом
         config_copy = self.config.copy()
-        try:
-            with ProcessPoolExecutor(max_workers=num_processes) as executor:
-                # Надсилаємо завдання: evaluate_single_genome(genome_tuple, config)
-                for genome_tuple in population_to_evaluate:
-                    future = executor.submit(evaluation_function, genome_tuple, config_copy)
-                    # Зберігаємо future та відповідний ID геному
-                    futures[future] = genome_tuple[0] # Ключ - future, значення - genome_id
+        if batch_evaluation_function is not None and self.config.get('BATCH_EVALUATION', False):
+            logger.info("Starting batch evaluation for %d genomes in a single process...", len(population_to_evaluate))
+            for genome_id, fitness, reached_goal_flag in batch_evaluation_function(population_to_evaluate, config_copy):
+                evaluation_results_with_goal_flag[genome_id] = (fitness, reached_goal_flag)
+        else:
+            logger.info("Starting parallel evaluation for %d genomes using %s processes...", len(population_to_evaluate), num_processes)
+            futures = {}
+            # Використовуємо постійний пул процесів (не створюємо новий на кожне покоління)
+            try:
+                self.evaluation_pool.resize(num_processes)
+                executor = self.evaluation_pool.start()
+                if chunk_evaluation_function is not None:
+                    # Порції: компактні мережі замість геномів (без конфігу всередині кожного), конфіг - один раз на порцію
+                    chunk_size = self._evaluation_chunk_size(len(population_to_evaluate), num_processes)
+                    payloads = [(genome_id, create_network(genome_obj, self.config)) for genome_id, genome_obj in population_to_evaluate]
+                    for start in range(0, len(payloads), chunk_size):
+                        chunk = payloads[start:start + chunk_size]
+                        future = executor.submit(chunk_evaluation_function, chunk, config_copy)
+                        futures[future] = [genome_id for genome_id, _ in chunk] # Ключ - future, значення - ID геномів порції
+                else:
+                    # Надсилаємо завдання: evaluate_single_genome(genome_tuple, config)
+                    for genome_tuple in population_to_evaluate:
+                        future = executor.submit(evaluation_function, genome_tuple, config_copy)
+                        # Зберігаємо future та відповідний ID геному
+                        futures[future] = [genome_tuple[0]] # Ключ - future, значення - ID геномів
 
                 # Збираємо результати по мірі завершення
                 for future in as_completed(futures):
-                    genome_id = futures[future]
+                    genome_ids = futures[future]
                     try:
-                        # Тепер отримуємо (id, fitness, reached_goal_flag)
-                        _, fitness, reached_goal_flag = future.result() 
-                        evaluation_results_with_goal_flag[genome_id] = (fitness, reached_goal_flag)
+                        # Тепер отримуємо (id, fitness, reached_goal_flag) - по одному чи списком для порції
+                        results = future.result()
+                        if chunk_evaluation_function is None:
+                            results = [results]
+                        for genome_id, fitness, reached_goal_flag in results:
+                            evaluation_results_with_goal_flag[genome_id] = (fitness, reached_goal_flag)
+                    except BrokenProcessPool:
+                        raise
                     except Exception as exc:
-                        print(f'Genome {genome_id} evaluation generated an exception: {exc}')
-                        evaluation_results_with_goal_flag[genome_id] = (0.001, False) 
-        except Exception as pool_exc:
-             print(f"Error during ProcessPoolExecutor execution: {pool_exc}")
-             for genome_id, genome_obj in population_to_evaluate: # Змінено genome на genome_obj для ясності
-                 try:
-                     _, fitness, reached_goal_flag = evaluation_function((genome_id, genome_obj), config_copy)
-                     evaluation_results_with_goal_flag[genome_id] = (fitness, reached_goal_flag)
-                 except Exception as eval_exc:
-                      print(f"Sequential evaluation error for genome {genome_id}: {eval_exc}")
-                      evaluation_results_with_goal_flag[genome_id] = (0.001, False)
-        
+                        logger.error("Genomes %s evaluation generated an exception: %s", genome_ids, exc)
+                        for genome_id in genome_ids:
+                            evaluation_results_with_goal_flag[genome_id] = (0.001, False) 
+            except Exception as pool_exc:
+                 logger.error("Error during ProcessPoolExecutor execution: %s", pool_exc)
+                 # Пошкоджений пул буде перезапущено при наступній оцінці
+                 self.evaluation_pool.shutdown(wait=False)
+                 for genome_id, genome_obj in population_to_evaluate: # Змінено genome на genome_obj для ясності
+                     try:
+                         _, fitness, reached_goal_flag = evaluation_function((genome_id, genome_obj), config_copy)
+                         evaluation_results_with_goal_flag[genome_id] = (fitness, reached_goal_flag)
+                     except Exception as eval_exc:
+                          logger.error("Sequential evaluation error for genome %s: %s", genome_id, eval_exc)
+                          evaluation_results_with_goal_flag[genome_id] = (0.001, False)
+
         any_genome_reached_goal_this_gen = False # Прапорець для поточного покоління
         valid_evaluated_genomes = 0
         for genome in self.population:
@@ -647,7 +696,7 @@ class NeatAlgorithm:
         # Оновлюємо first_goal_achieved_generation
         if any_genome_reached_goal_this_gen and self.first_goal_achieved_generation is None:
             self.first_goal_achieved_generation = self.generation
-            print(f"INFO: Goal first achieved at generation {self.generation}!")
+            logger.info("Goal first achieved at generation %s!", self.generation)
 
         stats = {
             "generation": self.generation,
@@ -660,7 +709,9 @@ class NeatAlgorithm:
         }
         # Зберігаємо представників поточних видів ПЕРЕД тим, як _speciate_population їх потенційно змінить
         self._update_previous_gen_representatives() # <--- ВАЖЛИВО
+        speciation_start = time.perf_counter()
         self._speciate_population()
+        stats["speciation_time"] = time.perf_counter() - speciation_start
         for spec in self.species:
             if spec.members:
                 spec.sort_members_by_fitness()
@@ -668,9 +719,14 @@ class NeatAlgorithm:
         next_population = self._reproduce()
         self.population = next_population
         stats["num_species_after_speciation"] = len(self.species) 
-        self.generation_statistics.append(stats) # Зберігаємо фінальну статистик
+        self.generation_statistics.record(stats) # Зберігаємо фінальну статистику (і дописуємо в журнал запуску)
         # Повертаємо статистику
         return stats
 
     def get_best_genome_overall(self) -> Genome | None:
-        return self.best_genome_overall
\ No newline at end of file
+        return self.best_genome_overall
+
+    def shutdown(self):
+        """Звільняє ресурси алгоритму (зупиняє пул процесів оцінки, закриває журнал запуску)."""
+        self.evaluation_pool.shutdown()
+        self.generation_statistics.close()
\ No newline at end of file
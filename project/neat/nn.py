@@ -1,12 +1,16 @@
 # neat/nn.py
 
 import math
-from collections import deque
-import traceback
-from typing import Optional # Import traceback for detailed error logging
+import sys
+from collections import OrderedDict, deque
+from typing import Optional
+import numpy as np
 
 # Імпортуємо потрібні класи та функції з сусіднього файлу genome
-from .genome import Genome, NodeGene, ConnectionGene, ACTIVATION_FUNCTIONS
+from .genome import Genome, NodeGene, ConnectionGene, ACTIVATION_FUNCTIONS, linear, sigmoid, relu
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 def _get_network_graph(genome: Genome) -> tuple[dict[int, list[int]], dict[int, int]]:
     """
@@ -50,7 +54,19 @@ def _get_network_graph(genome: Genome) -> tuple[dict[int, list[int]], dict[int,
 def determine_evaluation_order(genome: Genome) -> list[int]:
     """
     Визначає порядок обчислення активації вузлів для мережі прямого поширення.
+    Результат кешується на геномі і скидається при структурних змінах (add_connection,
+    invalidate_caches); повернутий список не слід змінювати.
     """
+    cached = getattr(genome, '_evaluation_order', None)
+    if cached is not None and cached[0] == len(genome.connections):
+        return cached[1]
+    eval_order = _compute_evaluation_order(genome)
+    genome._evaluation_order = (len(genome.connections), eval_order)
+    return eval_order
+
+
+def _compute_evaluation_order(genome: Genome) -> list[int]:
+    """Топологічне сортування (алгоритм Кана) вузлів, з'єднаних увімкненими з'єднаннями."""
     try:
         out_connections, in_degree = _get_network_graph(genome)
         relevant_node_ids = set(in_degree.keys())
@@ -85,8 +101,9 @@ def determine_evaluation_order(genome: Genome) -> list[int]:
                             queue.append(neighbor_id)
 
         if processed_count != len(relevant_node_ids):
-            print(f"Warning: Cycle detected or unconnected nodes in genome {genome.id}. "
-                  f"Processed {processed_count} nodes, relevant nodes {len(relevant_node_ids)}. ")
+            # Геноми підтримують ациклічність (Genome.creates_cycle); цикл можливий лише у старих збереженнях
+            logger.warning("Cycle detected or unconnected nodes in genome %s. Processed %d nodes, relevant nodes %d.",
+                           genome.id, processed_count, len(relevant_node_ids))
             # Повернемо частковий порядок, якщо він не порожній
             pass # Або return [] якщо це критично
 
@@ -94,7 +111,7 @@ def determine_evaluation_order(genome: Genome) -> list[int]:
         if len(sorted_nodes) != len(nodes_to_activate):
              # Це може статися, якщо приховані/вихідні вузли недосяжні з входів
              missing_nodes = nodes_to_activate - set(sorted_nodes)
-             print(f"Warning: Cannot activate all required nodes in genome {genome.id}. Missing: {missing_nodes}")
+             logger.warning("Cannot activate all required nodes in genome %s. Missing: %s", genome.id, missing_nodes)
              # Повертаємо лише ті, що досяжні
              pass
 
@@ -102,8 +119,7 @@ def determine_evaluation_order(genome: Genome) -> list[int]:
         return sorted_nodes
 
     except Exception as e:
-         print(f"ERROR during determine_evaluation_order for genome {genome.id}: {e}")
-         traceback.print_exc() # Друкуємо повний traceback
+         logger.exception("Error during determine_evaluation_order for genome %s: %s", genome.id, e) # З повним traceback
          return [] # Повертаємо порожній список при помилці
 
 
@@ -111,6 +127,7 @@ def activate_network(genome: Genome, inputs: list[float]) -> Optional[list[float
     """
     Активує нейронну мережу (фенотип), представлену геномом.
     Повертає список вихідних значень або None у разі внутрішньої помилки.
+    Значення вузлів зберігаються в окремому буфері, геном не змінюється.
     """
     # === Додаємо зовнішній try...except ===
     try:
@@ -123,33 +140,31 @@ def activate_network(genome: Genome, inputs: list[float]) -> Optional[list[float
             raise ValueError(f"Genome {genome.id}: Number of inputs ({len(inputs)}) "
                              f"does not match network input nodes ({len(input_ids)})")
 
-        # 1. Скидаємо стан вузлів
-        for node in genome.nodes.values():
-            node.output_value = 0.0
-            node._input_sum = 0.0
+        # 1. Буфер значень вузлів для цієї активації (всі вузли стартують з 0.0)
+        values = dict.fromkeys(genome.nodes, 0.0)
 
         # 2. Встановлюємо значення входів/біасу
         for i, node_id in enumerate(input_ids):
-            if node_id in genome.nodes:
-                 genome.nodes[node_id].output_value = inputs[i]
+            if node_id in values:
+                 values[node_id] = inputs[i]
             # else: print(f"Warning: Input node ID {node_id} not found in genome {genome.id}.")
 
-        if bias_id is not None and bias_id in genome.nodes:
-            genome.nodes[bias_id].output_value = 1.0
+        if bias_id is not None and bias_id in values:
+            values[bias_id] = 1.0
         # elif bias_id is not None: print(f"Warning: Bias node ID {bias_id} not found in genome {genome.id}.")
 
         # 3. Визначаємо порядок активації
         eval_order = determine_evaluation_order(genome)
         if not eval_order and any(n.type != 'INPUT' and n.type != 'BIAS' for n in genome.nodes.values()):
              # Якщо порядок порожній, але є приховані/вихідні вузли, щось не так
-             print(f"Warning: Evaluation order is empty for genome {genome.id}, but hidden/output nodes exist.")
+             logger.warning("Evaluation order is empty for genome %s, but hidden/output nodes exist.", genome.id)
              # У цьому випадку мережа не може нічого обчислити коректно
 
         # 4. Активуємо вузли
         for node_id in eval_order:
             # Перевіряємо, чи вузол існує (про всяк випадок)
             if node_id not in genome.nodes:
-                 print(f"ERROR: Node {node_id} from eval_order not found in genome {genome.id}. Skipping.")
+                 logger.error("Node %s from eval_order not found in genome %s. Skipping.", node_id, genome.id)
                  continue
 
             node = genome.nodes[node_id]
@@ -159,26 +174,25 @@ def activate_network(genome: Genome, inputs: list[float]) -> Optional[list[float
             # Оптимізація: краще мати pre-computed список вхідних з'єднань для вузла
             for conn in genome.connections.values():
                  if conn.enabled and conn.out_node_id == node_id:
-                     if conn.in_node_id in genome.nodes:
-                          in_node = genome.nodes[conn.in_node_id]
-                          node_input_sum += in_node.output_value * conn.weight
+                     if conn.in_node_id in values:
+                          node_input_sum += values[conn.in_node_id] * conn.weight
                      # else: print(f"Warning: Input node {conn.in_node_id} for connection {conn.innovation} not found.")
 
             # Додаємо біас
             node_input_sum += node.bias
-            node._input_sum = node_input_sum # Зберігаємо суму перед активацією
 
             # Застосовуємо функцію активації
             if node.activation_function:
                  # Додаємо try-except навколо виклику функції активації
                  try:
-                    node.output_value = node.activation_function(node_input_sum)
+                    values[node_id] = node.activation_function(node_input_sum)
                  except Exception as act_e:
-                      print(f"ERROR during activation function {node.activation_function_name} for node {node_id} (genome {genome.id}) with input {node_input_sum}: {act_e}")
-                      node.output_value = 0.0 # Значення за замовчуванням при помилці
+                      logger.error("Error during activation function %s for node %s (genome %s) with input %s: %s",
+                                   node.activation_function_name, node_id, genome.id, node_input_sum, act_e)
+                      values[node_id] = 0.0 # Значення за замовчуванням при помилці
             else:
                  # Наприклад, для вузла без визначеної функції (хоча це мало б бути оброблено в NodeGene)
-                 node.output_value = node_input_sum
+                 values[node_id] = node_input_sum
 
         # 5. Збираємо результати
         output_values = []
@@ -187,13 +201,13 @@ def activate_network(genome: Genome, inputs: list[float]) -> Optional[list[float
              # Сортуємо для стабільного порядку
              sorted_output_ids = sorted(output_ids)
              for node_id in sorted_output_ids:
-                 if node_id in genome.nodes:
-                     output_values.append(genome.nodes[node_id].output_value)
+                 if node_id in values:
+                     output_values.append(values[node_id])
                  else:
-                      print(f"Warning: Output node ID {node_id} not found in genome {genome.id}. Appending 0.0.")
+                      logger.warning("Output node ID %s not found in genome %s. Appending 0.0.", node_id, genome.id)
                       output_values.append(0.0)
         else:
-             print(f"Warning: Genome {genome.id} has no output nodes defined in _output_node_ids.")
+             logger.warning("Genome %s has no output nodes defined in _output_node_ids.", genome.id)
              # Повертаємо порожній список або список нулів відповідної довжини?
              # Повернемо порожній, це явна помилка.
              return [] # Або None, якщо це краще обробляється вище
@@ -202,20 +216,518 @@ def activate_network(genome: Genome, inputs: list[float]) -> Optional[list[float
 
     # === Обробка будь-яких інших непередбачених помилок всередині функції ===
     except Exception as e:
-        print(f"\n--- UNHANDLED EXCEPTION IN activate_network (Genome ID: {genome.id}) ---")
-        print(f"Error Type: {type(e)}")
-        print(f"Error Args: {e.args}")
-        print("Genome structure that caused error:")
         try:
-             print(f" Nodes ({len(genome.nodes)}): {list(genome.nodes.keys())}")
-             # print(f" Connections ({len(genome.connections)}): {list(genome.connections.keys())}")
-             # for innov, conn in genome.connections.items(): print(f"  {conn}")
-        except:
-             print(" (Could not print genome details)")
-        print("Inputs provided:")
-        print(f" {inputs}")
-        print("Traceback:")
-        traceback.print_exc()
-        print("--- END OF EXCEPTION ---")
+             genome_details = f"Nodes ({len(genome.nodes)}): {list(genome.nodes.keys())}"
+        except Exception:
+             genome_details = "(Could not read genome details)"
+        # logger.exception додає тип помилки та повний traceback
+        logger.exception("Unhandled exception in activate_network (Genome ID: %s). Genome structure: %s. Inputs provided: %s",
+                         getattr(genome, 'id', None), genome_details, inputs)
         # Повертаємо None, щоб зовнішній код міг це обробити
-        return None
\ No newline at end of file
+        return None
+
+
+class FeedForwardNetwork:
+    """
+    Скомпільований фенотип мережі прямого поширення.
+
+    Граф, топологічне сортування та пошук вхідних з'єднань виконуються
+    один раз у create(). Порядок обчислення та вхідні ребра кожного вузла
+    (індекс джерела, вага) зберігаються у плоских списках у форматі CSR,
+    тому activate() не виконує пошуків у словниках та роботи з графом.
+    """
+    __slots__ = (
+        "genome_id", "num_inputs", "input_slots", "bias_index", "output_indices",
+        "eval_indices", "eval_biases", "eval_functions",
+        "edge_offsets", "edge_sources", "edge_weights", "values",
+    )
+
+    def __init__(self, genome_id, num_inputs: int, num_slots: int,
+                 input_slots: list[tuple[int, int]], bias_index: Optional[int],
+                 output_indices: list[int], eval_indices: list[int],
+                 eval_biases: list[float], eval_functions: list,
+                 edge_offsets: list[int], edge_sources: list[int], edge_weights: list[float]):
+        self.genome_id = genome_id
+        self.num_inputs = num_inputs
+        self.input_slots = input_slots          # [(позиція у векторі входів, індекс вузла)]
+        self.bias_index = bias_index
+        self.output_indices = output_indices    # Індекси вихідних вузлів (відсортовані за ID)
+        self.eval_indices = eval_indices        # Індекси вузлів у порядку обчислення
+        self.eval_biases = eval_biases
+        self.eval_functions = eval_functions
+        # Ребра вузла eval_indices[k]: edge_sources/edge_weights[edge_offsets[k]:edge_offsets[k + 1]]
+        self.edge_offsets = edge_offsets
+        self.edge_sources = edge_sources
+        self.edge_weights = edge_weights
+        # Буфер значень вузлів; останній слот завжди 0.0 (для відсутніх вихідних вузлів)
+        self.values = [0.0] * (num_slots + 1)
+        if bias_index is not None:
+            self.values[bias_index] = 1.0
+
+    @classmethod
+    def create(cls, genome: Genome) -> 'FeedForwardNetwork':
+        """Компілює геном у фенотип. Геном при цьому не змінюється."""
+        return get_network_plan(genome, recurrent=False).instantiate(genome)
+
+    def activate(self, inputs: list[float]) -> list[float]:
+        """Обчислює виходи мережі для заданого вектора входів."""
+        if len(inputs) != self.num_inputs:
+            raise ValueError(f"Genome {self.genome_id}: Number of inputs ({len(inputs)}) "
+                             f"does not match network input nodes ({self.num_inputs})")
+        values = self.values
+        for position, index in self.input_slots:
+            values[index] = inputs[position]
+
+        edge_offsets = self.edge_offsets
+        edge_sources = self.edge_sources
+        edge_weights = self.edge_weights
+        for k, index in enumerate(self.eval_indices):
+            total = 0.0
+            for e in range(edge_offsets[k], edge_offsets[k + 1]):
+                total += values[edge_sources[e]] * edge_weights[e]
+            values[index] = self.eval_functions[k](total + self.eval_biases[k])
+
+        return [values[index] for index in self.output_indices]
+
+class RecurrentNetwork(FeedForwardNetwork):
+    """
+    Скомпільований рекурентний фенотип зі станом між кроками симуляції.
+
+    Усі приховані та вихідні вузли оновлюються синхронно: новий стан рахується
+    лише зі стану попереднього кроку (буфер values), записується в next_values,
+    після чого буфери міняються місцями. Цикли та петлі дозволені, сигнал
+    проходить один шар з'єднань за крок. reset() очищає пам'ять мережі.
+    """
+    __slots__ = ("next_values",)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.next_values = list(self.values)
+
+    @classmethod
+    def create(cls, genome: Genome) -> 'RecurrentNetwork':
+        """Компілює геном (можливо з циклами) у рекурентний фенотип."""
+        return get_network_plan(genome, recurrent=True).instantiate(genome)
+
+    def reset(self):
+        """Скидає стан мережі (усі вузли, крім біасу, - 0.0)."""
+        for buffer in (self.values, self.next_values):
+            for i in range(len(buffer)):
+                buffer[i] = 0.0
+            if self.bias_index is not None:
+                buffer[self.bias_index] = 1.0
+
+    def activate(self, inputs: list[float]) -> list[float]:
+        """Один синхронний крок мережі; повертає нові значення виходів."""
+        if len(inputs) != self.num_inputs:
+            raise ValueError(f"Genome {self.genome_id}: Number of inputs ({len(inputs)}) "
+                             f"does not match network input nodes ({self.num_inputs})")
+        values = self.values
+        next_values = self.next_values
+        for position, index in self.input_slots:
+            values[index] = inputs[position]
+
+        edge_offsets = self.edge_offsets
+        edge_sources = self.edge_sources
+        edge_weights = self.edge_weights
+        for k, index in enumerate(self.eval_indices):
+            total = 0.0
+            for e in range(edge_offsets[k], edge_offsets[k + 1]):
+                total += values[edge_sources[e]] * edge_weights[e]
+            next_values[index] = self.eval_functions[k](total + self.eval_biases[k])
+
+        # Входи перезаписуються на кожному кроці, біас однаковий в обох буферах
+        self.values, self.next_values = next_values, values
+        return [next_values[index] for index in self.output_indices]
+
+class NetworkPlan:
+    """
+    Скомпільований план фенотипу без ваг: порядок обчислення, розкладка вузлів та
+    джерела ребер у форматі CSR. План залежить лише від Genome.structural_key, тож
+    геноми з однаковою топологією (еліта, копії) ділять один план, а instantiate()
+    лише підставляє ваги та біаси конкретного геному.
+    """
+    __slots__ = (
+        "recurrent", "num_inputs", "num_slots", "input_slots", "bias_index", "output_indices",
+        "eval_node_ids", "eval_indices", "eval_functions", "edge_offsets", "edge_sources", "edge_positions",
+    )
+
+    def __init__(self, genome: Genome, recurrent: bool):
+        input_ids, output_ids, bias_id = genome.get_input_output_bias_ids()
+        index_of = {node_id: i for i, node_id in enumerate(genome.nodes)}
+        zero_slot = len(index_of)
+
+        if recurrent:
+            eval_ids = [node_id for node_id, node in genome.nodes.items() if node.type in ("HIDDEN", "OUTPUT")]
+        else:
+            eval_ids = determine_evaluation_order(genome)
+        # Вхідні ребра кожного вузла: (індекс джерела, позиція гена серед увімкнених з'єднань).
+        # Порядок з'єднань збігається з activate_network, тож суми ідентичні
+        incoming: dict[int, list[tuple[int, int]]] = {node_id: [] for node_id in eval_ids}
+        enabled_connections = (conn for conn in genome.connections.values() if conn.enabled)
+        for position, conn in enumerate(enabled_connections):
+            if conn.out_node_id in incoming and conn.in_node_id in index_of:
+                incoming[conn.out_node_id].append((index_of[conn.in_node_id], position))
+
+        self.recurrent = recurrent
+        self.num_inputs = len(input_ids)
+        self.num_slots = zero_slot
+        self.eval_node_ids = list(eval_ids)
+        self.eval_indices = [index_of[node_id] for node_id in eval_ids]
+        self.eval_functions = [genome.nodes[node_id].activation_function or linear for node_id in eval_ids]
+        self.edge_offsets, self.edge_sources, self.edge_positions = [0], [], []
+        for node_id in eval_ids:
+            for source_index, position in incoming[node_id]:
+                self.edge_sources.append(source_index)
+                self.edge_positions.append(position)
+            self.edge_offsets.append(len(self.edge_sources))
+
+        self.input_slots = [(i, index_of[node_id]) for i, node_id in enumerate(input_ids) if node_id in index_of]
+        self.bias_index = index_of.get(bias_id) if bias_id is not None else None
+        self.output_indices = [index_of.get(node_id, zero_slot) for node_id in sorted(output_ids)]
+
+    def instantiate(self, genome: Genome) -> FeedForwardNetwork:
+        """Мережа за цим планом з вагами та біасами genome (структура genome має збігатися з планом)."""
+        enabled_weights = [conn.weight for conn in genome.connections.values() if conn.enabled]
+        nodes = genome.nodes
+        network_class = RecurrentNetwork if self.recurrent else FeedForwardNetwork
+        # Списки плану спільні для всіх мереж і не змінюються ними; буфери значень - власні
+        return network_class(genome.id, self.num_inputs, self.num_slots, self.input_slots, self.bias_index,
+                             self.output_indices, self.eval_indices,
+                             [nodes[node_id].bias for node_id in self.eval_node_ids], self.eval_functions,
+                             self.edge_offsets, self.edge_sources,
+                             [enabled_weights[position] for position in self.edge_positions])
+
+# Скільки різних планів тримати в кеші процесу (див. get_network_plan)
+NETWORK_PLAN_CACHE_SIZE = 1024
+_network_plan_cache: "OrderedDict[tuple, NetworkPlan]" = OrderedDict()
+
+def get_network_plan(genome: Genome, recurrent: bool = False) -> NetworkPlan:
+    """План фенотипу геному з LRU-кешу процесу за структурним ключем (компіляція графа - лише при промаху)."""
+    key = (recurrent, genome.structural_key())
+    plan = _network_plan_cache.get(key)
+    if plan is not None:
+        _network_plan_cache.move_to_end(key)
+        return plan
+    plan = NetworkPlan(genome, recurrent)
+    _network_plan_cache[key] = plan
+    if len(_network_plan_cache) > NETWORK_PLAN_CACHE_SIZE:
+        _network_plan_cache.popitem(last=False)
+    return plan
+
+def clear_network_plan_cache():
+    """Очищає кеш планів фенотипів процесу."""
+    _network_plan_cache.clear()
+
+def create_network(genome: Genome, config: dict):
+    """
+    Компілює фенотип згідно з конфігурацією: FEED_FORWARD = False - рекурентна мережа,
+    LAYERED_NETWORKS - мережа прямого поширення у вигляді матриць шарів.
+    """
+    if not config.get('FEED_FORWARD', True):
+        return RecurrentNetwork.create(genome)
+    if config.get('LAYERED_NETWORKS', False):
+        return LayeredNetwork.create(genome)
+    return FeedForwardNetwork.create(genome)
+
+# Векторизовані відповідники функцій активації з genome.py
+def _np_sigmoid(x: np.ndarray) -> np.ndarray:
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-4.9 * x))
+
+def _np_relu(x: np.ndarray) -> np.ndarray:
+    return np.where(x > 0.0, x, 0.0) # Як max(0.0, x), включно з -0.0 та NaN
+
+def _np_linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+NP_ACTIVATION_FUNCTIONS = {
+    sigmoid: _np_sigmoid,
+    relu: _np_relu,
+    linear: _np_linear,
+}
+
+# Найбільший аргумент, для якого math.exp ще не дає OverflowError
+_MAX_EXP_ARGUMENT = math.log(sys.float_info.max)
+
+def _np_sigmoid_scalar(x: np.ndarray) -> np.ndarray:
+    """
+    Та сама sigmoid, що й у genome.py, включно з переповненням: експонента рахується
+    math.exp поелементно, бо np.exp відрізняється від неї в останньому біті.
+    """
+    with np.errstate(over='ignore'):
+        z = -4.9 * x
+    overflow = z > _MAX_EXP_ARGUMENT
+    exp_z = np.fromiter(map(math.exp, np.where(overflow, 0.0, z).ravel().tolist()), np.float64, count=z.size)
+    return np.where(overflow, 0.0, 1.0 / (1.0 + exp_z.reshape(z.shape)))
+
+# Для пакетів мереж: значення мають збігатися з FeedForwardNetwork побітово, інакше
+# траєкторії агентів у пакетній оцінці з часом розходяться з покроковою
+SCALAR_ACTIVATION_FUNCTIONS = {
+    sigmoid: _np_sigmoid_scalar,
+    relu: _np_relu,
+    linear: _np_linear,
+}
+
+def _np_function_groups(functions: list, np_functions: dict = NP_ACTIVATION_FUNCTIONS) -> list:
+    """Групує позиції вузлів за функцією активації: [(векторизована функція, позиції), ...]."""
+    groups = []
+    for func in set(functions):
+        positions = np.array([i for i, f in enumerate(functions) if f is func], dtype=np.int64)
+        groups.append((np_functions.get(func, _np_linear), positions))
+    return groups
+
+
+class FeedForwardNetworkBatch:
+    """
+    Набір скомпільованих мереж (по одній на агента), що обчислюються разом.
+
+    Вузли всіх мереж розміщуються в одному векторі значень і групуються
+    за рівнем (довжиною найдовшого шляху від входів). Кожен рівень
+    обчислюється одним np.bincount по всіх його вхідних ребрах, тому
+    вартість кроку не залежить від кількості мереж у Python-циклі.
+    np.bincount додає ребра вузла в тому ж порядку, що й FeedForwardNetwork.activate,
+    тож виходи збігаються з покроковими побітово.
+    """
+
+    def __init__(self, networks: list[FeedForwardNetwork]):
+        if not networks:
+            raise ValueError("FeedForwardNetworkBatch requires at least one network.")
+        self.num_networks = len(networks)
+        self.num_inputs = networks[0].num_inputs
+
+        input_rows, input_cols, input_dst, output_indices = [], [], [], []
+        bias_slots = []
+        # level -> [dst_slots, biases, functions, edge_src, edge_dst_pos, edge_weights]
+        levels: dict[int, list[list]] = {}
+        offset = 0
+        for row, net in enumerate(networks):
+            if net.num_inputs != self.num_inputs:
+                raise ValueError("All networks in a batch must have the same number of inputs.")
+            for position, index in net.input_slots:
+                input_rows.append(row)
+                input_cols.append(position)
+                input_dst.append(offset + index)
+            output_indices.append([offset + index for index in net.output_indices])
+            if net.bias_index is not None:
+                bias_slots.append(offset + net.bias_index)
+
+            slot_level: dict[int, int] = {}
+            for k, index in enumerate(net.eval_indices):
+                start, end = net.edge_offsets[k], net.edge_offsets[k + 1]
+                level = 1 + max((slot_level.get(net.edge_sources[e], 0) for e in range(start, end)), default=0)
+                slot_level[index] = level
+                bucket = levels.setdefault(level, [[], [], [], [], [], []])
+                dst_pos = len(bucket[0])
+                bucket[0].append(offset + index)
+                bucket[1].append(net.eval_biases[k])
+                bucket[2].append(net.eval_functions[k])
+                for e in range(start, end):
+                    bucket[3].append(offset + net.edge_sources[e])
+                    bucket[4].append(dst_pos)
+                    bucket[5].append(net.edge_weights[e])
+            offset += len(net.values)
+
+        self.values = np.zeros(offset)
+        self.values[bias_slots] = 1.0
+        self._input_rows = np.array(input_rows, dtype=np.int64)
+        self._input_cols = np.array(input_cols, dtype=np.int64)
+        self._input_dst = np.array(input_dst, dtype=np.int64)
+        self._output_indices = np.array(output_indices, dtype=np.int64)
+
+        self._levels = []
+        for level in sorted(levels):
+            dst_slots, biases, functions, edge_src, edge_dst_pos, edge_weights = levels[level]
+            self._levels.append((
+                np.array(dst_slots, dtype=np.int64), np.array(biases),
+                np.array(edge_src, dtype=np.int64), np.array(edge_dst_pos, dtype=np.int64),
+                np.array(edge_weights), _np_function_groups(functions, SCALAR_ACTIVATION_FUNCTIONS),
+            ))
+
+    def activate(self, inputs: np.ndarray) -> np.ndarray:
+        """Обчислює виходи всіх мереж. inputs: (N, num_inputs) -> (N, num_outputs)."""
+        values = self.values
+        values[self._input_dst] = inputs[self._input_rows, self._input_cols]
+        for dst_slots, biases, edge_src, edge_dst_pos, edge_weights, function_groups in self._levels:
+            sums = np.bincount(edge_dst_pos, weights=values[edge_src] * edge_weights,
+                               minlength=len(dst_slots)) + biases
+            if len(function_groups) == 1:
+                values[dst_slots] = function_groups[0][0](sums)
+            else:
+                for func, positions in function_groups:
+                    values[dst_slots[positions]] = func(sums[positions])
+        return values[self._output_indices]
+
+
+class LayeredNetwork:
+    """
+    Фенотип прямого поширення, скомпільований у шари матриць.
+
+    Глибина вузла - довжина найдовшого шляху від входів (як рівні FeedForwardNetworkBatch
+    та шари network_visualizer). Вхідні ребра вузлів одного шару пакуються в щільну
+    матрицю ваг (вузли шару x джерела шару), тож активація - кілька матрично-векторних
+    добутків, а activate_batch для багатьох агентів однієї мережі - матрично-матричних.
+    Вигідно для великих мереж (сотні прихованих вузлів); результат збігається з
+    FeedForwardNetwork з точністю до порядку сумування (~1e-15).
+    """
+
+    def __init__(self, network: FeedForwardNetwork):
+        self.genome_id = network.genome_id
+        self.num_inputs = network.num_inputs
+        self.num_slots = len(network.values) # Включно з нульовим слотом для відсутніх виходів
+        self._input_positions = np.array([position for position, _ in network.input_slots], dtype=np.int64)
+        self._input_indices = np.array([index for _, index in network.input_slots], dtype=np.int64)
+        self.bias_index = network.bias_index
+        self._output_indices = np.array(network.output_indices, dtype=np.int64)
+
+        # layer -> [dst_slots, biases, functions, [(src_slot, dst_pos, weight), ...]]
+        layers: dict[int, list[list]] = {}
+        slot_depth: dict[int, int] = {}
+        for k, index in enumerate(network.eval_indices):
+            start, end = network.edge_offsets[k], network.edge_offsets[k + 1]
+            depth = 1 + max((slot_depth.get(network.edge_sources[e], 0) for e in range(start, end)), default=0)
+            slot_depth[index] = depth
+            layer = layers.setdefault(depth, [[], [], [], []])
+            dst_pos = len(layer[0])
+            layer[0].append(index)
+            layer[1].append(network.eval_biases[k])
+            layer[2].append(network.eval_functions[k])
+            layer[3].extend((network.edge_sources[e], dst_pos, network.edge_weights[e]) for e in range(start, end))
+
+        self._layers = []
+        for depth in sorted(layers):
+            dst_slots, biases, functions, edges = layers[depth]
+            src_slots = sorted({src for src, _, _ in edges})
+            column_of = {src: column for column, src in enumerate(src_slots)}
+            weights = np.zeros((len(dst_slots), len(src_slots)))
+            for src, dst_pos, weight in edges:
+                weights[dst_pos, column_of[src]] += weight
+            self._layers.append((np.array(dst_slots, dtype=np.int64), np.array(src_slots, dtype=np.int64),
+                                 weights, np.array(biases), _np_function_groups(functions)))
+        self._values = self._initial_values(1)[0]
+
+    @classmethod
+    def create(cls, genome: Genome) -> 'LayeredNetwork':
+        """Компілює геном через план фенотипу (див. get_network_plan) і пакує його в шари."""
+        return cls(FeedForwardNetwork.create(genome))
+
+    def _initial_values(self, num_agents: int) -> np.ndarray:
+        values = np.zeros((num_agents, self.num_slots))
+        if self.bias_index is not None:
+            values[:, self.bias_index] = 1.0
+        return values
+
+    @staticmethod
+    def _apply(function_groups: list, sums: np.ndarray) -> np.ndarray:
+        if len(function_groups) == 1:
+            return function_groups[0][0](sums)
+        result = np.empty_like(sums)
+        for func, positions in function_groups:
+            result[..., positions] = func(sums[..., positions])
+        return result
+
+    def activate(self, inputs: list[float]) -> list[float]:
+        """Обчислює виходи мережі для одного вектора входів."""
+        if len(inputs) != self.num_inputs:
+            raise ValueError(f"Genome {self.genome_id}: Number of inputs ({len(inputs)}) "
+                             f"does not match network input nodes ({self.num_inputs})")
+        values = self._values
+        values[self._input_indices] = np.asarray(inputs, dtype=np.float64)[self._input_positions]
+        for dst_slots, src_slots, weights, biases, function_groups in self._layers:
+            values[dst_slots] = self._apply(function_groups, weights @ values[src_slots] + biases)
+        return values[self._output_indices].tolist()
+
+    def activate_batch(self, inputs: np.ndarray) -> np.ndarray:
+        """Виходи мережі для багатьох агентів одночасно. inputs: (N, num_inputs) -> (N, num_outputs)."""
+        inputs = np.asarray(inputs, dtype=np.float64)
+        values = self._initial_values(len(inputs))
+        values[:, self._input_indices] = inputs[:, self._input_positions]
+        for dst_slots, src_slots, weights, biases, function_groups in self._layers:
+            values[:, dst_slots] = self._apply(function_groups, values[:, src_slots] @ weights.T + biases)
+        return values[:, self._output_indices]
+
+class RecurrentNetworkBatch:
+    """
+    Набір рекурентних мереж (по одній на агента), що крокують разом.
+
+    Стан усіх агентів зберігається в одному векторі (кожна мережа - свій відрізок)
+    з парою буферів, що чергуються: крок - один np.bincount по всіх ребрах
+    усіх мереж, без рівнів, бо оновлення синхронне.
+    """
+
+    def __init__(self, networks: list[RecurrentNetwork]):
+        if not networks:
+            raise ValueError("RecurrentNetworkBatch requires at least one network.")
+        self.num_networks = len(networks)
+        self.num_inputs = networks[0].num_inputs
+
+        input_rows, input_cols, input_dst, output_indices = [], [], [], []
+        bias_slots, dst_slots, biases, functions = [], [], [], []
+        edge_src, edge_dst_pos, edge_weights = [], [], []
+        offset = 0
+        for row, net in enumerate(networks):
+            if net.num_inputs != self.num_inputs:
+                raise ValueError("All networks in a batch must have the same number of inputs.")
+            for position, index in net.input_slots:
+                input_rows.append(row)
+                input_cols.append(position)
+                input_dst.append(offset + index)
+            output_indices.append([offset + index for index in net.output_indices])
+            if net.bias_index is not None:
+                bias_slots.append(offset + net.bias_index)
+            for k, index in enumerate(net.eval_indices):
+                dst_pos = len(dst_slots)
+                dst_slots.append(offset + index)
+                biases.append(net.eval_biases[k])
+                functions.append(net.eval_functions[k])
+                for e in range(net.edge_offsets[k], net.edge_offsets[k + 1]):
+                    edge_src.append(offset + net.edge_sources[e])
+                    edge_dst_pos.append(dst_pos)
+                    edge_weights.append(net.edge_weights[e])
+            offset += len(net.values)
+
+        self._bias_slots = np.array(bias_slots, dtype=np.int64)
+        self.values = np.zeros(offset)
+        self.next_values = np.zeros(offset)
+        self.reset()
+        self._input_rows = np.array(input_rows, dtype=np.int64)
+        self._input_cols = np.array(input_cols, dtype=np.int64)
+        self._input_dst = np.array(input_dst, dtype=np.int64)
+        self._output_indices = np.array(output_indices, dtype=np.int64)
+        self._dst_slots = np.array(dst_slots, dtype=np.int64)
+        self._biases = np.array(biases)
+        self._edge_src = np.array(edge_src, dtype=np.int64)
+        self._edge_dst_pos = np.array(edge_dst_pos, dtype=np.int64)
+        self._edge_weights = np.array(edge_weights)
+        self._function_groups = _np_function_groups(functions, SCALAR_ACTIVATION_FUNCTIONS)
+
+    def reset(self):
+        """Скидає стан усіх мереж."""
+        for buffer in (self.values, self.next_values):
+            buffer.fill(0.0)
+            buffer[self._bias_slots] = 1.0
+
+    def activate(self, inputs: np.ndarray) -> np.ndarray:
+        """Один синхронний крок усіх мереж. inputs: (N, num_inputs) -> (N, num_outputs)."""
+        values = self.values
+        next_values = self.next_values
+        values[self._input_dst] = inputs[self._input_rows, self._input_cols]
+        sums = np.bincount(self._edge_dst_pos, weights=values[self._edge_src] * self._edge_weights,
+                           minlength=len(self._dst_slots)) + self._biases
+        if len(self._function_groups) == 1:
+            next_values[self._dst_slots] = self._function_groups[0][0](sums)
+        else:
+            for func, positions in self._function_groups:
+                next_values[self._dst_slots[positions]] = func(sums[positions])
+        self.values, self.next_values = next_values, values
+        return next_values[self._output_indices]
+
+def create_network_batch(genomes: list[Genome], config: dict):
+    """
+    Компілює геноми популяції в пакет для покрокової оцінки всіх агентів разом.
+    LAYERED_NETWORKS тут не застосовується: пакет і так обчислює кожен рівень
+    усіх мереж одним векторним кроком (шари однієї мережі - LayeredNetwork.activate_batch).
+    """
+    if not config.get('FEED_FORWARD', True):
+        return RecurrentNetworkBatch([RecurrentNetwork.create(genome) for genome in genomes])
+    return FeedForwardNetworkBatch([FeedForwardNetwork.create(genome) for genome in genomes])
@@ -0,0 +1,137 @@
+# neat/run_log.py
+
+import json
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+from neat.json_serializer import NEATJSONSerializer
+from neat.log import get_logger
+
+logger = get_logger(__name__)
+
+class RunLog:
+    """
+    Журнал запуску у форматі JSON Lines: один рядок на покоління, файл лише дописується.
+    Запис - серіалізована статистика покоління (ID геномів замість об'єктів), тож
+    збереження кожного покоління коштує один короткий запис незалежно від довжини запуску.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = None # Відкривається при першому записі
+
+    @classmethod
+    def for_config(cls, config: dict) -> Optional['RunLog']:
+        """Новий журнал у каталозі RUN_LOG_DIR (None, якщо журнал вимкнено)."""
+        log_dir = config.get('RUN_LOG_DIR')
+        if not log_dir:
+            return None
+        filename = f"run_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.jsonl"
+        return cls(os.path.join(log_dir, filename))
+
+    def append(self, record: dict):
+        """Дописує запис і одразу скидає його на диск."""
+        if self._file is None:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.filepath, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        # Відкритий файл не пікується - копія відкриє його заново при першому записі
+        return {'filepath': self.filepath, '_file': None}
+
+    @staticmethod
+    def read_records(filepath: str) -> Iterator[dict]:
+        """Читає записи журналу; недописаний останній рядок (аварійне завершення) пропускається."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed run log line %d in %s", line_number, filepath)
+
+class GenerationHistory:
+    """
+    Історія поколінь з обмеженою пам'яттю: в пам'яті - лише останні window записів
+    (з посиланнями на геноми), для всього запуску - агреговані підсумки, а повна
+    історія дописується в RunLog. Поводиться як список для читання (len, ітерація, індекси).
+    """
+
+    def __init__(self, window: Optional[int] = None, run_log: Optional[RunLog] = None):
+        self.window = window if window else None # None/0 - необмежено
+        self.run_log = run_log
+        self.records = deque(maxlen=self.window)
+        self.total_generations = 0
+        self.best_max_fitness: Optional[float] = None
+        self.best_max_fitness_generation: Optional[int] = None
+        self._average_fitness_sum = 0.0
+
+    def append(self, stats: dict):
+        """Додає статистику покоління в пам'ять і оновлює підсумки (без запису в журнал)."""
+        self.records.append(stats)
+        self.total_generations += 1
+        max_fitness = stats.get("max_fitness")
+        if max_fitness is not None and (self.best_max_fitness is None or max_fitness > self.best_max_fitness):
+            self.best_max_fitness = max_fitness
+            self.best_max_fitness_generation = stats.get("generation")
+        self._average_fitness_sum += stats.get("average_fitness") or 0.0
+
+    def extend(self, entries):
+        for stats in entries:
+            self.append(stats)
+
+    def record(self, stats: dict):
+        """Додає статистику щойно завершеного покоління та дописує її в журнал запуску."""
+        self.append(stats)
+        if self.run_log is not None:
+            try:
+                self.run_log.append(NEATJSONSerializer.serialize_generation_data(stats.get("generation", 0), [], [], stats))
+            except OSError as e:
+                logger.error("Failed to write run log %s: %s. Run logging disabled.", self.run_log.filepath, e)
+                self.run_log = None
+
+    def summary(self) -> Dict:
+        """Підсумки за весь запуск (включно з поколіннями, що вже вийшли з вікна)."""
+        return {
+            "total_generations": self.total_generations,
+            "best_max_fitness": self.best_max_fitness,
+            "best_max_fitness_generation": self.best_max_fitness_generation,
+            "mean_average_fitness": self._average_fitness_sum / self.total_generations if self.total_generations else None,
+        }
+
+    def restore_summary(self, summary: Dict):
+        """Відновлює підсумки зі збереження (вікно могло містити не всі покоління)."""
+        self.total_generations = summary.get("total_generations", self.total_generations)
+        self.best_max_fitness = summary.get("best_max_fitness", self.best_max_fitness)
+        self.best_max_fitness_generation = summary.get("best_max_fitness_generation", self.best_max_fitness_generation)
+        mean_average = summary.get("mean_average_fitness")
+        if mean_average is not None:
+            self._average_fitness_sum = mean_average * self.total_generations
+
+    def close(self):
+        if self.run_log is not None:
+            self.run_log.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.records)[index]
+        return self.records[index]
@@ -6,6 +6,9 @@ import math
 
 # Припускаємо, що клас Genome імпортується або доступний
 from .genome import Genome # Якщо в тому ж пакеті
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 class Species:
     """
@@ -132,7 +135,7 @@ class Species:
             # Це критична помилка, якщо немає жодного геному для представника
             # Можливо, варто створити "пустий" вид або викликати виняток
             # Для простоти, повернемо None, але це треба обробити вище
-            print(f"Warning: Could not find representative genome for species data: {data}")
+            logger.warning("Could not find representative genome for species data: %s", data)
             # Як тимчасове рішення, можна створити "пустий" вид, якщо це допустимо,
             # але краще забезпечити наявність геномів.
             # Якщо вид не може існувати без представника, це треба обробляти.
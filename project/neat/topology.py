@@ -0,0 +1,135 @@
+# neat/topology.py
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+class TopologicalOrder:
+    """
+    Інкрементальний топологічний порядок графа з'єднань геному (алгоритм Пірса-Келлі).
+
+    Кожен вузол має ранг; для кожного ребра u -> v виконується rank[u] < rank[v].
+    Нове ребро, що вже узгоджене з рангами, додається за O(1). Інакше обхід
+    обмежується вузлами з рангами між кінцями ребра: або знаходиться цикл,
+    або переставляються ранги лише зачеплених вузлів.
+
+    Враховуються всі гени з'єднань (і вимкнені): кросовер та мутації можуть
+    знову увімкнути ген, тож ациклічним має бути весь граф генів.
+    """
+
+    def __init__(self, nodes: Iterable[int] = (), edges: Iterable[Tuple[int, int]] = ()):
+        self.successors: Dict[int, Set[int]] = {}
+        self.predecessors: Dict[int, Set[int]] = {}
+        self.rank: Dict[int, int] = {}
+        self._next_rank = 0
+        # False, якщо граф уже містить цикл (напр. старі збереження) - тоді перевірки йдуть повним обходом
+        self.acyclic = True
+        self.num_edges = 0
+
+        edges = list(edges)
+        for node_id in nodes:
+            self._ensure_node(node_id)
+        for in_id, out_id in edges:
+            self._ensure_node(in_id)
+            self._ensure_node(out_id)
+            if out_id not in self.successors[in_id]:
+                self.successors[in_id].add(out_id)
+                self.predecessors[out_id].add(in_id)
+            self.num_edges += 1
+        self._assign_initial_ranks()
+
+    def _ensure_node(self, node_id: int):
+        if node_id not in self.rank:
+            self.successors[node_id] = set()
+            self.predecessors[node_id] = set()
+            self.rank[node_id] = self._next_rank
+            self._next_rank += 1
+
+    def _assign_initial_ranks(self):
+        """Ранги за алгоритмом Кана; вузли, що лишились (цикл), отримують ранги в кінці."""
+        in_degree = {node_id: len(preds) for node_id, preds in self.predecessors.items()}
+        queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        order = []
+        while queue:
+            node_id = queue.pop()
+            order.append(node_id)
+            for succ in self.successors[node_id]:
+                in_degree[succ] -= 1
+                if in_degree[succ] == 0:
+                    queue.append(succ)
+        if len(order) != len(self.rank):
+            self.acyclic = False
+            placed = set(order)
+            order.extend(node_id for node_id in self.rank if node_id not in placed)
+        for position, node_id in enumerate(order):
+            self.rank[node_id] = position
+        self._next_rank = len(order)
+
+    def add_node(self, node_id: int):
+        """Додає ізольований вузол (ранг - після всіх наявних)."""
+        self._ensure_node(node_id)
+
+    def creates_cycle(self, in_id: int, out_id: int) -> bool:
+        """Чи утворить ребро in_id -> out_id цикл (граф не змінюється)."""
+        if in_id == out_id:
+            return True
+        if in_id not in self.rank or out_id not in self.rank:
+            return False # Новий вузол не може замкнути цикл
+        if self.acyclic and self.rank[in_id] < self.rank[out_id]:
+            return False
+        upper = self.rank[in_id] if self.acyclic else None
+        return self._forward_region(out_id, upper, in_id) is None
+
+    def add_edge(self, in_id: int, out_id: int) -> bool:
+        """
+        Додає ребро та відновлює топологічний порядок.
+
+        Returns:
+            bool: False, якщо ребро утворило цикл (ребро все одно додається,
+                  порядок надалі вважається недійсним).
+        """
+        self._ensure_node(in_id)
+        self._ensure_node(out_id)
+        self.num_edges += 1
+        if out_id in self.successors[in_id]:
+            return True
+        creates_cycle = self.creates_cycle(in_id, out_id)
+        if not creates_cycle and self.acyclic and self.rank[in_id] > self.rank[out_id]:
+            self._reorder(in_id, out_id)
+        self.successors[in_id].add(out_id)
+        self.predecessors[out_id].add(in_id)
+        if creates_cycle:
+            self.acyclic = False
+        return not creates_cycle
+
+    def _forward_region(self, start: int, upper, target: int):
+        """Вузли, досяжні з start з рангом <= upper; None, якщо досяжний target."""
+        rank = self.rank
+        visited = {start}
+        stack = [start]
+        while stack:
+            node_id = stack.pop()
+            for succ in self.successors[node_id]:
+                if succ == target:
+                    return None
+                if succ not in visited and (upper is None or rank[succ] <= upper):
+                    visited.add(succ)
+                    stack.append(succ)
+        return visited
+
+    def _reorder(self, in_id: int, out_id: int):
+        """Переставляє ранги зачеплених вузлів, щоб rank[in_id] < rank[out_id]."""
+        rank = self.rank
+        forward = self._forward_region(out_id, rank[in_id], in_id)
+        lower = rank[out_id]
+        backward = {in_id}
+        stack = [in_id]
+        while stack:
+            node_id = stack.pop()
+            for pred in self.predecessors[node_id]:
+                if pred not in backward and rank[pred] >= lower:
+                    backward.add(pred)
+                    stack.append(pred)
+        # Предки in_id йдуть перед нащадками out_id, відносний порядок усередині груп зберігається
+        affected: List[int] = sorted(backward, key=rank.__getitem__) + sorted(forward, key=rank.__getitem__)
+        ranks = sorted(rank[node_id] for node_id in affected)
+        for node_id, new_rank in zip(affected, ranks):
+            rank[node_id] = new_rank
@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+import timeit
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import config as cfg
+from neat.genome import Genome, NodeGene, ConnectionGene
+from neat.innovation import InnovationManager
+
+# Мікробенчмарк Genome.copy: запуск - python testing/benchmark_genome_copy.py
+
+def legacy_copy(genome: Genome) -> Genome:
+    """Попередня реалізація копіювання: повний конструктор + конструктори генів."""
+    new_genome = Genome(genome.id, 0, 0, genome.config, InnovationManager())
+    new_genome.fitness = genome.fitness
+    new_genome.adjusted_fitness = genome.adjusted_fitness
+    new_genome.species_id = genome.species_id
+    new_genome._input_node_ids = list(genome._input_node_ids)
+    new_genome._output_node_ids = list(genome._output_node_ids)
+    new_genome._bias_node_id = genome._bias_node_id
+    new_genome.nodes = {nid: NodeGene(n.id, n.type, n.bias, n.activation_function_name) for nid, n in genome.nodes.items()}
+    new_genome.connections = {innov: ConnectionGene(c.in_node_id, c.out_node_id, c.weight, c.enabled, c.innovation)
+                              for innov, c in genome.connections.items()}
+    return new_genome
+
+def build_genome(num_genes: int, config: dict) -> Genome:
+    """Геном приблизно з num_genes генами (вузли + з'єднання)."""
+    innovation_manager = InnovationManager(start_node_id=config['NUM_INPUTS'] + config['NUM_OUTPUTS'] + 1)
+    genome = Genome(0, config['NUM_INPUTS'], config['NUM_OUTPUTS'], config, innovation_manager)
+    while len(genome.nodes) + len(genome.connections) < num_genes:
+        if not genome.mutate_add_connection(innovation_manager) or random.random() < 0.3:
+            genome.mutate_add_node(innovation_manager)
+    return genome
+
+def main():
+    config = {key: getattr(cfg, key) for key in dir(cfg) if not key.startswith('_')}
+    config.setdefault('NUM_INPUTS', 11)
+    random.seed(0)
+    print(f"{'genes':>6} {'legacy, us':>11} {'copy, us':>9} {'speedup':>8}")
+    for num_genes in (100, 300, 1000):
+        genome = build_genome(num_genes, config)
+        repeats = max(20, 20000 // num_genes)
+        legacy = min(timeit.repeat(lambda: legacy_copy(genome), number=repeats, repeat=5)) / repeats
+        fast = min(timeit.repeat(genome.copy, number=repeats, repeat=5)) / repeats
+        print(f"{len(genome.nodes) + len(genome.connections):>6} {legacy * 1e6:>11.1f} {fast * 1e6:>9.1f} {legacy / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
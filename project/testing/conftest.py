@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import config as cfg
+from neat.genome import Genome
+from neat.innovation import InnovationManager
+
+class GenomeFactory:
+    """Створює геноми однакового розміру зі спільним InnovationManager."""
+
+    def __init__(self, config: dict, num_inputs: int, num_outputs: int):
+        self.config = config
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.innovation_manager = InnovationManager(start_node_id=num_inputs + num_outputs + 1)
+
+    def __call__(self, genome_id: int = 0, mutations: int = 0, add_node: float = 0.5) -> Genome:
+        """Новий геном після mutations кроків: ваги, нове з'єднання, з імовірністю add_node - новий вузол."""
+        genome = Genome(genome_id, self.num_inputs, self.num_outputs, self.config, self.innovation_manager)
+        for _ in range(mutations):
+            genome.mutate_weights()
+            genome.mutate_add_connection(self.innovation_manager)
+            if random.random() < add_node:
+                genome.mutate_add_node(self.innovation_manager)
+        return genome
+
+@pytest.fixture
+def config():
+    config = {key: getattr(cfg, key) for key in dir(cfg) if not key.startswith('_')}
+    # Як у застосунку: датчики відстані + радар + напрям (2) + швидкість
+    config.setdefault('NUM_INPUTS', config['NUM_RANGEFINDERS'] + config['NUM_RADAR_SLICES'] + 3)
+    return config
+
+@pytest.fixture
+def genome_factory(config):
+    return GenomeFactory(config, config['NUM_INPUTS'], config['NUM_OUTPUTS'])
+
+@pytest.fixture
+def small_genome_factory(config):
+    """3 входи, 2 виходи: 8 можливих пар вхід/біас-вихід."""
+    return GenomeFactory(config, 3, 2)
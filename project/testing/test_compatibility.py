@@ -0,0 +1,34 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import numpy as np
+from neat.compatibility import PopulationEncoding, genome_to_population_distances, pairwise_distances
+
+C1, C2, C3 = 1.0, 1.0, 0.4
+
+@pytest.fixture
+def genomes(genome_factory):
+    random.seed(42)
+    population = [genome_factory(genome_id, random.randint(0, 12), add_node=0.4) for genome_id in range(30)]
+    population.append(population[3].copy()) # Однакова структура
+    empty = population[0].copy()
+    empty.connections.clear()
+    population.append(empty) # Порожній геном
+    return population
+
+def test_distances_match_genome_distance(genomes):
+    encoding = PopulationEncoding(genomes)
+    for genome in genomes:
+        expected = [genome.distance(other, C1, C2, C3) for other in genomes]
+        assert np.allclose(genome_to_population_distances(genome, encoding, C1, C2, C3), expected, rtol=0, atol=1e-12)
+
+def test_pairwise_distances_symmetric(genomes):
+    matrix = pairwise_distances(genomes, C1, C2, C3)
+    assert matrix.shape == (len(genomes), len(genomes))
+    assert np.allclose(matrix, matrix.T)
+    assert np.allclose(np.diag(matrix), 0.0)
@@ -0,0 +1,22 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+from main import evaluate_population_batch, evaluate_single_genome
+
+@pytest.mark.parametrize("maze_seed", [123, 42, 2024])
+@pytest.mark.parametrize("ray_caster", ["march", "dda"])
+def test_batch_evaluation_matches_single_genome(config, genome_factory, ray_caster, maze_seed):
+    config.update(MAZE_SEED=maze_seed, RAY_CASTER=ray_caster, FEED_FORWARD=True, RAY_LOOKUP_TABLE=False)
+    random.seed(11)
+    population = [(genome_id, genome_factory(genome_id, random.randint(0, 6))) for genome_id in range(60)]
+
+    # Повна оцінка (MAX_STEPS_PER_EVALUATION з config.py): розбіжність в останньому біті
+    # за кілька десятків кроків змінює траєкторію, тож порівняння - точне
+    single = {genome_id: fitness for genome_id, fitness, _ in (evaluate_single_genome(t, config) for t in population)}
+    batch = {genome_id: fitness for genome_id, fitness, _ in evaluate_population_batch(population, config)}
+    assert batch == single
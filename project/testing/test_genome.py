@@ -1,12 +1,15 @@
 
 import os
+import pickle
+import random
 import pytest
 import sys
 viz_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(viz_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
-from neat.genome import NodeGene
+from neat.binary_serializer import SUMMARY_FIELDS, NEATBinarySerializer
+from neat.genome import Genome, NodeGene
 
 @pytest.fixture
 def node_gene():
@@ -29,3 +32,61 @@ def test_node_gene_dict(node_gene):
         "activation_function_name": node_gene.activation_function_name,
     }
     assert node_gene.to_dict() == expected_dict
+
+def test_genome_pickle_roundtrip(genome_factory):
+    random.seed(1)
+    genome = genome_factory(7, mutations=10, add_node=1.0)
+    genome.fitness = 3.5
+    restored = pickle.loads(pickle.dumps(genome))
+    assert restored.id == genome.id and restored.fitness == genome.fitness
+    assert [n.to_dict() for n in restored.nodes.values()] == [n.to_dict() for n in genome.nodes.values()]
+    assert [c.to_dict() for c in restored.connections.values()] == [c.to_dict() for c in genome.connections.values()]
+    assert all(restored.nodes[i].activation_function is genome.nodes[i].activation_function for i in genome.nodes)
+
+def test_add_connection_fills_dense_genome(small_genome_factory):
+    random.seed(3)
+    genome = small_genome_factory()
+    innovation_manager = small_genome_factory.innovation_manager
+    # 4 початки (3 входи + біас) x 2 виходи = 8 можливих пар
+    while genome.mutate_add_connection(innovation_manager, max_attempts=1):
+        pass
+    assert len(genome.connections) == 8
+    assert genome.get_edge_index() == {(c.in_node_id, c.out_node_id) for c in genome.connections.values()}
+
+def test_mutations_keep_genome_acyclic(genome_factory):
+    random.seed(4)
+    innovation_manager = genome_factory.innovation_manager
+    population = [genome_factory(i) for i in range(10)]
+    for _ in range(15):
+        children = []
+        for genome in population:
+            child = Genome.crossover(genome, random.choice(population), random.random() < 0.5)
+            for _ in range(3):
+                child.mutate_add_connection(innovation_manager)
+                child.mutate_add_node(innovation_manager)
+            children.append(child)
+        population = children
+    for genome in population:
+        topology = genome.get_topology()
+        assert topology.acyclic
+        assert all(topology.rank[c.in_node_id] < topology.rank[c.out_node_id] for c in genome.connections.values())
+        hidden = [nid for nid, node in genome.nodes.items() if node.type == "HIDDEN"]
+        for conn in genome.connections.values():
+            if conn.in_node_id in hidden:
+                assert genome.creates_cycle(conn.out_node_id, conn.in_node_id)
+
+def test_genome_summary_tracks_structure(config, small_genome_factory):
+    config['INITIAL_CONNECTIONS'] = 8 # Усі пари вхід-вихід
+    random.seed(6)
+    genome = small_genome_factory()
+    summary = genome.summary()
+    assert (summary["num_nodes"], summary["num_hidden"], summary["depth"]) == (6, 0, 1)
+    assert genome.mutate_add_node(small_genome_factory.innovation_manager)
+    summary = genome.summary()
+    assert (summary["num_hidden"], summary["num_enabled"], summary["depth"]) == (1, len(genome.connections) - 1, 2)
+    # Хеш стабільний між процесами та однаковий для копії
+    assert summary["structural_hash"] == genome.copy().structural_hash() < 2 ** 63
+    # Колонки двійкового збереження рахуються з масивів генів і збігаються з summary()
+    columns = NEATBinarySerializer.summary_columns(*NEATBinarySerializer.pack_genomes({0: genome}))
+    assert {field: int(columns['summary_' + field][0]) for field in SUMMARY_FIELDS} == \
+        {field: summary[field] for field in SUMMARY_FIELDS}
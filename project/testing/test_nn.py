@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import numpy as np
+from neat.nn import (activate_network, FeedForwardNetwork, FeedForwardNetworkBatch, RecurrentNetwork, create_network_batch,
+                    LayeredNetwork, NetworkPlan, get_network_plan)
+
+def _mutated_genomes(genome_factory, count=20, mutations=15):
+    random.seed(1234)
+    return [genome_factory(genome_id, mutations, add_node=0.3) for genome_id in range(count)]
+
+def test_compiled_network_matches_activate_network(genome_factory):
+    for genome in _mutated_genomes(genome_factory):
+        network = FeedForwardNetwork.create(genome)
+        for _ in range(5):
+            inputs = [random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)]
+            assert network.activate(inputs) == activate_network(genome, inputs)
+
+def test_activation_does_not_mutate_genome(genome_factory):
+    genome = _mutated_genomes(genome_factory, count=1)[0]
+    snapshot = [(n.id, n.bias) for n in genome.nodes.values()]
+    activate_network(genome, [0.5] * genome_factory.num_inputs)
+    FeedForwardNetwork.create(genome).activate([0.5] * genome_factory.num_inputs)
+    assert [(n.id, n.bias) for n in genome.nodes.values()] == snapshot
+    assert not any(hasattr(n, 'output_value') for n in genome.nodes.values())
+
+def test_compiled_network_rejects_wrong_input_size(genome_factory):
+    network = FeedForwardNetwork.create(_mutated_genomes(genome_factory, count=1)[0])
+    with pytest.raises(ValueError):
+        network.activate([0.0] * (genome_factory.num_inputs - 1))
+
+def test_network_batch_matches_individual_networks(genome_factory):
+    genomes = _mutated_genomes(genome_factory)
+    batch = FeedForwardNetworkBatch([FeedForwardNetwork.create(g) for g in genomes])
+    inputs = np.array([[random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)] for _ in genomes])
+    expected = [FeedForwardNetwork.create(g).activate(list(row)) for g, row in zip(genomes, inputs)]
+    assert np.allclose(batch.activate(inputs), expected, rtol=0, atol=1e-12)
+
+def test_recurrent_network_settles_to_feed_forward_output(genome_factory):
+    # Для ациклічного геному синхронні кроки з незмінним входом сходяться до виходу мережі прямого поширення
+    for genome in _mutated_genomes(genome_factory, count=5):
+        inputs = [random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)]
+        network = RecurrentNetwork.create(genome)
+        for _ in range(len(genome.nodes)):
+            outputs = network.activate(inputs)
+        assert np.allclose(outputs, FeedForwardNetwork.create(genome).activate(inputs), rtol=0, atol=1e-12)
+
+def test_recurrent_batch_matches_individual_networks(config, genome_factory):
+    config['FEED_FORWARD'] = False # Геноми фабрики теж можуть отримувати цикли
+    genomes = _mutated_genomes(genome_factory, mutations=25)
+    networks = [RecurrentNetwork.create(g) for g in genomes]
+    batch = create_network_batch(genomes, config)
+    for _ in range(6):
+        inputs = np.array([[random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)] for _ in genomes])
+        expected = [net.activate(list(row)) for net, row in zip(networks, inputs)]
+        assert np.allclose(batch.activate(inputs), expected, rtol=0, atol=1e-12)
+
+def test_network_plan_shared_by_weight_only_variants(genome_factory):
+    genome = _mutated_genomes(genome_factory, count=1, mutations=30)[0]
+    variant = genome.copy()
+    variant.mutate_weights()
+    assert variant.structural_hash() == genome.structural_hash()
+    assert get_network_plan(variant) is get_network_plan(genome)
+    inputs = [random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)]
+    # Мережа з кешованого плану ідентична компіляції з нуля та activate_network
+    expected = NetworkPlan(variant, recurrent=False).instantiate(variant).activate(inputs)
+    assert FeedForwardNetwork.create(variant).activate(inputs) == expected == activate_network(variant, inputs)
+
+def test_layered_network_matches_compiled_network(genome_factory):
+    genomes = _mutated_genomes(genome_factory, count=10, mutations=40)
+    for genome in genomes:
+        network = FeedForwardNetwork.create(genome)
+        layered = LayeredNetwork.create(genome)
+        inputs = np.array([[random.uniform(-1.0, 1.0) for _ in range(genome_factory.num_inputs)] for _ in range(8)])
+        expected = [network.activate(list(row)) for row in inputs]
+        assert np.allclose(layered.activate_batch(inputs), expected, rtol=0, atol=1e-12)
+        assert np.allclose(layered.activate(list(inputs[0])), expected[0], rtol=0, atol=1e-12)
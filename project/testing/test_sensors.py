@@ -0,0 +1,51 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import numpy as np
+from environment.maze import Maze
+from environment.agent import Agent
+from environment.sensors import SensorArray
+
+@pytest.mark.parametrize("ray_caster", ["march", "dda"])
+def test_sensor_array_matches_agent(ray_caster):
+    config = {'NUM_RANGEFINDERS': 16, 'RANGEFINDER_MAX_DIST': 8.0, 'NUM_RADAR_SLICES': 4,
+              'NUM_INPUTS': 23, 'RAY_CASTER': ray_caster}
+    maze = Maze(21, 21, 42)
+    random.seed(5)
+    paths = [(r, c) for r in range(maze.height) for c in range(maze.width) if maze.is_walkable(r, c)]
+    agents = []
+    for agent_id in range(50):
+        agent = Agent(agent_id, maze.start_pos, config)
+        r, c = random.choice(paths)
+        agent.x, agent.y = c + random.random(), r + random.random()
+        agents.append(agent)
+
+    sensors = SensorArray(maze, config)
+    x = np.array([a.x for a in agents])
+    y = np.array([a.y for a in agents])
+    heading = np.array([a.angle for a in agents])
+    readings = sensors.readings(x, y, heading, np.zeros(len(agents)))
+    expected = [agent.get_sensor_readings(maze) for agent in agents]
+    assert readings.shape == (len(agents), config['NUM_INPUTS'])
+    assert np.allclose(readings, expected, rtol=0, atol=1e-9)
+
+def test_ray_table_approximates_exact_caster():
+    config = {'NUM_RANGEFINDERS': 8, 'RANGEFINDER_MAX_DIST': 8.0, 'NUM_RADAR_SLICES': 4,
+              'NUM_INPUTS': 15, 'RAY_CASTER': 'dda', 'RAY_TABLE_CACHE_DIR': None}
+    maze = Maze(21, 21, 7)
+    exact = SensorArray(maze, config)
+    approx = SensorArray(maze, dict(config, RAY_LOOKUP_TABLE=True))
+    rng = np.random.default_rng(0)
+    paths = np.array([(r, c) for r in range(maze.height) for c in range(maze.width) if maze.is_walkable(r, c)])
+    cells = paths[rng.integers(len(paths), size=200)]
+    x = cells[:, 1] + rng.random(200)
+    y = cells[:, 0] + rng.random(200)
+    heading = rng.uniform(0, 2 * np.pi, 200)
+    error = np.abs(approx.rangefinder_distances(x, y, heading) - exact.rangefinder_distances(x, y, heading))
+    assert np.median(error) < 0.05
+    assert np.mean(error) < 0.25
@@ -0,0 +1,101 @@
+import os
+import random
+import sys
+import pytest
+viz_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(viz_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+import numpy as np
+from neat.binary_serializer import NEATBinarySerializer
+from neat.checkpoint import CheckpointWriter
+from neat.data_analyzer import NEATDataAnalyzer
+from neat.genome import Genome, NodeGene, ConnectionGene
+from neat.innovation import InnovationManager
+from neat.json_serializer import NEATJSONSerializer
+from neat.neat_algorithm import NeatAlgorithm
+from neat.run_log import GenerationHistory, RunLog
+from neat.species import Species
+
+@pytest.fixture
+def config(config):
+    config['POPULATION_SIZE'] = 20
+    config['RUN_LOG_DIR'] = None
+    return config
+
+def load(serializer, filepath, config):
+    neat = serializer.load_neat_state(filepath, dict(config), NeatAlgorithm, Genome, NodeGene, ConnectionGene,
+                                      Species, InnovationManager)
+    genomes = {gid: NEATJSONSerializer.serialize_genome(g) for gid, g in NEATJSONSerializer.collect_genomes(neat).items()}
+    state = NEATJSONSerializer.build_state_data(neat, neat.config, {}, None)
+    del state["metadata"]
+    return genomes, state
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_binary_checkpoint_matches_json(config, tmp_path, compression):
+    random.seed(3)
+    neat = NeatAlgorithm(config, config['NUM_INPUTS'], config['NUM_OUTPUTS'])
+    for genome in neat.population:
+        genome.fitness = random.random()
+        for _ in range(5):
+            genome.mutate_add_connection(neat.innovation_manager)
+            genome.mutate_add_node(neat.innovation_manager)
+    json_path, binary_path = str(tmp_path / "state.json"), str(tmp_path / "state.neatb")
+    NEATJSONSerializer.save_neat_state(json_path, neat, dict(config))
+    NEATBinarySerializer.save_neat_state(binary_path, neat, dict(config), compression=compression)
+    neat.shutdown()
+
+    assert NEATBinarySerializer.is_binary_checkpoint(binary_path)
+    assert not NEATBinarySerializer.is_binary_checkpoint(json_path)
+    assert os.path.getsize(binary_path) < os.path.getsize(json_path)
+    assert load(NEATBinarySerializer, binary_path, config) == load(NEATJSONSerializer, json_path, config)
+
+def test_generation_history_keeps_window_and_logs_all(tmp_path):
+    run_log = RunLog(str(tmp_path / "logs" / "run.jsonl"))
+    history = GenerationHistory(window=3, run_log=run_log)
+    for generation in range(1, 11):
+        history.record({"generation": generation, "max_fitness": float(generation % 7), "average_fitness": 1.0})
+    history.close()
+
+    assert [stats["generation"] for stats in history] == [8, 9, 10]
+    assert history.summary() == {"total_generations": 10, "best_max_fitness": 6.0,
+                                 "best_max_fitness_generation": 6, "mean_average_fitness": 1.0}
+    assert [record["generation"] for record in RunLog.read_records(run_log.filepath)] == list(range(1, 11))
+
+def test_checkpoint_writer_rotates_and_writes_loadable_files(config, tmp_path):
+    neat = NeatAlgorithm(config, config['NUM_INPUTS'], config['NUM_OUTPUTS'])
+    writer = CheckpointWriter(str(tmp_path), every_generations=2, keep_last=2)
+    for generation in range(1, 9):
+        neat.generation = generation
+        writer.maybe_checkpoint(neat, config)
+        writer.wait()
+    writer.close()
+    neat.shutdown()
+
+    assert sorted(os.listdir(tmp_path)) == ["checkpoint_gen000006.neatb", "checkpoint_gen000008.neatb"]
+    loaded = NEATBinarySerializer.load_neat_state(writer.last_checkpoint_path, dict(config), NeatAlgorithm, Genome,
+                                                  NodeGene, ConnectionGene, Species, InnovationManager)
+    assert loaded.generation == 8
+    assert len(loaded.population) == config['POPULATION_SIZE']
+    loaded.shutdown()
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_analyzer_reads_binary_archive_like_json(config, tmp_path, compression):
+    random.seed(5)
+    config['BATCH_EVALUATION'] = True
+    neat = NeatAlgorithm(config, config['NUM_INPUTS'], config['NUM_OUTPUTS'])
+    for _ in range(3):
+        neat.run_generation(None, lambda population, cfg: [(gid, random.random(), False) for gid, _ in population])
+    json_path, binary_path = str(tmp_path / "run.json"), str(tmp_path / "run.neatb")
+    NEATJSONSerializer.save_neat_state(json_path, neat, dict(config))
+    NEATBinarySerializer.save_neat_state(binary_path, neat, dict(config), compression=compression)
+    neat.shutdown()
+
+    json_analyzer, binary_analyzer = NEATDataAnalyzer(json_path), NEATDataAnalyzer(binary_path)
+    columns = binary_analyzer.genome_table.arrays
+    assert all(isinstance(columns[name], np.memmap) == (compression == "none") for name in columns if columns[name].size)
+    assert binary_analyzer.get_genome_complexity_evolution().equals(json_analyzer.get_genome_complexity_evolution())
+    assert binary_analyzer.get_best_genomes_per_generation() == json_analyzer.get_best_genomes_per_generation()
+    assert binary_analyzer.get_genome_summaries().equals(json_analyzer.get_genome_summaries())
+    for genome_id in json_analyzer.all_genomes:
+        assert binary_analyzer.get_genome(genome_id) == json_analyzer.get_genome(genome_id)
@@ -278,6 +278,8 @@ class CrossoverVisualizer:
                                                 conn2.weight, conn2.enabled, min_innov)
                         del self.parent2.connections[old_innov]
                         self.parent2.connections[min_innov] = new_conn
+        self.parent1.invalidate_caches()
+        self.parent2.invalidate_caches()
         
     def _perform_crossover(self):
         """Виконує кросовер між батьками."""
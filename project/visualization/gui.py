@@ -202,7 +202,7 @@ class MazeGUI:
         ax.fill_between(generations, num_species, alpha=0.3, color='green')
         ax.set_xlabel('Generation')
         ax.set_ylabel('Number of Species')
-        ax.set_title('Species Diversity Over Generations')
+        ax.set_title(self._plot_title('Species Diversity Over Generations', stats))
         ax.legend()
         ax.grid(True, alpha=0.3)
         plot_win.canvas.draw()
@@ -257,18 +257,28 @@ class MazeGUI:
         from tkinter import filedialog
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Archive", "*.neatb"), ("All Files", "*.*")],
             title="Export Training Data"
         )
         
         if filepath:
             try:
-                from neat.json_serializer import NEATJSONSerializer
-                NEATJSONSerializer.save_neat_state(
-                    filepath, 
-                    self.main_controller.neat, 
-                    self.main_controller.config.copy()
-                )
+                if filepath.endswith(".neatb"):
+                    # Без стиснення: аналізатор відображає такий файл у пам'ять
+                    from neat.binary_serializer import NEATBinarySerializer
+                    NEATBinarySerializer.save_neat_state(
+                        filepath,
+                        self.main_controller.neat,
+                        self.main_controller.config.copy(),
+                        compression="none"
+                    )
+                else:
+                    from neat.json_serializer import NEATJSONSerializer
+                    NEATJSONSerializer.save_neat_state(
+                        filepath, 
+                        self.main_controller.neat, 
+                        self.main_controller.config.copy()
+                    )
                 messagebox.showinfo("Success", f"Data exported to {os.path.basename(filepath)}")
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export data:\n{e}")
@@ -278,7 +288,7 @@ class MazeGUI:
         from tkinter import filedialog
         filepath = filedialog.askopenfilename(
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Archive", "*.neatb"), ("All Files", "*.*")],
             title="Select JSON File to Analyze"
         )
         
@@ -334,7 +344,7 @@ class MazeGUI:
         # Вибираємо перший файл
         file1 = filedialog.askopenfilename(
             title="Select First JSON File",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Archive", "*.neatb"), ("All Files", "*.*")]
         )
         if not file1:
             return
@@ -342,7 +352,7 @@ class MazeGUI:
         # Вибираємо другий файл
         file2 = filedialog.askopenfilename(
             title="Select Second JSON File",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+            filetypes=[("JSON Files", "*.json"), ("NEAT Binary Archive", "*.neatb"), ("All Files", "*.*")]
         )
         if not file2:
             return
@@ -352,18 +362,28 @@ class MazeGUI:
             analyzer2 = NEATDataAnalyzer(file2)
             
             # Імена файлів для міток
-            label1 = os.path.basename(file1).replace('.json', '')
-            label2 = os.path.basename(file2).replace('.json', '')
+            label1 = os.path.splitext(os.path.basename(file1))[0]
+            label2 = os.path.splitext(os.path.basename(file2))[0]
             
             analyzer1.compare_runs(analyzer2, labels=(label1, label2))
         except Exception as e:
             messagebox.showerror("Comparison Error", f"Failed to compare files:\n{e}")
     def _get_plot_data(self) -> list:
-        """Отримує дані для графіків з SimulationController."""
+        """Отримує дані для графіків з SimulationController (вікно останніх поколінь у пам'яті)."""
         if self.main_controller and hasattr(self.main_controller.neat, 'generation_statistics'):
-            return self.main_controller.neat.generation_statistics
+            return list(self.main_controller.neat.generation_statistics)
         return []
 
+    def _plot_title(self, title: str, stats: list) -> str:
+        """Додає до заголовка підсумки запуску, якщо вікно історії містить не всі покоління."""
+        history = self.main_controller.neat.generation_statistics
+        summary = history.summary()
+        if summary["total_generations"] <= len(stats):
+            return title
+        best = summary["best_max_fitness"]
+        best_text = f", best max {best:.4f} @ gen {summary['best_max_fitness_generation']}" if best is not None else ""
+        return f"{title} (last {len(stats)} of {summary['total_generations']}{best_text})"
+
     def _plot_avg_fitness(self):
         """Відображає графік середнього фітнесу."""
         stats = self._get_plot_data()
@@ -376,7 +396,7 @@ class MazeGUI:
 
         plot_win = PlotWindow(self.master, title="Average Fitness per Generation")
         plot_win.plot_data(generations, avg_fitness,
-                            "Average Fitness Over Generations",
+                            self._plot_title("Average Fitness Over Generations", stats),
                             "Generation", "Average Fitness",
                             line_label="Avg Fitness")
 
@@ -392,7 +412,7 @@ class MazeGUI:
 
         plot_win = PlotWindow(self.master, title="Max Fitness per Generation")
         plot_win.plot_data(generations, max_fitness,
-                            "Maximum Fitness Over Generations",
+                            self._plot_title("Maximum Fitness Over Generations", stats),
                             "Generation", "Max Fitness",
                             line_label="Max Fitness")
         